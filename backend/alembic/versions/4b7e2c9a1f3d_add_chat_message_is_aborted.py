@@ -0,0 +1,36 @@
+"""Add is_aborted to chat_messages
+
+Revision ID: 4b7e2c9a1f3d
+Revises: dd8b704187c5
+Create Date: 2026-10-19 10:12:41.218304
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2c9a1f3d"
+down_revision: str | Sequence[str] | None = "dd8b704187c5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "chat_messages",
+        sa.Column(
+            "is_aborted",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chat_messages", "is_aborted")
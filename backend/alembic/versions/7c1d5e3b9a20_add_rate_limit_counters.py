@@ -0,0 +1,45 @@
+"""Add rate_limit_counters (UNLOGGED)
+
+Revision ID: 7c1d5e3b9a20
+Revises: 4b7e2c9a1f3d
+Create Date: 2026-10-19 14:03:27.514092
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1d5e3b9a20"
+down_revision: str | Sequence[str] | None = "4b7e2c9a1f3d"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rate_limit_counters",
+        sa.Column("key", sa.String(length=200), nullable=False),
+        sa.Column("hits", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index(
+        op.f("ix_rate_limit_counters_expires_at"),
+        "rate_limit_counters",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_rate_limit_counters_expires_at"),
+        table_name="rate_limit_counters",
+    )
+    op.drop_table("rate_limit_counters")
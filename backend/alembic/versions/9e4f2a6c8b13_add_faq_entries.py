@@ -0,0 +1,50 @@
+"""Add faq_entries
+
+Revision ID: 9e4f2a6c8b13
+Revises: 7c1d5e3b9a20
+Create Date: 2026-10-19 16:41:08.302117
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4f2a6c8b13"
+down_revision: str | Sequence[str] | None = "7c1d5e3b9a20"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "faq_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("language", sa.String(length=10), nullable=False),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("answer", sa.Text(), nullable=True),
+        sa.Column("embedding", Vector(768), nullable=True),
+        sa.Column("chunk_ids", sa.JSON(), nullable=True),
+        sa.Column("generated_at", sa.TIMESTAMP(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("language", "question", name="uq_faq_question"),
+    )
+    op.create_index(
+        op.f("ix_faq_entries_id"), "faq_entries", ["id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_faq_entries_id"), table_name="faq_entries")
+    op.drop_table("faq_entries")
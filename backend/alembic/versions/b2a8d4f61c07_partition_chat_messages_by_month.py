@@ -0,0 +1,204 @@
+"""Partition chat_messages by month
+
+Revision ID: b2a8d4f61c07
+Revises: 9e4f2a6c8b13
+Create Date: 2026-10-19 18:22:53.641970
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b2a8d4f61c07"
+down_revision: str | Sequence[str] | None = "9e4f2a6c8b13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Months created beyond the current one (the retention job keeps
+# creating them from then on)
+PARTITIONS_AHEAD = 2
+
+COLUMNS = (
+    "id, session_id, role, content, retrieved_chunks, "
+    "language_detected, response_time_ms, is_aborted"
+)
+
+
+def message_columns(created_at_nullable: bool) -> list[sa.Column]:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('chat_messages_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("role", sa.String(length=20), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("retrieved_chunks", sa.ARRAY(sa.Integer()), nullable=True),
+        sa.Column("language_detected", sa.String(length=10), nullable=True),
+        sa.Column("response_time_ms", sa.Integer(), nullable=True),
+        sa.Column(
+            "is_aborted",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=True,
+        ),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=created_at_nullable,
+        ),
+        sa.ForeignKeyConstraint(
+            ["session_id"], ["chat_sessions.id"], ondelete="CASCADE"
+        ),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The id sequence survives and moves to the partitioned table
+    op.execute("ALTER SEQUENCE chat_messages_id_seq OWNED BY NONE")
+    op.rename_table("chat_messages", "chat_messages_old")
+    op.execute(
+        "ALTER TABLE chat_messages_old "
+        "RENAME CONSTRAINT chat_messages_pkey TO chat_messages_old_pkey"
+    )
+    for index in (
+        "ix_chat_messages_created_at",
+        "ix_chat_messages_id",
+        "ix_chat_messages_session_id",
+    ):
+        op.drop_index(index, table_name="chat_messages_old")
+
+    # The partition key must be part of the primary key
+    op.create_table(
+        "chat_messages",
+        *message_columns(created_at_nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        op.f("ix_chat_messages_session_id"),
+        "chat_messages",
+        ["session_id"],
+        unique=False,
+    )
+    # Rows arrive in created_at order, so a BRIN index stays tiny and
+    # serves range scans for analytics
+    op.create_index(
+        "ix_chat_messages_created_at_brin",
+        "chat_messages",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+    # One partition per month from the oldest message on
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            next_month date := date_trunc(
+                'month',
+                coalesce((SELECT min(created_at) FROM chat_messages_old), now())
+            );
+            last_month date := date_trunc('month', now())
+                + interval '{PARTITIONS_AHEAD} months';
+        BEGIN
+            WHILE next_month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF chat_messages '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'chat_messages_' || to_char(next_month, '"y"YYYY"m"MM'),
+                    next_month,
+                    (next_month + interval '1 month')::date
+                );
+                next_month := next_month + interval '1 month';
+            END LOOP;
+        END $$;
+        """  # noqa: S608 - constants only
+    )
+
+    # Catches rows past the pre-created months if the retention job has
+    # not run (it keeps monthly partitions ahead, so this stays empty)
+    op.execute(
+        "CREATE TABLE chat_messages_default PARTITION OF chat_messages DEFAULT"
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO chat_messages ({COLUMNS}, created_at)
+        SELECT {COLUMNS}, coalesce(created_at, now())
+        FROM chat_messages_old
+        """  # noqa: S608 - constants only
+    )
+    op.drop_table("chat_messages_old")
+    op.execute("ALTER SEQUENCE chat_messages_id_seq OWNED BY chat_messages.id")
+
+    # Retention deletes sessions by last activity
+    op.create_index(
+        op.f("ix_chat_sessions_last_message_at"),
+        "chat_sessions",
+        ["last_message_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_chat_sessions_last_message_at"), table_name="chat_sessions"
+    )
+
+    op.execute("ALTER SEQUENCE chat_messages_id_seq OWNED BY NONE")
+    op.rename_table("chat_messages", "chat_messages_partitioned")
+    op.execute(
+        "ALTER TABLE chat_messages_partitioned "
+        "RENAME CONSTRAINT chat_messages_pkey "
+        "TO chat_messages_partitioned_pkey"
+    )
+    op.drop_index(
+        "ix_chat_messages_session_id", table_name="chat_messages_partitioned"
+    )
+    op.drop_index(
+        "ix_chat_messages_created_at_brin",
+        table_name="chat_messages_partitioned",
+    )
+
+    op.create_table(
+        "chat_messages",
+        *message_columns(created_at_nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_chat_messages_created_at"),
+        "chat_messages",
+        ["created_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_chat_messages_id"), "chat_messages", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_chat_messages_session_id"),
+        "chat_messages",
+        ["session_id"],
+        unique=False,
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO chat_messages ({COLUMNS}, created_at)
+        SELECT {COLUMNS}, created_at
+        FROM chat_messages_partitioned
+        """  # noqa: S608 - constants only
+    )
+    # Drops all partitions with it
+    op.execute("DROP TABLE chat_messages_partitioned CASCADE")
+    op.execute("ALTER SEQUENCE chat_messages_id_seq OWNED BY chat_messages.id")
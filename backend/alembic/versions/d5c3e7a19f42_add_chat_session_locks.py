@@ -0,0 +1,36 @@
+"""Add chat_session_locks (UNLOGGED)
+
+Revision ID: d5c3e7a19f42
+Revises: b2a8d4f61c07
+Create Date: 2026-10-19 20:05:12.118734
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "d5c3e7a19f42"
+down_revision: str | Sequence[str] | None = "b2a8d4f61c07"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chat_session_locks",
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("owner", sa.String(length=32), nullable=False),
+        sa.Column("expires_at", sa.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint("session_id"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("chat_session_locks")
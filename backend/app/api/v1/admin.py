@@ -1,10 +1,18 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+)
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, verify_admin_access
+from app.core.serialization import model_response
+from app.models.knowledge import FaqEntry
 from app.models.profile import (
     Certification,
     Education,
@@ -15,7 +23,10 @@ from app.models.profile import (
     SkillCategory,
     WorkExperience,
 )
+from app.schemas.faq import FaqEntryCreate, FaqEntryResponse
 from app.schemas.profile import CompleteProfileResponse, ProfileUpdateRequest
+from app.services.profile_cache import commit_profile_change
+from app.services.profile_loader import load_complete_profile
 
 router = APIRouter()
 
@@ -60,11 +71,8 @@ SECTION_MODELS = {
 async def get_admin_profile(
     db: AsyncSession = Depends(get_db), _: bool = Depends(verify_admin_access)
 ):
-    """Get complete profile (admin version - same as public for now)"""
-    # Import here to avoid circular dependency
-    from app.api.v1.profile import get_complete_profile
-
-    return await get_complete_profile(db)
+    """Get complete profile (admin version - uncached)"""
+    return model_response(await load_complete_profile(db))
 
 
 @router.put("/profile")
@@ -95,7 +103,7 @@ async def update_profile_section(
         converted_data = convert_dates_in_dict(request.data)
         instance = model(**converted_data)
         db.add(instance)
-        await db.commit()
+        await commit_profile_change(db)
         await db.refresh(instance)
 
         return {
@@ -126,7 +134,7 @@ async def update_profile_section(
         for key, value in converted_data.items():
             setattr(instance, key, value)
 
-        await db.commit()
+        await commit_profile_change(db)
         await db.refresh(instance)
 
         return {
@@ -151,7 +159,7 @@ async def update_profile_section(
                 detail=f"{request.section} with id {request.id} not found",
             )
 
-        await db.commit()
+        await commit_profile_change(db)
 
         return {"success": True, "message": f"{request.section} deleted"}
 
@@ -184,13 +192,14 @@ async def delete_section_item(
             detail=f"Item with id {item_id} not found in {table}",
         )
 
-    await db.commit()
+    await commit_profile_change(db)
 
     return {"success": True, "message": f"Item deleted from {table}"}
 
 
 @router.post("/reindex")
 async def reindex_knowledge_base(
+    background_tasks: BackgroundTasks,
     tables: list[str] | None = None,
     db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_admin_access),
@@ -205,7 +214,8 @@ async def reindex_knowledge_base(
     """
     import time
 
-    from app.services.indexing import IndexingService
+    from app.services.indexing import IndexingService, regenerate_faq_answers
+    from app.services.rag import commit_knowledge_change
 
     start_time = time.time()
 
@@ -262,6 +272,82 @@ async def reindex_knowledge_base(
 
         stats["total_chunks"] = sum(stats.values())
 
+    # Cached search results point at replaced chunks (in every worker)
+    await commit_knowledge_change(db)
+
+    # Regenerate FAQ answers from the new chunks after responding, one
+    # LLM generation per entry (other workers pick them up on their next
+    # refresh)
+    background_tasks.add_task(regenerate_faq_answers)
+
     duration_ms = int((time.time() - start_time) * 1000)
 
     return {"success": True, "stats": stats, "duration_ms": duration_ms}
+
+
+@router.get("/faq", response_model=list[FaqEntryResponse])
+async def list_faq_entries(
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_access),
+):
+    """List FAQ questions with their generated answers"""
+    result = await db.execute(
+        select(FaqEntry).order_by(FaqEntry.language, FaqEntry.id)
+    )
+    return result.scalars().all()
+
+
+@router.post(
+    "/faq",
+    response_model=FaqEntryResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_faq_entry(
+    request: FaqEntryCreate,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_access),
+):
+    """
+    Register a canonical FAQ question.
+    Its answer is generated on the next reindex.
+    """
+    result = await db.execute(
+        select(FaqEntry).where(
+            FaqEntry.language == request.language,
+            FaqEntry.question == request.question,
+        )
+    )
+    if result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="FAQ question already exists",
+        )
+
+    entry = FaqEntry(language=request.language, question=request.question)
+    db.add(entry)
+    await db.commit()
+    await db.refresh(entry)
+    return entry
+
+
+@router.delete("/faq/{faq_id}")
+async def delete_faq_entry(
+    faq_id: int,
+    db: AsyncSession = Depends(get_db),
+    _: bool = Depends(verify_admin_access),
+):
+    """Delete a FAQ question and stop answering it from memory"""
+    from app.services.rag import load_faq_answers
+
+    result = await db.execute(delete(FaqEntry).where(FaqEntry.id == faq_id))
+
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"FAQ entry with id {faq_id} not found",
+        )
+
+    await db.commit()
+    await load_faq_answers(db)
+
+    return {"success": True, "message": "FAQ entry deleted"}
@@ -2,44 +2,120 @@
 Chat API endpoints with streaming support.
 """
 
-import json
+import asyncio
 import logging
 import time
-from collections.abc import AsyncGenerator
-from datetime import UTC, datetime
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+)
+from contextlib import aclosing
+from dataclasses import dataclass
+from functools import partial
 from uuid import UUID, uuid4
 
+import anyio
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db
-from app.core.rate_limit import get_rate_limiter, hash_ip
-from app.models.chat import ChatMessage, ChatSession
-from app.schemas.chat import ChatMessageRequest, SessionResponse
-from app.services.rag import get_rag_service
+from app.config import settings
+from app.core.idempotency import get_idempotency_store
+from app.core.metrics import metrics
+from app.core.rate_limit import client_ip, hash_ip
+from app.core.resumable import get_resumable_streams
+from app.core.serialization import sse_frame
+from app.core.session_guard import SessionBusyError, get_session_guard
+from app.core.streaming import coalesce_tokens
+from app.models.chat import ChatSession
+from app.schemas.chat import (
+    ChatBatchAnswer,
+    ChatBatchRequest,
+    ChatBatchResponse,
+    ChatMessageRequest,
+    ChatMessageResponse,
+    PrefetchRequest,
+    SessionResponse,
+)
+from app.services.chat_writer import get_chat_writer
+from app.services.rag import RAGService, get_rag_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-limiter = get_rate_limiter()
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
 
-@router.post("/message")
-@limiter.limit("25/minute")
-@limiter.limit("100/hour")
-async def chat_message(
-    request: Request,
-    chat_request: ChatMessageRequest,
-    db: AsyncSession = Depends(get_db),
-):
+
+class SSEResponse(StreamingResponse):
     """
-    Send a chat message and get streaming response.
+    Server-Sent Events response with a cleanup callback.
+    on_close runs once the response is over, also when the client left
+    before the body was iterated (the body generator's own cleanup never
+    runs then).
+    """
+
+    def __init__(
+        self,
+        content: AsyncIterator[str],
+        on_close: Callable[[], Awaitable[None]] | None = None,
+    ):
+        super().__init__(
+            content, media_type="text/event-stream", headers=SSE_HEADERS
+        )
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                with anyio.CancelScope(shield=True):
+                    await self.on_close()
+
+
+def client_hash(request: Request) -> str:
+    """Hashed IP of the client (the one nginx forwarded, if trusted)"""
+    return hash_ip(client_ip(request.scope, settings.trusted_proxies))
+
 
-    Returns Server-Sent Events (SSE) stream.
+async def session_exists(db: AsyncSession, session_id: UUID) -> bool:
     """
-    start_time = time.time()
+    Check if a session exists: queued in this worker or in the database.
+    A session queued by another worker is only in the database after
+    that worker's next flush, so a missing one is looked up once more.
+    """
+    chat_writer = get_chat_writer()
+    if chat_writer.is_pending_session(session_id):
+        return True
+
+    query = select(ChatSession.id).where(ChatSession.id == session_id)
+    if (await db.execute(query)).scalar_one_or_none() is not None:
+        return True
+
+    # Don't hold a pooled connection while waiting
+    await db.close()
+    await asyncio.sleep(chat_writer.flush_interval * 2)
+    return (await db.execute(query)).scalar_one_or_none() is not None
 
+
+async def start_chat(
+    request: Request, chat_request: ChatMessageRequest, db: AsyncSession
+) -> tuple[UUID, str | None]:
+    """
+    Validate message, get or create its session, lease the session for
+    one generation and log the user message.
+
+    Returns:
+        Session ID and session lease (None for a new session)
+    """
     # Validate message
     if not chat_request.message.strip():
         raise HTTPException(
@@ -47,101 +123,465 @@ async def chat_message(
             detail="Message cannot be empty",
         )
 
+    # Rows are written in the background (write-behind)
+    chat_writer = get_chat_writer()
+
     # Get or create session
     session_id = chat_request.session_id
     if not session_id:
         session_id = uuid4()
-        session = ChatSession(
-            id=session_id, ip_hash=hash_ip(request.client.host)
+        await chat_writer.add_session(
+            session_id, ip_hash=client_hash(request)
         )
-        db.add(session)
-        await db.commit()
         logger.info(f"Created new session: {session_id}")
-    else:
-        # Verify session exists
-        result = await db.execute(
-            select(ChatSession).where(ChatSession.id == session_id)
+    elif not await session_exists(db, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
         )
-        session = result.scalar_one_or_none()
-        if not session:
+
+    # Hold a pooled connection only for short units of work (session
+    # lookup, retrieval), never while the answer is generated
+    await db.close()
+
+    # One generation per session at a time, across workers
+    lease = None
+    if chat_request.session_id:
+        try:
+            lease = await get_session_guard().acquire(session_id)
+        except SessionBusyError as e:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Session not found",
-            )
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Previous message in this session is still answered",
+            ) from e
 
     # Log user message
-    user_message = ChatMessage(
-        session_id=session_id, role="user", content=chat_request.message
+    try:
+        await chat_writer.add_message(
+            session_id, role="user", content=chat_request.message
+        )
+    except BaseException:
+        if lease is not None:
+            await get_session_guard().release(session_id, lease)
+        raise
+    return session_id, lease
+
+
+def idempotency_key(
+    endpoint: str, request: Request, chat_request: ChatMessageRequest
+) -> tuple | None:
+    """Scope a client-provided idempotency key to endpoint and client"""
+    if not chat_request.idempotency_key:
+        return None
+    return (
+        endpoint,
+        client_hash(request),
+        chat_request.session_id,
+        chat_request.idempotency_key,
     )
-    db.add(user_message)
-    await db.commit()
 
-    # Get RAG service
-    rag_service = await get_rag_service(db)
 
-    # Streaming response generator
-    async def generate() -> AsyncGenerator[str, None]:
+@dataclass
+class ChatTurn:
+    """One streamed answer to a chat message and its bookkeeping"""
+
+    request: Request
+    chat_request: ChatMessageRequest
+    session_id: UUID
+    lease: str | None
+    key: tuple | None
+    detached: bool
+    start_time: float
+
+    async def release_lease(self) -> None:
+        """Let the next message of the session be answered"""
+        if self.lease is not None:
+            with anyio.CancelScope(shield=True):
+                await get_session_guard().release(self.session_id, self.lease)
+
+    def forget_request(self) -> None:
+        """Let a resubmit start over instead of replaying a failure"""
+        if self.key is not None:
+            get_idempotency_store().fail(self.key)
+
+    def response_time(self) -> int:
+        return int((time.time() - self.start_time) * 1000)
+
+    async def save_assistant_message(
+        self,
+        content: str,
+        language: str | None,
+        chunk_ids: list[int],
+        response_time: int,
+        aborted: bool = False,
+    ) -> None:
+        """Log assistant message with metadata (session counters follow)"""
+        await get_chat_writer().add_message(
+            self.session_id,
+            role="assistant",
+            content=content,
+            response_time_ms=response_time,
+            language_detected=language,
+            retrieved_chunks=chunk_ids,
+            is_aborted=aborted,
+        )
+
+    async def save_aborted(
+        self, content: str, language: str | None, chunk_ids: list[int]
+    ) -> None:
+        """Persist partial answer after the client went away"""
+        metrics.increment("chat_streams_cancelled")
+        await self.save_assistant_message(
+            content, language, chunk_ids, self.response_time(), aborted=True
+        )
+        logger.info(
+            f"Chat aborted by client: session={self.session_id}, "
+            f"partial={len(content)} chars"
+        )
+
+    async def generate(
+        self, rag_service: RAGService
+    ) -> AsyncGenerator[str, None]:
+        """Streaming response generator (SSE frames)"""
+        message = self.chat_request.message
+        full_response = ""
+        language = None
+        chunk_ids: list[int] = []
+        finished = False
+
         try:
             # Send session_id first
-            yield f"data: {json.dumps({'session_id': str(session_id)})}\n\n"
+            yield sse_frame({"session_id": str(self.session_id)})
 
             # Detect language and retrieve chunks before streaming
             from app.services.text_utils import detect_language
-            language = detect_language(chat_request.message)
-            chunks = await rag_service.vector_search(
-                query=chat_request.message, top_k=3
-            )
-            chunk_ids = [chunk.id for chunk in chunks] if chunks else []
 
-            # Stream response from RAG
-            full_response = ""
-            async for token in rag_service.chat(
-                question=chat_request.message, top_k=3, stream=True
+            language = detect_language(message)
+            faq = rag_service.match_faq(message, language)
+            if faq is not None:
+                # Stored answer is streamed by rag_service.chat
+                chunks = []
+                chunk_ids = faq.chunk_ids
+            else:
+                chunks = await rag_service.retrieve(
+                    query=message,
+                    top_k=3,
+                    client_key=client_hash(self.request),
+                )
+                chunk_ids = [chunk.id for chunk in chunks] if chunks else []
+
+            # Stream response from RAG. Closing the token stream closes
+            # the Ollama HTTP stream, which stops generation.
+            # Tokens are merged into fewer SSE frames (first one is sent
+            # as soon as it arrives).
+            disconnected = False
+            async with (
+                aclosing(
+                    rag_service.chat(
+                        question=message,
+                        top_k=3,
+                        stream=True,
+                        session_id=self.session_id,
+                        chunks=chunks,
+                    )
+                ) as source,
+                aclosing(
+                    coalesce_tokens(
+                        source,
+                        interval_ms=settings.sse_flush_interval_ms,
+                        max_chars=settings.sse_flush_chars,
+                    )
+                ) as tokens,
             ):
-                full_response += token
-                yield f"data: {json.dumps({'token': token})}\n\n"
+                async for token in tokens:
+                    full_response += token
+                    yield sse_frame({"token": token})
 
-            # Send done signal
-            response_time = int((time.time() - start_time) * 1000)
-            done_data = {
-                "done": True,
-                "response_time_ms": response_time,
-            }
-            yield f"data: {json.dumps(done_data)}\n\n"
-
-            # Log assistant message with metadata
-            assistant_message = ChatMessage(
-                session_id=session_id,
-                role="assistant",
-                content=full_response,
-                response_time_ms=response_time,
-                language_detected=language,
-                retrieved_chunks=chunk_ids,
-            )
-            db.add(assistant_message)
+                    if (
+                        not self.detached
+                        and await self.request.is_disconnected()
+                    ):
+                        disconnected = True
+                        break
 
-            # Update session
-            session.message_count += 2  # user + assistant
-            session.last_message_at = datetime.now(UTC).replace(tzinfo=None)
+            if disconnected:
+                await self.save_aborted(full_response, language, chunk_ids)
+                return
+
+            # Send done signal
+            response_time = self.response_time()
+            yield sse_frame({"done": True, "response_time_ms": response_time})
 
-            await db.commit()
+            finished = True
+            await self.save_assistant_message(
+                full_response, language, chunk_ids, response_time
+            )
 
             logger.info(
-                f"Chat completed: session={session_id}, time={response_time}ms"
+                f"Chat completed: session={self.session_id}, "
+                f"time={response_time}ms"
             )
 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Server cancelled the response because the client disconnected
+            if not finished:
+                with anyio.CancelScope(shield=True):
+                    await self.save_aborted(full_response, language, chunk_ids)
+            raise
+
         except Exception as e:
             logger.exception("Error in chat stream")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        },
+            yield sse_frame({"error": str(e)})
+
+        finally:
+            if not finished:
+                self.forget_request()
+            await self.release_lease()
+
+
+@router.post("/message")
+async def chat_message(
+    request: Request,
+    chat_request: ChatMessageRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Send a chat message and get streaming response.
+
+    Returns Server-Sent Events (SSE) stream. Frames carry event ids;
+    resending the request with Last-Event-ID continues the same answer,
+    resending it with the same idempotency key replays the whole answer.
+    A resend this worker cannot continue (the answer is buffered in
+    another worker, or expired) starts with a restart frame: the client
+    drops its partial answer and the answer is sent again.
+    """
+    start_time = time.time()
+    session_guard = get_session_guard()
+    resumable = settings.sse_resume_ttl > 0
+
+    # Reconnect after a dropped connection: continue the buffered answer
+    last_event_id = request.headers.get("last-event-id")
+    if resumable and last_event_id:
+        resumed = get_resumable_streams().resume(last_event_id)
+        if resumed is not None:
+            return SSEResponse(resumed)
+
+    def respond(frames: AsyncIterator[str], **options) -> SSEResponse:
+        if last_event_id:
+            metrics.increment("sse_streams_restarted")
+            frames = restarted(frames)
+        return SSEResponse(frames, **options)
+
+    # A retry while the session is answered follows the running stream
+    if chat_request.session_id:
+        running = session_guard.attach(chat_request.session_id)
+        if running is not None:
+            return respond(running)
+
+    # A resubmit with the same idempotency key gets the original stream
+    idempotency = get_idempotency_store()
+    key = (
+        idempotency_key("message", request, chat_request)
+        if resumable
+        else None
+    )
+    if key is not None:
+        stream_id = await idempotency.lookup(key)
+        if stream_id is not None:
+            replay = get_resumable_streams().subscribe(stream_id)
+            if replay is not None:
+                return respond(replay)
+        idempotency.begin(key)
+
+    try:
+        session_id, lease = await start_chat(request, chat_request, db)
+    except BaseException:
+        if key is not None:
+            idempotency.fail(key)
+        raise
+    # Shared and resumable streams outlive the request; they stop once
+    # no subscriber is left instead
+    turn = ChatTurn(
+        request=request,
+        chat_request=chat_request,
+        session_id=session_id,
+        lease=lease,
+        key=key,
+        detached=resumable or session_guard.policy == "attach",
+        start_time=start_time,
+    )
+
+    # The lease is held from here on: every failure must release it
+    try:
+        # Get RAG service
+        rag_service = await get_rag_service(db)
+
+        frames = session_guard.stream(
+            session_id, partial(turn.generate, rag_service)
+        )
+        if resumable:
+            streams = get_resumable_streams()
+            stream_id = streams.start(frames)
+            if key is not None:
+                idempotency.finish(key, stream_id)
+            frames = streams.subscribe(stream_id)
+    except BaseException:
+        turn.forget_request()
+        await turn.release_lease()
+        raise
+
+    async def abandon() -> None:
+        """Stop a detached generation once nobody reads it"""
+        # A client gone before the first frame never subscribed, so
+        # the generation would otherwise run to the end unread
+        if resumable:
+            streams.release(stream_id)
+        else:
+            session_guard.abandon(session_id)
+
+    # Detached generations run on their own and release when they end
+    return respond(
+        frames, on_close=abandon if turn.detached else turn.release_lease
+    )
+
+
+async def restarted(frames: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Frames of an answer sent again from its start"""
+    yield sse_frame({"restart": True})
+    async with aclosing(frames) as stream:
+        async for frame in stream:
+            yield frame
+
+
+@router.post("/answer")
+async def chat_answer(
+    request: Request,
+    chat_request: ChatMessageRequest,
+    db: AsyncSession = Depends(get_db),
+) -> ChatMessageResponse:
+    """
+    Send a chat message and get the complete answer as JSON.
+
+    For scripts and integrations that don't want to parse SSE.
+    A resubmit with the same idempotency key gets the original answer.
+    """
+    idempotency = get_idempotency_store()
+    key = idempotency_key("answer", request, chat_request)
+    if key is None:
+        return await answer_message(request, chat_request, db)
+
+    cached = await idempotency.lookup(key)
+    if cached is not None:
+        return cached
+
+    idempotency.begin(key)
+    try:
+        response = await answer_message(request, chat_request, db)
+    except BaseException:
+        idempotency.fail(key)
+        raise
+    idempotency.finish(key, response)
+    return response
+
+
+async def answer_message(
+    request: Request, chat_request: ChatMessageRequest, db: AsyncSession
+) -> ChatMessageResponse:
+    """Answer a chat message and log the answer"""
+    start_time = time.time()
+    session_id, lease = await start_chat(request, chat_request, db)
+
+    try:
+        rag_service = await get_rag_service(db)
+        answer = await rag_service.answer(
+            chat_request.message,
+            top_k=3,
+            session_id=session_id,
+            client_key=client_hash(request),
+        )
+    except Exception as e:
+        logger.exception("Error in chat answer")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Failed to generate answer",
+        ) from e
+    finally:
+        if lease is not None:
+            await get_session_guard().release(session_id, lease)
+
+    response_time = int((time.time() - start_time) * 1000)
+    await get_chat_writer().add_message(
+        session_id,
+        role="assistant",
+        content=answer.response,
+        response_time_ms=response_time,
+        language_detected=answer.language,
+        retrieved_chunks=answer.chunk_ids,
+    )
+
+    return ChatMessageResponse(
+        response=answer.response,
+        session_id=session_id,
+        chunks_used=len(answer.chunk_ids),
+    )
+
+
+@router.post("/batch")
+async def chat_batch(
+    batch_request: ChatBatchRequest, db: AsyncSession = Depends(get_db)
+) -> ChatBatchResponse:
+    """
+    Answer many questions at once (evaluation runs, cache warm-up).
+
+    Answers are not stored in any chat session.
+    """
+    if len(batch_request.questions) > settings.chat_batch_max_questions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"At most {settings.chat_batch_max_questions} questions "
+                "per batch"
+            ),
+        )
+
+    rag_service = await get_rag_service(db)
+    try:
+        answers = await rag_service.answer_batch(batch_request.questions)
+    except Exception as e:
+        logger.exception("Error in chat batch")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Failed to generate answers",
+        ) from e
+
+    return ChatBatchResponse(
+        answers=[
+            ChatBatchAnswer(
+                question=answer.question,
+                response=answer.response,
+                language=answer.language,
+                chunks_used=len(answer.chunk_ids),
+            )
+            for answer in answers
+        ]
+    )
+
+
+@router.post("/prefetch", status_code=status.HTTP_204_NO_CONTENT)
+async def prefetch(
+    request: Request,
+    prefetch_request: PrefetchRequest,
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """
+    Speculatively retrieve context for a message that is still being typed.
+
+    Called (debounced) by the chat input; warms the query-embedding and
+    retrieval caches so that the final message can skip retrieval.
+    """
+    rag_service = await get_rag_service(db)
+    await rag_service.prefetch(
+        prefetch_request.message, client_key=client_hash(request)
     )
 
 
@@ -151,7 +591,7 @@ async def create_session(
 ) -> SessionResponse:
     """Create a new chat session"""
     session_id = uuid4()
-    session = ChatSession(id=session_id, ip_hash=hash_ip(request.client.host))
+    session = ChatSession(id=session_id, ip_hash=client_hash(request))
     db.add(session)
     await db.commit()
 
@@ -1,79 +1,69 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_db
-from app.models.profile import (
-    Certification,
-    Education,
-    Language,
-    ProfileBasics,
-    Project,
-    SkillCategory,
-    WorkExperience,
-)
+from app.config import settings
 from app.schemas.profile import CompleteProfileResponse
+from app.services.profile_cache import etag_matches, get_profile_cache
+from app.services.profile_loader import (
+    ProfileSelection,
+    render_complete_profile,
+)
 
 router = APIRouter()
 
 
 @router.get("", response_model=CompleteProfileResponse)
-async def get_complete_profile(db: AsyncSession = Depends(get_db)):
+async def get_complete_profile(
+    request: Request,
+    sections: str | None = Query(
+        None, description="Comma-separated sections, e.g. basics,experience"
+    ),
+    fields: str | None = Query(
+        None, description="Comma-separated section.field, e.g. projects.name"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Get complete profile with all sections.
     Public endpoint - no authentication required.
-    """
-    # Basics
-    basics_result = await db.execute(select(ProfileBasics))
-    basics = basics_result.scalar_one_or_none()
 
-    # Experience (ordered)
-    exp_result = await db.execute(
-        select(WorkExperience).order_by(WorkExperience.order_index)
-    )
-    experience = exp_result.scalars().all()
+    `sections` loads only the listed sections and `fields` trims them to
+    the listed fields; other sections are left out of the response.
 
-    # Skills with categories (ordered, with relationship)
-    skills_result = await db.execute(
-        select(SkillCategory)
-        .options(selectinload(SkillCategory.skills))
-        .order_by(SkillCategory.order_index)
-    )
-    skills = skills_result.scalars().all()
+    Served from the per-process serialized cache with a strong ETag;
+    If-None-Match with the current ETag gets 304 Not Modified.
+    """
+    try:
+        selection = ProfileSelection.parse(sections, fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
 
-    # Projects (ordered, featured first)
-    projects_result = await db.execute(
-        select(Project).order_by(
-            Project.is_featured.desc(), Project.order_index
-        )
+    profile = await get_profile_cache().get(
+        lambda: render_complete_profile(db, selection), key=selection
     )
-    projects = projects_result.scalars().all()
+    headers = {
+        "ETag": profile.etag,
+        "Cache-Control": (
+            f"public, max-age={settings.profile_http_max_age}, "
+            "must-revalidate"
+        ),
+    }
 
-    # Education (ordered)
-    edu_result = await db.execute(
-        select(Education).order_by(Education.order_index)
-    )
-    education = edu_result.scalars().all()
+    if etag_matches(request.headers.get("if-none-match"), profile.etag):
+        return Response(status_code=304, headers=headers)
 
-    # Languages (ordered)
-    lang_result = await db.execute(
-        select(Language).order_by(Language.order_index)
+    return Response(
+        content=profile.body, media_type="application/json", headers=headers
     )
-    languages = lang_result.scalars().all()
 
-    # Certifications (ordered)
-    cert_result = await db.execute(
-        select(Certification).order_by(Certification.order_index)
-    )
-    certifications = cert_result.scalars().all()
-
-    return CompleteProfileResponse(
-        basics=basics,
-        experience=experience,
-        skills=skills,
-        projects=projects,
-        education=education,
-        languages=languages,
-        certifications=certifications,
-    )
@@ -17,12 +17,90 @@ class Settings(BaseSettings):
     # Ollama
     ollama_host: str = "http://localhost:11434"
     ollama_model: str = "mistral:7b-instruct-q4_0"
+    ollama_keep_alive: str = "30m"  # how long Ollama keeps model in memory
+    ollama_warmup_on_startup: bool = True
+    ollama_keep_warm_interval: int = 0  # seconds between idle pings, 0 = off
+    ollama_use_chat_api: bool = True  # /api/chat with static system prompt
+    llm_coalesce_generations: bool = True  # share identical generations
+    llm_max_concurrency: int = 4  # generations in flight, 0 = unlimited
+    llm_circuit_failure_threshold: int = 3  # consecutive failures to open
+    llm_circuit_reset_timeout: int = 30  # seconds before a half-open probe
+
+    # Generation sizing
+    # Every distinct num_ctx makes Ollama reload the model, so one size
+    # is used by default. More buckets (e.g. [2048, 4096]) are opt-in;
+    # traffic around a boundary then reloads the model on every switch.
+    llm_num_ctx_buckets: list[int] = [4096]
+    llm_answer_tokens: dict[str, int] = {"en": 512, "de": 640, "ru": 768}
+    llm_answer_tokens_default: int = 512
+
+    # Multi-turn chat: resend previous turns so Ollama reuses its cached
+    # prompt prefix (chat API only). History takes room from retrieved
+    # context, consider a larger num_ctx bucket when enabling.
+    llm_multi_turn: bool = False
+    llm_history_max_sessions: int = 500  # sessions kept in memory
+    llm_history_max_tokens: int = 2048  # per session, oldest turns dropped
+    llm_history_ttl: int = 1800  # seconds of inactivity before forgetting
+
+    # Retrieval caches (cleared on reindex)
+    retrieval_cache_ttl: int = 300  # seconds, 0 = off
+    retrieval_cache_size: int = 1024
+    # Speculative retrieval while the user types (/chat/prefetch)
+    speculative_max_age: int = 30  # seconds a prefetched result is reused
+    speculative_match_ratio: float = 0.9  # min similarity to the final text
+
+    # Precomputed FAQ answers (generated on reindex)
+    faq_enabled: bool = True
+    faq_match_threshold: float = 0.93  # min cosine similarity of questions
+    faq_refresh_interval: int = 300  # seconds between reloads per worker
+
+    # Write-behind persistence of chat messages
+    chat_write_queue_size: int = 1000  # queued rows before requests wait
+    chat_write_batch_size: int = 200
+    chat_write_flush_interval_ms: int = 500
+    # Retention of chat history (monthly partitions of chat_messages)
+    chat_retention_days: int = 365  # 0 = keep forever
+    chat_partitions_ahead: int = 2  # future months kept ready for inserts
+    chat_retention_interval: int = 86400  # seconds between runs
+
+    # One generation per session: reject, queue or attach a concurrent
+    # request for the same session (leases shared by all workers)
+    chat_session_policy: str = "reject"
+    chat_session_lock_storage: str = "postgres"  # or "memory" (1 worker)
+    chat_session_lock_ttl: int = 300  # seconds, frees leases of crashes
+    chat_session_queue_timeout: int = 30  # seconds a queued request waits
+
+    # Idempotency keys of chat requests (retries reuse the first result)
+    idempotency_ttl: int = 600  # seconds, streams also need SSE_RESUME_TTL
+    idempotency_cache_size: int = 2048
+
+    # Public profile: serialized once per worker, dropped on admin writes
+    profile_cache_ttl: int = 300  # seconds, bounds a missed notification
+    profile_cache_size: int = 64  # cached section/field selections
+    profile_http_max_age: int = 60  # browser cache, then ETag revalidation
+    profile_single_query: bool = True  # one json_agg statement (Postgres)
+    # Static snapshot for nginx, written on startup and admin writes
+    profile_snapshot_dir: str = ""  # empty = disabled
+    profile_snapshot_keep: int = 3  # versions kept on disk
+
+    # Programmatic chat endpoints
+    chat_batch_max_questions: int = 20
+    # Pooled connections a batch searches with at once (pool is 10 + 20)
+    chat_batch_db_concurrency: int = 4
+
+    # Streaming: merge tokens into fewer SSE frames
+    sse_flush_interval_ms: int = 50  # max buffering delay, 0 = per token
+    sse_flush_chars: int = 64  # flush earlier once this many chars buffered
+    # Resumable streams: replay buffers for reconnects with Last-Event-ID
+    sse_resume_ttl: int = 120  # seconds a finished answer is kept, 0 = off
+    sse_resume_grace: int = 15  # seconds to reconnect before cancelling
 
     # Embedding
     embedding_model: str = "intfloat/multilingual-e5-base"
 
     # API
     api_v1_prefix: str = "/api/v1"
+    json_encoder: str = "orjson"  # orjson (when installed) or json
     cors_origins: list[str] = [
         "http://localhost:3000",
         "http://localhost:5173",
@@ -36,10 +114,24 @@ class Settings(BaseSettings):
             return json.loads(v)
         return v
 
-    # Rate Limiting
+    # Rate Limiting (POST /chat/message, shared by all workers)
+    rate_limit_enabled: bool = True
+    rate_limit_storage: str = "postgres"  # or "memory" (single worker)
     rate_limit_per_minute: int = 25
     rate_limit_per_hour: int = 100
     rate_limit_per_day: int = 500
+    rate_limit_prefetch_per_minute: int = 30
+    rate_limit_prefetch_per_hour: int = 300
+    rate_limit_batch_per_hour: int = 10
+    rate_limit_cleanup_interval: int = 600  # seconds
+    # Peers (nginx) whose X-Real-IP / X-Forwarded-For name the client
+    trusted_proxies: list[str] = [
+        "127.0.0.1/32",
+        "::1/128",
+        "10.0.0.0/8",
+        "172.16.0.0/12",
+        "192.168.0.0/16",
+    ]
 
     # Environment
     environment: str = "development"
@@ -1,3 +1,3 @@
-from app.core.prompts import get_system_prompt
+from app.core.prompts import get_chat_messages, get_system_prompt
 
-__all__ = ["get_system_prompt"]
+__all__ = ["get_chat_messages", "get_system_prompt"]
@@ -0,0 +1,64 @@
+"""
+Small in-process LRU cache with per-entry TTL.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """LRU cache whose entries expire ttl seconds after being set"""
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, max_age: float | None = None) -> Any | None:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            max_age: Stricter freshness limit in seconds (default: ttl)
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        stored_at, value = item
+        age = self._clock() - stored_at
+        if age > self.ttl:
+            del self._items[key]
+            return None
+        if max_age is not None and age > max_age:
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._items[key] = (self._clock(), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,94 @@
+"""
+Circuit breaker for calls to unreliable dependencies (Ollama).
+Opens after consecutive failures so callers can fail fast, and lets a
+single probe through after the reset timeout (half-open).
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from enum import Enum
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+
+    def allow_request(self) -> bool:
+        """
+        Check if a call may proceed.
+        After the reset timeout an open circuit becomes half-open and
+        lets one probe through; further calls are rejected until the
+        probe reports success or failure.
+        """
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            if self._clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.probe_at = self._clock()
+            logger.info(f"Circuit {self.name} half-open, probing")
+            return True
+
+        # Half-open: a probe is already in flight, unless it never
+        # reported back (e.g. the caller was cancelled)
+        if self._clock() - self.probe_at >= self.reset_timeout:
+            self.probe_at = self._clock()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                metrics.increment(f"{self.name}_circuit_opened")
+                logger.warning(
+                    f"Circuit {self.name} opened after "
+                    f"{self.failures} consecutive failures"
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = self._clock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == CircuitState.OPEN
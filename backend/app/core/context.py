@@ -27,12 +27,12 @@ def format_chunks_for_context(
 
     Args:
         chunks: List of retrieved chunks (sorted by similarity)
-        max_tokens: Maximum tokens for context
+        max_tokens: Maximum LLM tokens for context
 
     Returns:
         Formatted context string
     """
-    from app.services.text_utils import estimate_tokens
+    from app.services.text_utils import estimate_llm_tokens
 
     context_parts = []
     total_tokens = 0
@@ -40,7 +40,7 @@ def format_chunks_for_context(
     for i, chunk in enumerate(chunks, 1):
         # Format chunk with source info
         chunk_text = f"[Source {i}]\n{chunk.text}\n"
-        chunk_tokens = estimate_tokens(chunk_text)
+        chunk_tokens = estimate_llm_tokens(chunk_text)
 
         # Check if adding this chunk would exceed limit
         if total_tokens + chunk_tokens > max_tokens:
@@ -97,3 +97,42 @@ def deduplicate_chunks(
             unique_chunks.append(chunk)
 
     return unique_chunks
+
+
+def select_num_ctx(
+    prompt_tokens: int, num_predict: int, buckets: list[int]
+) -> int:
+    """
+    Select the smallest context window that fits prompt and answer.
+
+    Args:
+        prompt_tokens: Estimated tokens of the assembled prompt
+        num_predict: Maximum tokens to generate
+        buckets: Allowed num_ctx values
+
+    Returns:
+        num_ctx to request (largest bucket if nothing fits)
+    """
+    needed = prompt_tokens + num_predict
+    for bucket in sorted(buckets):
+        if needed <= bucket:
+            return bucket
+    return max(buckets)
+
+
+def context_token_budget(
+    overhead_tokens: int, num_predict: int, buckets: list[int]
+) -> int:
+    """
+    Get token budget for retrieved context.
+
+    Args:
+        overhead_tokens: Tokens of the prompt without context
+            (instructions + question)
+        num_predict: Maximum tokens to generate
+        buckets: Allowed num_ctx values
+
+    Returns:
+        Tokens left for context in the largest context window
+    """
+    return max(max(buckets) - overhead_tokens - num_predict, 0)
@@ -0,0 +1,126 @@
+"""
+In-memory history of recent chat turns per session.
+Follow-up questions are sent to Ollama with the previous turns unchanged,
+so the runner can reuse its cached prompt prefix and only evaluate the
+new turn. The store is bounded by session count, turn size and TTL.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+
+from app.services.text_utils import estimate_llm_tokens
+
+logger = logging.getLogger(__name__)
+
+Message = dict[str, str]
+
+
+@dataclass
+class Conversation:
+    """Previous turns of one session (without the system message)"""
+
+    language: str
+    messages: list[Message] = field(default_factory=list)
+    tokens: int = 0
+    updated_at: float = 0.0
+
+
+class ConversationStore:
+    """LRU store of conversations with TTL and per-session token cap"""
+
+    def __init__(
+        self,
+        max_sessions: int = 500,
+        max_tokens: int = 2048,
+        ttl: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self.ttl = ttl
+        self._clock = clock
+        self._items: OrderedDict[Hashable, Conversation] = OrderedDict()
+
+    def get(self, key: Hashable, language: str) -> list[Message]:
+        """
+        Get previous turns of a session.
+
+        Args:
+            key: Session identifier
+            language: Language of the new turn
+
+        Returns:
+            Messages of previous turns (empty if none, expired, or the
+            session switched language)
+        """
+        conversation = self._items.get(key)
+        if conversation is None:
+            return []
+
+        if self._expired(conversation) or conversation.language != language:
+            del self._items[key]
+            return []
+
+        self._items.move_to_end(key)
+        return list(conversation.messages)
+
+    def append(
+        self, key: Hashable, language: str, user: str, assistant: str
+    ) -> None:
+        """
+        Add a completed turn to a session.
+        Oldest turns are dropped once the session exceeds max_tokens.
+        """
+        conversation = self._items.get(key)
+        if (
+            conversation is None
+            or self._expired(conversation)
+            or conversation.language != language
+        ):
+            conversation = Conversation(language=language)
+
+        conversation.messages += [
+            {"role": "user", "content": user},
+            {"role": "assistant", "content": assistant},
+        ]
+        conversation.tokens += estimate_llm_tokens(user)
+        conversation.tokens += estimate_llm_tokens(assistant)
+
+        while conversation.messages and (conversation.tokens > self.max_tokens):
+            dropped = conversation.messages[:2]
+            del conversation.messages[:2]
+            conversation.tokens -= sum(
+                estimate_llm_tokens(m["content"]) for m in dropped
+            )
+
+        if not conversation.messages:
+            self._items.pop(key, None)
+            return
+
+        conversation.updated_at = self._clock()
+        self._items[key] = conversation
+        self._items.move_to_end(key)
+        self._evict()
+
+    def discard(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def _expired(self, conversation: Conversation) -> bool:
+        return self._clock() - conversation.updated_at > self.ttl
+
+    def _evict(self) -> None:
+        """Drop expired sessions, then least recently used ones"""
+        while self._items:
+            key, oldest = next(iter(self._items.items()))
+            if not self._expired(oldest):
+                break
+            del self._items[key]
+
+        while len(self._items) > self.max_sessions:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
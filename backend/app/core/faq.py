@@ -0,0 +1,75 @@
+"""
+In-memory matching of questions against precomputed FAQ answers.
+Answers to the most common questions are generated at reindex time;
+an incoming question whose embedding is close enough to one of them is
+answered from memory without retrieval or generation.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FaqAnswer:
+    """Stored answer to a canonical question"""
+
+    id: int
+    language: str
+    question: str
+    answer: str
+    chunk_ids: list[int] = field(default_factory=list)
+
+
+class FaqMatcher:
+    """Cosine similarity search over FAQ question embeddings per language"""
+
+    def __init__(self, threshold: float = 0.93):
+        self.threshold = threshold
+        self._answers: dict[str, list[FaqAnswer]] = {}
+        self._vectors: dict[str, np.ndarray] = {}
+
+    def load(self, entries: list[tuple[FaqAnswer, list[float]]]) -> None:
+        """Replace all answers with entries of (answer, question embedding)"""
+        answers: dict[str, list[FaqAnswer]] = {}
+        vectors: dict[str, list[list[float]]] = {}
+        for answer, embedding in entries:
+            answers.setdefault(answer.language, []).append(answer)
+            vectors.setdefault(answer.language, []).append(embedding)
+
+        normalized = {}
+        for language, rows in vectors.items():
+            matrix = np.asarray(rows, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            normalized[language] = matrix / np.maximum(norms, 1e-12)
+
+        self._answers, self._vectors = answers, normalized
+
+    def match(self, embedding: list[float], language: str) -> FaqAnswer | None:
+        """
+        Find the FAQ answer for a question.
+
+        Args:
+            embedding: Query embedding of the question
+            language: Detected language of the question
+
+        Returns:
+            Best answer at or above the threshold, or None
+        """
+        matrix = self._vectors.get(language)
+        if matrix is None:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+
+        similarities = matrix @ (query / norm)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._answers[language][best]
+
+    def __len__(self) -> int:
+        return sum(len(answers) for answers in self._answers.values())
@@ -0,0 +1,68 @@
+"""
+Idempotency keys for chat requests.
+Retries and resubmits of a request carry the same client-generated key.
+The first request registers the key and publishes its result (a stream
+id or a complete response); duplicates wait for it and reuse it instead
+of starting new work. The map is bounded by size and TTL.
+"""
+
+import asyncio
+import logging
+from collections.abc import Hashable
+from functools import cache
+from typing import Any
+
+from app.core.cache import TTLCache
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyStore:
+    """Bounded map from idempotency key to (pending) request result"""
+
+    def __init__(self, max_size: int = 2048, ttl: float = 600.0):
+        self._results = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def lookup(self, key: Hashable) -> Any | None:
+        """
+        Get the result of an earlier request with the same key.
+        Waits while that request is still being set up.
+
+        Returns:
+            Result, or None if the key is new or its request failed
+        """
+        future = self._results.get(key)
+        if future is None:
+            return None
+        result = await asyncio.shield(future)
+        if result is not None:
+            metrics.increment("idempotent_duplicates")
+        return result
+
+    def begin(self, key: Hashable) -> None:
+        """Register a new request for key"""
+        self._results.set(key, asyncio.get_running_loop().create_future())
+
+    def finish(self, key: Hashable, result: Any) -> None:
+        """Publish the result of the request (waiting duplicates get it)"""
+        future = self._results.get(key)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def fail(self, key: Hashable) -> None:
+        """Forget a failed request; duplicates are processed on their own"""
+        self.finish(key, None)
+        self._results.pop(key)
+
+
+# Global instance (singleton pattern)
+@cache
+def get_idempotency_store() -> IdempotencyStore:
+    """Get or create global idempotency store"""
+    from app.config import settings
+
+    return IdempotencyStore(
+        max_size=settings.idempotency_cache_size,
+        ttl=settings.idempotency_ttl,
+    )
@@ -0,0 +1,67 @@
+"""
+Lightweight in-process metrics.
+Counters and timing observations exposed via the metrics endpoint.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+
+@dataclass
+class Observation:
+    """Aggregated observations for a single metric"""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Per-process registry of counters and observations"""
+
+    def __init__(self):
+        self._counters: dict[str, int] = defaultdict(int)
+        self._observations: dict[str, Observation] = defaultdict(Observation)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increment counter by value"""
+        self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a single observation (e.g. duration in ms)"""
+        self._observations[name].add(value)
+
+    def counter(self, name: str) -> int:
+        """Get current counter value"""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Get all metrics as a JSON-serializable dict"""
+        return {
+            "counters": dict(self._counters),
+            "observations": {
+                name: {
+                    "count": obs.count,
+                    "avg": round(obs.avg, 2),
+                    "max": round(obs.max, 2),
+                }
+                for name, obs in self._observations.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """Reset all metrics (used in tests)"""
+        self._counters.clear()
+        self._observations.clear()
+
+
+metrics = Metrics()
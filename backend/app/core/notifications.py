@@ -0,0 +1,72 @@
+"""
+Cross-worker cache invalidation with Postgres LISTEN/NOTIFY.
+Writers send a NOTIFY in the transaction that changes the data, so it is
+delivered only if the commit succeeds. Every worker LISTENs on one
+connection and drops its in-memory copies when a notification arrives.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+async def notify(db: AsyncSession, channel: str) -> None:
+    """Queue a notification in the current transaction (Postgres only)"""
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            text("SELECT pg_notify(:channel, '')"), {"channel": channel}
+        )
+
+
+async def listen(
+    dsn: str,
+    handlers: dict[str, Callable[[], None]],
+    retry_interval: float = 30.0,
+) -> None:
+    """
+    Call the handler of a channel on each of its notifications until
+    cancelled. Reconnects if the connection is lost and calls every
+    handler then, since notifications may have been missed meanwhile.
+
+    Args:
+        dsn: Postgres DSN (plain asyncpg, without the SQLAlchemy driver)
+        handlers: Invalidation callback per channel
+        retry_interval: Seconds to wait before reconnecting
+    """
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            for channel, handler in handlers.items():
+                await conn.add_listener(channel, _on_notify(channel, handler))
+                handler()
+            await _wait_closed(conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Change listener failed: {e}")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(retry_interval)
+
+
+def _on_notify(channel: str, handler: Callable[[], None]) -> Callable:
+    def on_notify(*args) -> None:
+        logger.info(f"Notification on {channel}, dropping cached data")
+        handler()
+
+    return on_notify
+
+
+async def _wait_closed(conn) -> None:
+    """Wait until the connection is closed or lost"""
+    closed = asyncio.Event()
+    conn.add_termination_listener(lambda _: closed.set())
+    await closed.wait()
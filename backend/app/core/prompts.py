@@ -77,3 +77,93 @@ def get_system_prompt(language: str, context: str, question: str) -> str:
     """
     template = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["default"])
     return template.format(context=context, question=question)
+
+
+# Static system messages for Ollama /api/chat.
+# They contain no per-request data, so the instruction prefix stays
+# byte-identical across requests and Ollama can reuse its KV cache.
+def _static_system_message(language: str, note: str) -> str:
+    """System prompt of a language without its context and question"""
+    intro, role, _, guidelines, _ = SYSTEM_PROMPTS[language].split("\n\n")
+    return "\n\n".join([intro, role, guidelines, note])
+
+
+CHAT_SYSTEM_MESSAGES: dict[str, str] = {
+    "en": _static_system_message(
+        "en",
+        "Each user message contains context from Stan's profile followed "
+        "by the user question.",
+    ),
+    "ru": _static_system_message(
+        "ru",
+        "Каждое сообщение пользователя содержит контекст из профиля Стана "
+        "и вопрос пользователя.",
+    ),
+    "de": _static_system_message(
+        "de",
+        "Jede Benutzernachricht enthält Kontext aus Stans Profil, gefolgt "
+        "von der Benutzerfrage.",
+    ),
+    "default": """You are FrantAI, an AI assistant representing Stan Frant.
+Answer the user's question in their language, using the provided context.""",
+}
+
+CHAT_USER_TEMPLATES: dict[str, str] = {
+    "en": """Context from Stan's profile:
+{context}
+
+User question: {question}""",
+    "ru": """Контекст из профиля Стана:
+{context}
+
+Вопрос пользователя: {question}""",
+    "de": """Kontext aus Stans Profil:
+{context}
+
+Benutzerfrage: {question}""",
+    "default": """Context: {context}
+
+Question: {question}""",
+}
+
+
+def get_chat_messages(
+    language: str,
+    context: str,
+    question: str,
+    history: list[dict[str, str]] | None = None,
+) -> list[dict[str, str]]:
+    """
+    Get chat messages for Ollama /api/chat.
+
+    The system message is static per language; retrieved context and
+    the question go into the user turn.
+
+    Args:
+        language: ISO 639-1 language code ('en', 'ru', 'de', etc.)
+        context: Retrieved context from knowledge base
+        question: User's question
+        history: Previous user/assistant turns of the session
+
+    Returns:
+        List of chat messages (system + history + user)
+    """
+    system = CHAT_SYSTEM_MESSAGES.get(
+        language, CHAT_SYSTEM_MESSAGES["default"]
+    )
+    return [
+        {"role": "system", "content": system},
+        *(history or []),
+        {
+            "role": "user",
+            "content": get_chat_user_message(language, context, question),
+        },
+    ]
+
+
+def get_chat_user_message(language: str, context: str, question: str) -> str:
+    """Get user turn content (retrieved context + question)"""
+    template = CHAT_USER_TEMPLATES.get(
+        language, CHAT_USER_TEMPLATES["default"]
+    )
+    return template.format(context=context, question=question)
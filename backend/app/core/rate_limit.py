@@ -1,18 +1,298 @@
 """
-Rate limiting utilities using slowapi.
+Rate limiting shared by all worker processes.
+Fixed-window counters (per minute / hour / day) per client are kept in a
+Postgres UNLOGGED table and checked in ASGI middleware before the request
+body is read. An in-memory store is available for single-process runs.
 """
 
+import asyncio
 import hashlib
+import ipaddress
+import json
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.core.metrics import metrics
 
-def get_rate_limiter() -> Limiter:
-    """Get rate limiter instance"""
-    return Limiter(key_func=get_remote_address)
+logger = logging.getLogger(__name__)
+
+PERIODS = {"minute": 60, "hour": 3600, "day": 86400}
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+# Counters are disposable, so the table is UNLOGGED (no WAL writes)
+rate_limit_counters = Table(
+    "rate_limit_counters",
+    MetaData(),
+    Column("key", String(200), primary_key=True),
+    Column("hits", Integer, nullable=False),
+    Column("expires_at", TIMESTAMP, nullable=False, index=True),
+    prefixes=["UNLOGGED"],
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Allowed number of requests per period"""
+
+    limit: int
+    period: str  # "minute", "hour" or "day"
+
+    @property
+    def seconds(self) -> int:
+        return PERIODS[self.period]
+
+    def __str__(self) -> str:
+        return f"{self.limit} per 1 {self.period}"
+
+
+class MemoryRateLimitStore:
+    """Counters in process memory (single worker, tests)"""
+
+    def __init__(self):
+        self._counters: dict[str, tuple[int, float]] = {}
+
+    async def hit(self, windows: list[tuple[str, float]]) -> list[int]:
+        counts = []
+        for key, expires_at in windows:
+            hits, _ = self._counters.get(key, (0, expires_at))
+            self._counters[key] = (hits + 1, expires_at)
+            counts.append(hits + 1)
+        return counts
+
+    async def cleanup(self) -> None:
+        now = time.time()
+        self._counters = {
+            key: value
+            for key, value in self._counters.items()
+            if value[1] > now
+        }
+
+
+class PostgresRateLimitStore:
+    """Counters in a Postgres UNLOGGED table shared by all workers"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def hit(self, windows: list[tuple[str, float]]) -> list[int]:
+        """Increment all windows in one statement and return their counts"""
+        stmt = pg_insert(rate_limit_counters).values(
+            [
+                {
+                    "key": key,
+                    "hits": 1,
+                    "expires_at": datetime.fromtimestamp(
+                        expires_at, UTC
+                    ).replace(tzinfo=None),
+                }
+                for key, expires_at in windows
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[rate_limit_counters.c.key],
+            set_={"hits": rate_limit_counters.c.hits + 1},
+        ).returning(rate_limit_counters.c.key, rate_limit_counters.c.hits)
+
+        async with self.engine.begin() as conn:
+            rows = (await conn.execute(stmt)).all()
+        counts = dict(rows)
+        return [counts[key] for key, _ in windows]
+
+    async def cleanup(self) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(rate_limit_counters).where(
+                    rate_limit_counters.c.expires_at
+                    < func.timezone("utc", func.now())
+                )
+            )
+
+
+class RateLimiter:
+    """Checks fixed-window limits against a shared store"""
+
+    def __init__(
+        self,
+        store: MemoryRateLimitStore | PostgresRateLimitStore,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.enabled = enabled
+
+    async def check(
+        self, scope: str, client: str, limits: list[RateLimit]
+    ) -> tuple[RateLimit, int] | None:
+        """
+        Count a request and check it against limits.
+
+        Args:
+            scope: Name of the limited endpoint
+            client: Client identity (hashed IP)
+            limits: Limits to apply
+
+        Returns:
+            Exceeded limit and seconds until its window resets, or None
+        """
+        now = time.time()
+        windows = []
+        for limit in limits:
+            window = int(now // limit.seconds)
+            windows.append(
+                (
+                    f"{scope}:{client}:{limit.period}:{window}",
+                    (window + 1) * limit.seconds,
+                )
+            )
+
+        try:
+            counts = await self.store.hit(windows)
+        except Exception as e:
+            # Fail open: the limiter must not take the chat down
+            metrics.increment("rate_limit_store_errors")
+            logger.error(f"Rate limit store failed: {e}")
+            return None
+
+        for limit, (_, reset_at), count in zip(
+            limits, windows, counts, strict=True
+        ):
+            if count > limit.limit:
+                metrics.increment("rate_limit_rejected")
+                return limit, max(int(reset_at - now), 1)
+        return None
+
+    async def run_cleanup(self, interval: int) -> None:
+        """Delete expired counters every interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.store.cleanup()
+            except Exception as e:
+                logger.warning(f"Rate limit cleanup failed: {e}")
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-path limits.
+    Runs before routing, so rejected requests never have their body read.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        rules: dict[str, list[RateLimit]],
+        trusted_proxies: Sequence[str] = (),
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.rules = rules
+        self.trusted_proxies = trusted_proxies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limits = self.rules.get(scope.get("path", ""))
+        if (
+            scope["type"] != "http"
+            or limits is None
+            or scope["method"] == "OPTIONS"
+            or not self.limiter.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        ip = client_ip(scope, self.trusted_proxies)
+        exceeded = await self.limiter.check(scope["path"], hash_ip(ip), limits)
+
+        if exceeded is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit, retry_after = exceeded
+        body = json.dumps({"detail": f"Rate limit exceeded: {limit}"})
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body.encode()})
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Create rate limiter with the storage configured in settings"""
+    from app.config import settings
+
+    if settings.rate_limit_storage == "memory":
+        store = MemoryRateLimitStore()
+    else:
+        from app.database import engine
+
+        store = PostgresRateLimitStore(engine)
+    return RateLimiter(store, enabled=settings.rate_limit_enabled)
 
 
 def hash_ip(ip: str) -> str:
     """Hash IP address for privacy"""
     return hashlib.sha256(ip.encode()).hexdigest()
+
+
+def client_ip(scope: Scope, trusted_proxies: Sequence[str] = ()) -> str:
+    """
+    IP address of the client of a request.
+    Behind a trusted proxy (nginx) this is the address the proxy
+    forwarded in X-Real-IP, or the last untrusted hop of X-Forwarded-For.
+    Otherwise it is the peer address.
+    """
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    networks = _networks(tuple(trusted_proxies))
+    if not _in_networks(ip, networks):
+        return ip
+
+    headers = Headers(scope=scope)
+    real_ip = headers.get("x-real-ip", "").strip()
+    if real_ip:
+        return real_ip
+    hops = [
+        hop.strip() for hop in headers.get("x-forwarded-for", "").split(",")
+    ]
+    for hop in reversed(hops):
+        if hop and not _in_networks(hop, networks):
+            return hop
+    return ip
+
+
+@lru_cache(maxsize=8)
+def _networks(proxies: tuple[str, ...]) -> tuple[Network, ...]:
+    return tuple(ipaddress.ip_network(proxy) for proxy in proxies)
+
+
+def _in_networks(ip: str, networks: tuple[Network, ...]) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
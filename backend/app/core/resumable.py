@@ -0,0 +1,198 @@
+"""
+Resumable SSE streams.
+A generation runs in a background task that appends its SSE frames to a
+replay buffer. Clients read the buffer, and every frame carries an event
+id (`<stream id>:<frame index>`). After a dropped connection the client
+reconnects with Last-Event-ID and continues from the next frame, either
+from the buffer or live if the generation is still running. A generation
+nobody reads within the grace period is cancelled; finished buffers are
+kept for the TTL.
+
+Buffers live in the memory of the worker that runs the generation. With
+several workers a reconnect may land on another one, which cannot
+resume: it answers again and tells the client to restart the answer.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from functools import cache
+from uuid import uuid4
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayBuffer:
+    """SSE frames of one generation"""
+
+    def __init__(self, source: AsyncIterator[str], grace: float):
+        self.frames: list[str] = []
+        self.done = False
+        self.finished_at: float | None = None
+        self.subscribers = 0
+        self._source = source
+        self._grace = grace
+        self._event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._idle: asyncio.TimerHandle | None = None
+
+    def start(self, clock: Callable[[], float]) -> None:
+        """Start driving the source in a background task"""
+        self._task = asyncio.create_task(self._run(clock))
+
+    async def _run(self, clock: Callable[[], float]) -> None:
+        try:
+            async for frame in self._source:
+                self.frames.append(frame)
+                self._wake()
+        except asyncio.CancelledError:
+            logger.info("Abandoned stream cancelled")
+        except Exception as e:
+            logger.error(f"Resumable stream failed: {e}")
+        finally:
+            self.done = True
+            self.finished_at = clock()
+            self._wake()
+
+    def _wake(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def subscribe(
+        self, after: int = -1
+    ) -> AsyncGenerator[tuple[int, str], None]:
+        """
+        Follow the stream from the frame after index `after`.
+
+        Yields:
+            (index, frame) pairs
+        """
+        self.subscribers += 1
+        if self._idle is not None:
+            self._idle.cancel()
+            self._idle = None
+
+        index = after + 1
+        try:
+            while True:
+                while index < len(self.frames):
+                    yield index, self.frames[index]
+                    index += 1
+                if self.done:
+                    return
+                await self._event.wait()
+        finally:
+            self.subscribers -= 1
+            self.release()
+
+    def release(self) -> None:
+        """
+        Start the grace period if nobody reads the stream, also when the
+        client left before it subscribed at all
+        """
+        if self.subscribers > 0 or self.done:
+            return
+        if self._idle is not None:
+            self._idle.cancel()
+        # Give the client time to reconnect before stopping
+        self._idle = asyncio.get_running_loop().call_later(
+            self._grace, self.cancel
+        )
+
+    def cancel(self) -> None:
+        if self._task is not None and not self.done:
+            self._task.cancel()
+
+
+class ResumableStreams:
+    """Registry of replay buffers by stream id"""
+
+    def __init__(
+        self,
+        ttl: float = 120.0,
+        grace: float = 15.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.grace = grace
+        self._clock = clock
+        self._buffers: dict[str, ReplayBuffer] = {}
+
+    def start(self, source: AsyncIterator[str]) -> str:
+        """
+        Run a stream of SSE frames in the background.
+
+        Returns:
+            Stream id
+        """
+        self._evict()
+        stream_id = uuid4().hex
+        buffer = ReplayBuffer(source, grace=self.grace)
+        self._buffers[stream_id] = buffer
+        buffer.start(self._clock)
+        return stream_id
+
+    def subscribe(
+        self, stream_id: str, after: int = -1
+    ) -> AsyncGenerator[str, None] | None:
+        """
+        Get SSE frames of a stream with event ids, after a frame index.
+
+        Returns:
+            Frames, or None if the stream is unknown or expired
+        """
+        self._evict()
+        buffer = self._buffers.get(stream_id)
+        if buffer is None:
+            return None
+        return self._with_ids(stream_id, buffer, after)
+
+    def release(self, stream_id: str) -> None:
+        """Let a stream stop if its client is gone (see ReplayBuffer)"""
+        buffer = self._buffers.get(stream_id)
+        if buffer is not None:
+            buffer.release()
+
+    def resume(self, last_event_id: str) -> AsyncGenerator[str, None] | None:
+        """Continue a stream after the frame named by Last-Event-ID"""
+        stream_id, _, index = last_event_id.strip().partition(":")
+        if not index.isdigit():
+            return None
+        frames = self.subscribe(stream_id, after=int(index))
+        if frames is not None:
+            metrics.increment("sse_streams_resumed")
+        return frames
+
+    async def _with_ids(
+        self, stream_id: str, buffer: ReplayBuffer, after: int
+    ) -> AsyncGenerator[str, None]:
+        async for index, frame in buffer.subscribe(after):
+            yield f"id: {stream_id}:{index}\n{frame}"
+
+    def _evict(self) -> None:
+        """Forget buffers finished more than ttl seconds ago"""
+        now = self._clock()
+        expired = [
+            stream_id
+            for stream_id, buffer in self._buffers.items()
+            if buffer.done and now - buffer.finished_at > self.ttl
+        ]
+        for stream_id in expired:
+            del self._buffers[stream_id]
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+
+# Global instance (singleton pattern)
+@cache
+def get_resumable_streams() -> ResumableStreams:
+    """Get or create global registry of resumable streams"""
+    from app.config import settings
+
+    return ResumableStreams(
+        ttl=settings.sse_resume_ttl, grace=settings.sse_resume_grace
+    )
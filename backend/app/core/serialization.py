@@ -0,0 +1,52 @@
+"""
+Fast JSON serialization for responses and SSE frames.
+Uses orjson when it is installed and selected (JSON_ENCODER), otherwise
+the stdlib encoder with the same compact output as Starlette's
+JSONResponse. Pydantic models are serialized by pydantic-core directly
+(model_dump_json), skipping the intermediate dict.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from app.config import settings
+
+try:
+    import orjson
+
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def json_dumps(content: Any) -> bytes:
+    """Serialize content to compact UTF-8 JSON"""
+    if orjson is not None and settings.json_encoder == "orjson":
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def sse_frame(payload: dict) -> str:
+    """SSE data frame carrying a JSON payload"""
+    return f"data: {json_dumps(payload).decode()}\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast encoder (default response class)"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def model_response(model: BaseModel, **kwargs) -> Response:
+    """Response with a pydantic model serialized straight to JSON bytes"""
+    return Response(
+        content=model.model_dump_json().encode(),
+        media_type="application/json",
+        **kwargs,
+    )
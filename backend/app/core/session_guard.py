@@ -0,0 +1,215 @@
+"""
+One generation per chat session at a time.
+A double-clicked send or a frontend retry must not start a second
+generation on the same session. Sessions are leased in a Postgres
+UNLOGGED table shared by all workers (a lease does not pin a pooled
+connection for the whole stream the way an advisory lock would).
+
+Policies for a request on a busy session:
+- reject: fail immediately
+- queue: wait until the running generation finishes
+- attach: follow the running stream if it lives in this worker
+  (reject otherwise)
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from datetime import UTC, datetime, timedelta
+from functools import cache
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("reject", "queue", "attach")
+
+# Leases are disposable, so the table is UNLOGGED (no WAL writes)
+chat_session_locks = Table(
+    "chat_session_locks",
+    MetaData(),
+    Column("session_id", PG_UUID(as_uuid=True), primary_key=True),
+    Column("owner", String(32), nullable=False),
+    Column("expires_at", TIMESTAMP, nullable=False),
+    prefixes=["UNLOGGED"],
+)
+
+
+class SessionBusyError(Exception):
+    """Session already has a generation in flight"""
+
+
+class MemorySessionLockStore:
+    """Leases in process memory (single worker, tests)"""
+
+    def __init__(self):
+        self._leases: dict[UUID, tuple[str, float]] = {}
+
+    async def acquire(self, session_id: UUID, owner: str, ttl: int) -> bool:
+        now = time.time()
+        lease = self._leases.get(session_id)
+        if lease is not None and lease[1] > now:
+            return False
+        self._leases[session_id] = (owner, now + ttl)
+        return True
+
+    async def release(self, session_id: UUID, owner: str) -> None:
+        lease = self._leases.get(session_id)
+        if lease is not None and lease[0] == owner:
+            del self._leases[session_id]
+
+
+class PostgresSessionLockStore:
+    """Leases in a Postgres UNLOGGED table shared by all workers"""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def acquire(self, session_id: UUID, owner: str, ttl: int) -> bool:
+        """Take the lease unless a live one exists (expired ones are taken)"""
+        now = datetime.now(UTC).replace(tzinfo=None)
+        stmt = pg_insert(chat_session_locks).values(
+            session_id=session_id,
+            owner=owner,
+            expires_at=now + timedelta(seconds=ttl),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[chat_session_locks.c.session_id],
+            set_={
+                "owner": stmt.excluded.owner,
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=chat_session_locks.c.expires_at
+            < func.timezone("utc", func.now()),
+        ).returning(chat_session_locks.c.owner)
+
+        async with self.engine.begin() as conn:
+            row = (await conn.execute(stmt)).first()
+        return row is not None
+
+    async def release(self, session_id: UUID, owner: str) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(chat_session_locks).where(
+                    chat_session_locks.c.session_id == session_id,
+                    chat_session_locks.c.owner == owner,
+                )
+            )
+
+
+class SessionGuard:
+    """Per-session single-flight guard for chat generations"""
+
+    def __init__(
+        self,
+        store: MemorySessionLockStore | PostgresSessionLockStore,
+        policy: str = "reject",
+        ttl: int = 300,
+        queue_timeout: float = 30.0,
+        poll_interval: float = 0.2,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown session policy: {policy}")
+        self.store = store
+        self.policy = policy
+        self.ttl = ttl
+        self.queue_timeout = queue_timeout
+        self.poll_interval = poll_interval
+        self._streams = SingleFlight("chat_session_streams")
+
+    async def acquire(self, session_id: UUID) -> str:
+        """
+        Lease a session for one generation.
+
+        Returns:
+            Lease owner token, pass it to release()
+
+        Raises:
+            SessionBusyError: Session is busy (and the wait timed out
+                for the queue policy)
+        """
+        owner = uuid4().hex
+        if await self.store.acquire(session_id, owner, self.ttl):
+            return owner
+
+        if self.policy != "queue":
+            metrics.increment("chat_session_rejected")
+            raise SessionBusyError(f"Session {session_id} is busy")
+
+        metrics.increment("chat_session_queued")
+        deadline = time.monotonic() + self.queue_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            if await self.store.acquire(session_id, owner, self.ttl):
+                return owner
+
+        metrics.increment("chat_session_rejected")
+        raise SessionBusyError(f"Session {session_id} is still busy")
+
+    async def release(self, session_id: UUID, owner: str) -> None:
+        try:
+            await self.store.release(session_id, owner)
+        except Exception as e:
+            # The lease expires on its own
+            logger.warning(f"Releasing session {session_id} failed: {e}")
+
+    def attach(self, session_id: UUID) -> AsyncGenerator[str, None] | None:
+        """Follow the running stream of a session in this worker, if any"""
+        if self.policy != "attach" or session_id not in self._streams:
+            return None
+        metrics.increment("chat_session_attached")
+        return self._streams.stream(session_id, _no_source)
+
+    def stream(
+        self,
+        session_id: UUID,
+        factory: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        """Run a session's stream, shared with attaching requests"""
+        if self.policy != "attach":
+            return factory()
+        return self._streams.stream(session_id, factory)
+
+    def abandon(self, session_id: UUID) -> None:
+        """Stop a session's stream whose requester left before reading"""
+        self._streams.abandon(session_id)
+
+
+def _no_source() -> AsyncIterator[str]:
+    raise RuntimeError("Attached to a stream that is not running")
+
+
+# Global instance (singleton pattern)
+@cache
+def get_session_guard() -> SessionGuard:
+    """Get or create global session guard with the configured storage"""
+    from app.config import settings
+
+    if settings.chat_session_lock_storage == "memory":
+        store = MemorySessionLockStore()
+    else:
+        from app.database import engine
+
+        store = PostgresSessionLockStore(engine)
+    return SessionGuard(
+        store,
+        policy=settings.chat_session_policy,
+        ttl=settings.chat_session_lock_ttl,
+        queue_timeout=settings.chat_session_queue_timeout,
+    )
@@ -0,0 +1,140 @@
+"""
+Single-flight coalescing of identical token streams.
+The first caller drives the source stream; concurrent callers with the same
+key subscribe to a shared buffer that replays produced tokens and then
+follows the live stream.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Hashable
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class FlightCancelledError(RuntimeError):
+    """Raised to subscribers when the shared stream was cancelled"""
+
+
+class Flight:
+    """A single in-flight stream shared by any number of subscribers"""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self.tokens: list[str] = []
+        self.done = False
+        self.cancelled = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self._source = source
+        self._event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self, on_done: Callable[[], None]) -> None:
+        """Start driving the source stream in a background task"""
+        self._task = asyncio.create_task(self._run(on_done))
+
+    async def _run(self, on_done: Callable[[], None]) -> None:
+        try:
+            async for token in self._source:
+                self.tokens.append(token)
+                self._wake()
+        except asyncio.CancelledError:
+            self.error = FlightCancelledError("Generation was cancelled")
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._wake()
+            on_done()
+
+    def _wake(self) -> None:
+        """Wake all waiting subscribers"""
+        # Producer never waits on subscribers, so a slow reader
+        # only falls behind in the buffer without blocking others
+        self._event.set()
+        self._event = asyncio.Event()
+
+    def cancel(self) -> None:
+        """Cancel the producer task"""
+        if self._task and not self.done:
+            self.cancelled = True
+            self._task.cancel()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        """Replay buffered tokens, then follow the live stream"""
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(self.tokens):
+                    yield self.tokens[index]
+                    index += 1
+
+                if self.done:
+                    if self.error:
+                        raise self.error
+                    return
+
+                await self._event.wait()
+        finally:
+            self.subscribers -= 1
+            # Nobody is listening anymore: stop generating
+            if self.subscribers == 0:
+                self.cancel()
+
+
+class SingleFlight:
+    """Registry of in-flight streams keyed by request identity"""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._flights: dict[Hashable, Flight] = {}
+
+    def stream(
+        self, key: Hashable, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncGenerator[str, None]:
+        """
+        Get a token stream for key.
+
+        Args:
+            key: Identity of the request (e.g. prompt, model and options)
+            factory: Creates the source stream if nothing is in flight
+
+        Returns:
+            Async generator over the full stream
+        """
+        flight = self._flights.get(key)
+
+        # A cancelled flight is only forgotten once its task has wound
+        # down; joining it meanwhile would just get the cancellation
+        if flight is None or flight.cancelled:
+            flight = Flight(factory())
+            self._flights[key] = flight
+            flight.start(on_done=lambda: self._forget(key, flight))
+        else:
+            metrics.increment(f"{self.name}_coalesced")
+            logger.info(
+                f"Joined in-flight stream ({len(flight.tokens)} tokens "
+                f"buffered, {flight.subscribers} subscribers)"
+            )
+
+        return flight.subscribe()
+
+    def abandon(self, key: Hashable) -> None:
+        """Cancel the flight of key if nobody subscribed to it (yet)"""
+        flight = self._flights.get(key)
+        if flight is not None and flight.subscribers == 0:
+            flight.cancel()
+
+    def _forget(self, key: Hashable, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        flight = self._flights.get(key)
+        return flight is not None and not flight.cancelled
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,111 @@
+"""
+Coalescing of LLM token streams for Server-Sent Events.
+Buffers tokens and flushes them every interval or once the buffer grows
+past a size limit, so that each SSE frame carries several tokens instead
+of one. The first token is always flushed immediately.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    interval_ms: int = 50,
+    max_chars: int = 64,
+) -> AsyncGenerator[str, None]:
+    """
+    Merge consecutive tokens into larger chunks.
+
+    Args:
+        tokens: Source token stream
+        interval_ms: Max time a token waits in the buffer (0 = no coalescing)
+        max_chars: Flush as soon as the buffer reaches this many characters
+
+    Yields:
+        Concatenated tokens
+    """
+    iterator = aiter(tokens)
+    if interval_ms <= 0:
+        async for token in iterator:
+            yield token
+        return
+
+    # The first token is sent on its own, as soon as it arrives
+    try:
+        yield await anext(iterator)
+    except StopAsyncIteration:
+        return
+
+    # Closed with this generator, so the pending token is cancelled
+    async with contextlib.aclosing(
+        _coalesce(iterator, interval_ms / 1000, max_chars)
+    ) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+async def _coalesce(
+    iterator: AsyncIterator[str], interval: float, max_chars: int
+) -> AsyncGenerator[str, None]:
+    """Buffer tokens until interval passed or max_chars are buffered"""
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    pending: asyncio.Future | None = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(iterator))
+
+            # Wait for the next token, but not past the flush deadline
+            if not await _wait(pending, deadline if buffer else None):
+                # Deadline passed while the model is still thinking
+                yield "".join(buffer)
+                buffer, size = [], 0
+                continue
+
+            token, pending = _result(pending), None
+            if token is None:
+                break
+
+            if not buffer:
+                deadline = time.monotonic() + interval
+            buffer.append(token)
+            size += len(token)
+
+            if size >= max_chars or time.monotonic() >= deadline:
+                yield "".join(buffer)
+                buffer, size = [], 0
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            with contextlib.suppress(
+                asyncio.CancelledError, StopAsyncIteration
+            ):
+                await pending
+
+
+async def _wait(pending: asyncio.Future, deadline: float | None) -> bool:
+    """Wait for a pending token until deadline; False if it passed first"""
+    if deadline is None:
+        await asyncio.wait({pending})
+    else:
+        timeout = deadline - time.monotonic()
+        if timeout > 0:
+            await asyncio.wait({pending}, timeout=timeout)
+    return pending.done()
+
+
+def _result(pending: asyncio.Future) -> str | None:
+    """Token of a finished anext(), None at the end of the stream"""
+    try:
+        return pending.result()
+    except StopAsyncIteration:
+        return None
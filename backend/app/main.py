@@ -1,16 +1,33 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 
+from app.api.deps import verify_admin_access
 from app.api.v1 import api_router
 from app.config import settings
-from app.core.rate_limit import get_rate_limiter
+from app.core.metrics import metrics
+from app.core.notifications import listen
+from app.core.rate_limit import (
+    RateLimit,
+    RateLimitMiddleware,
+    get_rate_limiter,
+)
+from app.core.serialization import FastJSONResponse
 from app.database import engine
+from app.services.chat_retention import get_chat_retention
+from app.services.chat_writer import get_chat_writer
+from app.services.llm import get_ollama_service
+from app.services.profile_cache import PROFILE_CHANNEL, get_profile_cache
+from app.services.profile_snapshot import export_profile_snapshot
+from app.services.rag import (
+    KNOWLEDGE_CHANNEL,
+    clear_retrieval_cache,
+    refresh_faq_answers,
+)
 
-limiter = get_rate_limiter()
+rate_limiter = get_rate_limiter()
 
 
 @asynccontextmanager
@@ -20,10 +37,75 @@ async def lifespan(app: FastAPI):
     print(f"📊 Environment: {settings.environment}")
     print(f"🔗 Ollama: {settings.ollama_host}")
 
+    # Batch writes of chat messages in the background
+    chat_writer = get_chat_writer()
+    chat_writer.start()
+
+    # Load the model in the background so startup is not blocked
+    ollama_service = get_ollama_service()
+    background_tasks: list[asyncio.Task] = []
+    if settings.ollama_warmup_on_startup:
+        background_tasks.append(asyncio.create_task(ollama_service.warmup()))
+    if settings.ollama_keep_warm_interval > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                ollama_service.keep_warm(settings.ollama_keep_warm_interval)
+            )
+        )
+
+    # Forget expired rate limit windows
+    background_tasks.append(
+        asyncio.create_task(
+            rate_limiter.run_cleanup(settings.rate_limit_cleanup_interval)
+        )
+    )
+
+    # Keep message partitions ahead and drop expired history
+    background_tasks.append(
+        asyncio.create_task(
+            get_chat_retention().run_periodically(
+                settings.chat_retention_interval
+            )
+        )
+    )
+
+    # Drop the cached profile and retrievals when an admin edits the
+    # profile or reindexes (in any worker)
+    background_tasks.append(
+        asyncio.create_task(
+            listen(
+                settings.database_url.replace("+asyncpg", ""),
+                {
+                    PROFILE_CHANNEL: get_profile_cache().invalidate,
+                    KNOWLEDGE_CHANNEL: clear_retrieval_cache,
+                },
+            )
+        )
+    )
+
+    # Publish the static profile snapshot served by nginx
+    if settings.profile_snapshot_dir:
+        background_tasks.append(
+            asyncio.create_task(export_profile_snapshot())
+        )
+
+    # Load precomputed FAQ answers and pick up regenerated ones
+    if settings.faq_enabled:
+        background_tasks.append(
+            asyncio.create_task(
+                refresh_faq_answers(settings.faq_refresh_interval)
+            )
+        )
+
     yield
 
     # Shutdown
     print("👋 Shutting down...")
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await chat_writer.stop()
     await engine.dispose()
 
 
@@ -32,11 +114,34 @@ app = FastAPI(
     description="AI-powered digital twin chat for Stan Frant",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
-# Add rate limiter state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Rate limits, checked before the request body is read
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    rules={
+        f"{settings.api_v1_prefix}/chat/message": [
+            RateLimit(settings.rate_limit_per_minute, "minute"),
+            RateLimit(settings.rate_limit_per_hour, "hour"),
+            RateLimit(settings.rate_limit_per_day, "day"),
+        ],
+        f"{settings.api_v1_prefix}/chat/answer": [
+            RateLimit(settings.rate_limit_per_minute, "minute"),
+            RateLimit(settings.rate_limit_per_hour, "hour"),
+            RateLimit(settings.rate_limit_per_day, "day"),
+        ],
+        f"{settings.api_v1_prefix}/chat/batch": [
+            RateLimit(settings.rate_limit_batch_per_hour, "hour"),
+        ],
+        f"{settings.api_v1_prefix}/chat/prefetch": [
+            RateLimit(settings.rate_limit_prefetch_per_minute, "minute"),
+            RateLimit(settings.rate_limit_prefetch_per_hour, "hour"),
+        ],
+    },
+    trusted_proxies=settings.trusted_proxies,
+)
 
 # CORS
 app.add_middleware(
@@ -61,6 +166,12 @@ async def health_check():
     }
 
 
+# Metrics endpoint (per worker process, admin only)
+@app.get("/api/v1/metrics", dependencies=[Depends(verify_admin_access)])
+async def get_metrics():
+    return metrics.snapshot()
+
+
 # Root
 @app.get("/")
 async def root():
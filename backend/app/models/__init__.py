@@ -1,6 +1,6 @@
 from app.database import Base
 from app.models.chat import ChatMessage, ChatSession
-from app.models.knowledge import KnowledgeChunk
+from app.models.knowledge import FaqEntry, KnowledgeChunk
 from app.models.profile import (
     Certification,
     Education,
@@ -18,6 +18,7 @@ __all__ = [
     "ChatMessage",
     "ChatSession",
     "Education",
+    "FaqEntry",
     "KnowledgeChunk",
     "Language",
     "ProfileBasics",
@@ -4,8 +4,10 @@ from sqlalchemy import (
     ARRAY,
     JSON,
     TIMESTAMP,
+    Boolean,
     Column,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -23,7 +25,7 @@ class ChatSession(Base):
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     first_message_at = Column(TIMESTAMP, server_default=func.now())
     last_message_at = Column(
-        TIMESTAMP, server_default=func.now(), onupdate=func.now()
+        TIMESTAMP, server_default=func.now(), onupdate=func.now(), index=True
     )
     message_count = Column(Integer, default=0)
     ip_hash = Column(String(64))
@@ -34,9 +36,17 @@ class ChatSession(Base):
 
 
 class ChatMessage(Base):
+    """
+    Chat message.
+    In Postgres the table is range-partitioned by month on created_at
+    with an (id, created_at) primary key, both created by the migration
+    (b2a8d4f61c07). The model keeps a plain id key: ids come from one
+    sequence, and create_all stays portable (SQLite in tests).
+    """
+
     __tablename__ = "chat_messages"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(
         PG_UUID(as_uuid=True),
         ForeignKey("chat_sessions.id", ondelete="CASCADE"),
@@ -44,9 +54,21 @@ class ChatMessage(Base):
     )
     role = Column(String(20), nullable=False)  # user or assistant
     content = Column(Text, nullable=False)
-    retrieved_chunks = Column(ARRAY(Integer))  # List of integers
+    retrieved_chunks = Column(  # List of integers
+        ARRAY(Integer).with_variant(JSON, "sqlite")
+    )
     language_detected = Column(String(10))
     response_time_ms = Column(Integer)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    is_aborted = Column(Boolean, default=False)  # client left mid-stream
+    # Partition key
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
 
     session = relationship("ChatSession", back_populates="messages")
+
+    __table_args__ = (
+        Index(
+            "ix_chat_messages_created_at_brin",
+            "created_at",
+            postgresql_using="brin",
+        ),
+    )
@@ -1,5 +1,14 @@
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import JSON, TIMESTAMP, Column, Index, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    TIMESTAMP,
+    Column,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -17,3 +26,22 @@ class KnowledgeChunk(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
 
     __table_args__ = (Index("idx_chunks_source", "source_table", "source_id"),)
+
+
+class FaqEntry(Base):
+    """Canonical question whose answer is pregenerated at reindex time"""
+
+    __tablename__ = "faq_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    language = Column(String(10), nullable=False)
+    question = Column(Text, nullable=False)
+    answer = Column(Text)  # NULL until the next reindex
+    embedding = Column(Vector(768))  # query embedding of the question
+    chunk_ids = Column(JSON)  # chunks the answer was generated from
+    generated_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("language", "question", name="uq_faq_question"),
+    )
@@ -2,6 +2,7 @@
 Pydantic schemas for chat endpoints.
 """
 
+from typing import Annotated
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -19,6 +20,23 @@ class ChatMessageRequest(BaseModel):
     session_id: UUID | None = Field(
         None, description="Session ID (will be created if not provided)"
     )
+    idempotency_key: str | None = Field(
+        None,
+        min_length=8,
+        max_length=128,
+        description="Client-generated key, identical for retries",
+    )
+
+
+class PrefetchRequest(BaseModel):
+    """Request schema for speculative retrieval while typing"""
+
+    message: str = Field(
+        ...,
+        min_length=3,
+        max_length=500,
+        description="Text typed so far",
+    )
 
 
 class ChatMessageResponse(BaseModel):
@@ -29,6 +47,29 @@ class ChatMessageResponse(BaseModel):
     chunks_used: int
 
 
+class ChatBatchRequest(BaseModel):
+    """Request schema for answering many questions at once"""
+
+    questions: list[Annotated[str, Field(min_length=1, max_length=500)]] = (
+        Field(..., min_length=1, description="Questions to answer")
+    )
+
+
+class ChatBatchAnswer(BaseModel):
+    """Answer to one question of a batch"""
+
+    question: str
+    response: str
+    language: str
+    chunks_used: int
+
+
+class ChatBatchResponse(BaseModel):
+    """Response schema for batch answers"""
+
+    answers: list[ChatBatchAnswer]
+
+
 class SessionResponse(BaseModel):
     """Response schema for session info"""
 
@@ -0,0 +1,27 @@
+"""
+Pydantic schemas for precomputed FAQ answers (admin).
+"""
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class FaqEntryCreate(BaseModel):
+    """Request schema for registering a canonical question"""
+
+    language: str = Field(..., pattern="^(en|ru|de)$")
+    question: str = Field(..., min_length=3, max_length=500)
+
+
+class FaqEntryResponse(BaseModel):
+    """FAQ entry with its generated answer (None until reindex)"""
+
+    id: int
+    language: str
+    question: str
+    answer: str | None = None
+    generated_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,158 @@
+"""
+Retention of chat history.
+chat_messages is range-partitioned by month. The job keeps partitions
+created a few months ahead, drops partitions older than the retention
+period (a cheap metadata operation instead of a huge DELETE) and removes
+sessions left without messages.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import delete, exists, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.chat import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+# Serializes the job across workers (pg_advisory_xact_lock key)
+RETENTION_LOCK_ID = 4_204_201
+
+PARTITION_NAME = re.compile(r"^chat_messages_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after month"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"chat_messages_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    """Month covered by a partition, or None for foreign tables"""
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_partitions(names: list[str], cutoff: date) -> list[str]:
+    """Partitions whose whole month is before cutoff"""
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+class ChatRetention:
+    """Maintains chat_messages partitions and prunes old chat history"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        retention_days: int = 365,
+        partitions_ahead: int = 2,
+    ):
+        self.engine = engine
+        self.retention_days = retention_days
+        self.partitions_ahead = partitions_ahead
+
+    async def run(self, today: date | None = None) -> dict:
+        """
+        Create upcoming partitions and drop expired history.
+
+        Args:
+            today: Reference date (defaults to the current UTC date)
+
+        Returns:
+            Names of created and dropped partitions, deleted sessions
+        """
+        today = today or datetime.now(UTC).date()
+        stats = {"created": [], "dropped": [], "sessions_deleted": 0}
+
+        async with self.engine.begin() as conn:
+            # Only one worker maintains partitions at a time
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"),
+                {"id": RETENTION_LOCK_ID},
+            )
+            existing = set(
+                (
+                    await conn.execute(
+                        text(
+                            "SELECT child.relname FROM pg_inherits "
+                            "JOIN pg_class parent "
+                            "ON pg_inherits.inhparent = parent.oid "
+                            "JOIN pg_class child "
+                            "ON pg_inherits.inhrelid = child.oid "
+                            "WHERE parent.relname = 'chat_messages'"
+                        )
+                    )
+                ).scalars()
+            )
+
+            current = today.replace(day=1)
+            for offset in range(self.partitions_ahead + 1):
+                month = add_months(current, offset)
+                name = partition_name(month)
+                if name in existing:
+                    continue
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF chat_messages "
+                        f"FOR VALUES FROM ('{month}') "
+                        f"TO ('{add_months(month, 1)}')"
+                    )
+                )
+                stats["created"].append(name)
+
+            if self.retention_days > 0:
+                cutoff = today - timedelta(days=self.retention_days)
+                for name in expired_partitions(list(existing), cutoff):
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                    stats["dropped"].append(name)
+
+                # Sessions whose messages are all gone
+                result = await conn.execute(
+                    delete(ChatSession).where(
+                        ChatSession.last_message_at < cutoff,
+                        ~exists(
+                            select(ChatMessage.id).where(
+                                ChatMessage.session_id == ChatSession.id
+                            )
+                        ),
+                    )
+                )
+                stats["sessions_deleted"] = result.rowcount
+
+        logger.info(f"Chat retention completed: {stats}")
+        return stats
+
+    async def run_periodically(self, interval: int) -> None:
+        """Run now and then every interval seconds until cancelled"""
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Chat retention failed: {e}")
+            await asyncio.sleep(interval)
+
+
+def get_chat_retention() -> ChatRetention:
+    """Create retention job with the settings"""
+    from app.config import settings
+    from app.database import engine
+
+    return ChatRetention(
+        engine,
+        retention_days=settings.chat_retention_days,
+        partitions_ahead=settings.chat_partitions_ahead,
+    )
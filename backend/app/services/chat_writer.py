@@ -0,0 +1,282 @@
+"""
+Write-behind persistence for chat sessions and messages.
+Requests enqueue rows and return immediately; a background task writes
+them in batches (multi-row inserts plus one counter update per session)
+every flush interval. The queue is bounded, so producers wait when the
+database falls behind. A batch that keeps failing is written row by row,
+so only the rows the database rejects are lost.
+
+Queued sessions are only known to the worker that queued them; other
+workers see them once they are flushed.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import cache
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import metrics
+from app.models.chat import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+MAX_WRITE_ATTEMPTS = 3
+
+sessions_table = ChatSession.__table__
+
+# Increment counters of an existing session (executed for many sessions)
+update_session_counters = (
+    update(sessions_table)
+    .where(sessions_table.c.id == bindparam("session_id"))
+    .values(
+        message_count=sessions_table.c.message_count + bindparam("count"),
+        last_message_at=bindparam("last_message_at"),
+    )
+)
+
+
+@dataclass
+class PendingWrite:
+    """A row waiting to be written"""
+
+    model: type
+    values: dict[str, Any]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class ChatWriter:
+    """Background batch writer for chat rows"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_queue: int = 1000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[PendingWrite | None] = asyncio.Queue(
+            maxsize=max_queue
+        )
+        self._pending_sessions: set[UUID] = set()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still queued"""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def add_session(self, session_id: UUID, ip_hash: str) -> None:
+        """Queue a new chat session"""
+        self._pending_sessions.add(session_id)
+        now = utcnow()
+        await self._put(
+            PendingWrite(
+                ChatSession,
+                {
+                    "id": session_id,
+                    "ip_hash": ip_hash,
+                    "message_count": 0,
+                    "first_message_at": now,
+                    "last_message_at": now,
+                },
+            )
+        )
+
+    async def add_message(
+        self,
+        session_id: UUID,
+        role: str,
+        content: str,
+        **fields: Any,
+    ) -> None:
+        """Queue a chat message; the session counters follow it"""
+        await self._put(
+            PendingWrite(
+                ChatMessage,
+                {
+                    "session_id": session_id,
+                    "role": role,
+                    "content": content,
+                    "retrieved_chunks": None,
+                    "language_detected": None,
+                    "response_time_ms": None,
+                    "is_aborted": False,
+                    "created_at": utcnow(),
+                    **fields,
+                },
+            )
+        )
+
+    def is_pending_session(self, session_id: UUID) -> bool:
+        """Check if a session is queued but not written yet"""
+        return session_id in self._pending_sessions
+
+    async def flush(self) -> int:
+        """
+        Write everything currently queued.
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        while not self._queue.empty():
+            batch = self._drain(self.batch_size)
+            if batch:
+                written += await self._write(batch)
+        return written
+
+    async def _put(self, item: PendingWrite) -> None:
+        if self._queue.full():
+            # Database is behind: make the request wait for room
+            metrics.increment("chat_writer_backpressure")
+        await self._queue.put(item)
+
+    def _drain(self, limit: int) -> list[PendingWrite]:
+        batch: list[PendingWrite] = []
+        while len(batch) < limit and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+
+            # Let the batch fill up unless there is already enough work
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+
+            batch = [first]
+            stopping = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: list[PendingWrite]) -> int:
+        """Write a batch in one transaction, retrying a few times"""
+        sessions = [w.values for w in batch if w.model is ChatSession]
+        messages = [w.values for w in batch if w.model is ChatMessage]
+
+        counters: dict[UUID, dict[str, Any]] = defaultdict(
+            lambda: {"count": 0, "last_message_at": None}
+        )
+        for message in messages:
+            counter = counters[message["session_id"]]
+            counter["count"] += 1
+            counter["last_message_at"] = message["created_at"]
+
+        for attempt in range(1, MAX_WRITE_ATTEMPTS + 1):
+            try:
+                async with self.session_factory() as db:
+                    if sessions:
+                        await db.execute(insert(ChatSession), sessions)
+                    if messages:
+                        await db.execute(insert(ChatMessage), messages)
+                    if counters:
+                        await db.execute(
+                            update_session_counters,
+                            [
+                                {"session_id": session_id, **counter}
+                                for session_id, counter in counters.items()
+                            ],
+                        )
+                    await db.commit()
+                break
+            except Exception as e:
+                metrics.increment("chat_writer_failures")
+                if attempt == MAX_WRITE_ATTEMPTS:
+                    logger.error(
+                        f"Writing {len(batch)} chat rows one by one after "
+                        f"{attempt} failed batch writes: {e}"
+                    )
+                    written = await self._write_rows(batch)
+                    self._forget_sessions(sessions)
+                    return written
+                logger.warning(f"Chat write failed (attempt {attempt}): {e}")
+                await asyncio.sleep(self.flush_interval * attempt)
+
+        self._forget_sessions(sessions)
+        oldest = min(w.enqueued_at for w in batch)
+        metrics.observe(
+            "chat_writer_flush_lag_ms", (time.monotonic() - oldest) * 1000
+        )
+        metrics.observe("chat_writer_batch_size", len(batch))
+        return len(batch)
+
+    async def _write_rows(self, batch: list[PendingWrite]) -> int:
+        """Write rows in a transaction each, dropping the ones that fail"""
+        written = 0
+        # Sessions first, their messages reference them
+        for row in sorted(batch, key=lambda w: w.model is not ChatSession):
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(insert(row.model), [row.values])
+                    if row.model is ChatMessage:
+                        counter = {
+                            "session_id": row.values["session_id"],
+                            "count": 1,
+                            "last_message_at": row.values["created_at"],
+                        }
+                        await db.execute(update_session_counters, [counter])
+                    await db.commit()
+                written += 1
+            except Exception as e:
+                metrics.increment("chat_writer_dropped_rows")
+                session_id = row.values.get("session_id", row.values.get("id"))
+                logger.error(
+                    f"Dropping {row.model.__tablename__} row of session "
+                    f"{session_id}: {e}"
+                )
+        return written
+
+    def _forget_sessions(self, sessions: list[dict[str, Any]]) -> None:
+        for session in sessions:
+            self._pending_sessions.discard(session["id"])
+
+
+# Global instance (singleton pattern)
+@cache
+def get_chat_writer() -> ChatWriter:
+    """Get or create global chat writer instance"""
+    from app.config import settings
+    from app.database import AsyncSessionLocal
+
+    return ChatWriter(
+        AsyncSessionLocal,
+        max_queue=settings.chat_write_queue_size,
+        batch_size=settings.chat_write_batch_size,
+        flush_interval=settings.chat_write_flush_interval_ms / 1000,
+    )
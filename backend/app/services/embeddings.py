@@ -44,6 +44,10 @@ class EmbeddingService:
         prefixed_query = f"query: {query}"
         return self.create_embedding(prefixed_query)
 
+    def create_query_embeddings(self, queries: list[str]) -> list[list[float]]:
+        """Create embeddings for many search queries in one encode call"""
+        return self.create_embeddings([f"query: {query}" for query in queries])
+
     def create_passage_embedding(self, passage: str) -> list[float]:
         """Create embedding for a document passage (with passage prefix)"""
         prefixed_passage = f"passage: {passage}"
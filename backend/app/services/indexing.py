@@ -4,12 +4,14 @@ Automatically converts profile data into searchable embeddings.
 """
 
 import logging
+from datetime import UTC, datetime
 
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.knowledge import KnowledgeChunk
+from app.database import AsyncSessionLocal
+from app.models.knowledge import FaqEntry, KnowledgeChunk
 from app.models.profile import (
     Education,
     ProfileBasics,
@@ -25,6 +27,7 @@ from app.services.formatters import (
     format_skill_category,
     format_work_experience,
 )
+from app.services.rag import RAGService, load_faq_answers
 from app.services.text_utils import chunk_text
 
 logger = logging.getLogger(__name__)
@@ -259,6 +262,77 @@ class IndexingService:
         logger.info(f"Full reindex completed: {stats}")
         return stats
 
+    async def generate_faq_answers(self) -> int:
+        """
+        Pregenerate answers and query embeddings of all FAQ entries.
+        Run after reindexing so answers reflect the current knowledge base.
+        Entries keep their previous answer if the LLM is unavailable.
+
+        Returns:
+            Number of answers generated
+        """
+        result = await self.db.execute(select(FaqEntry).order_by(FaqEntry.id))
+        entries = result.scalars().all()
+        if not entries:
+            return 0
+
+        embeddings = self.embedding_service.create_query_embeddings(
+            [entry.question for entry in entries]
+        )
+
+        rag = RAGService(self.db)
+        # Answer from the knowledge base, not from stale FAQ answers
+        rag.faq = None
+
+        generated = 0
+        for entry, embedding in zip(entries, embeddings, strict=True):
+            try:
+                generated += await self._generate_faq_answer(
+                    rag, entry, embedding
+                )
+            except Exception:
+                logger.exception(
+                    f"Generating FAQ {entry.id} failed, keeping old answer"
+                )
+
+        await self.db.commit()
+        logger.info(f"Generated {generated}/{len(entries)} FAQ answers")
+        return generated
+
+    async def _generate_faq_answer(
+        self, rag: RAGService, entry: FaqEntry, embedding: list[float]
+    ) -> int:
+        """Regenerate the answer of one FAQ entry, 1 if it got one"""
+        if not await rag.llm_service.is_available():
+            logger.warning(
+                f"LLM unavailable, FAQ {entry.id} keeps its old answer"
+            )
+            return 0
+
+        chunks = await rag.vector_search(
+            query=entry.question, query_embedding=embedding
+        )
+        if not chunks:
+            # Nothing to answer from; let the full pipeline handle it
+            entry.answer = None
+            entry.chunk_ids = None
+            entry.embedding = embedding
+            return 0
+
+        answer = await rag.answer(entry.question, chunks=chunks)
+        if answer.degraded:
+            # Excerpts from a failed generation are not worth keeping
+            logger.warning(
+                f"LLM failed during FAQ {entry.id}, it keeps its old answer"
+            )
+            return 0
+
+        entry.answer = answer.response
+        entry.chunk_ids = answer.chunk_ids
+        entry.embedding = embedding
+        entry.generated_at = datetime.now(UTC).replace(tzinfo=None)
+        return 1
+
     async def _delete_chunks(self, source_table: str, source_id: int):
         """Delete all chunks for a specific source"""
         await self.db.execute(
@@ -267,3 +341,16 @@ class IndexingService:
                 KnowledgeChunk.source_id == source_id,
             )
         )
+
+
+async def regenerate_faq_answers() -> None:
+    """
+    Regenerate FAQ answers and reload them (background task of reindex).
+    Runs in a session of its own, the request's is closed by then.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await IndexingService(db).generate_faq_answers()
+            await load_faq_answers(db)
+    except Exception:
+        logger.exception("Regenerating FAQ answers failed")
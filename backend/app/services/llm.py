@@ -1,35 +1,192 @@
+import asyncio
+import json
 import logging
-from collections.abc import AsyncGenerator
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
 
 import httpx
 
 from app.config import settings
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+from app.core.metrics import metrics
+
+try:
+    import orjson
+
+    json_loads: Callable[[bytes], dict] = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+
+    def json_loads(data: bytes) -> dict:
+        # Skips the encoding detection json.loads does for bytes
+        return json.loads(data.decode())
+
 
 logger = logging.getLogger(__name__)
 
+# load_duration above this means the model was (re)loaded into memory
+COLD_LOAD_THRESHOLD_MS = 1000
+
+NS_PER_MS = 1_000_000
+
+CONNECT_TIMEOUT = 5.0
+
+
+class OllamaError(Exception):
+    """Error reported by Ollama inside a response stream"""
+
+
+@dataclass(slots=True)
+class GenerationStats:
+    """Timing stats from Ollama's final stream frame (ms)"""
+
+    total_duration_ms: float = 0.0
+    load_duration_ms: float = 0.0
+    prompt_eval_count: int = 0
+    prompt_eval_ms: float = 0.0
+    eval_count: int = 0
+    eval_ms: float = 0.0
+    done_reason: str | None = None
+
+    @classmethod
+    def from_frame(cls, data: dict) -> "GenerationStats":
+        return cls(
+            total_duration_ms=data.get("total_duration", 0) / NS_PER_MS,
+            load_duration_ms=data.get("load_duration", 0) / NS_PER_MS,
+            prompt_eval_count=data.get("prompt_eval_count", 0),
+            prompt_eval_ms=data.get("prompt_eval_duration", 0) / NS_PER_MS,
+            eval_count=data.get("eval_count", 0),
+            eval_ms=data.get("eval_duration", 0) / NS_PER_MS,
+            done_reason=data.get("done_reason"),
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        if not self.eval_ms:
+            return 0.0
+        return self.eval_count / (self.eval_ms / 1000)
+
+
+@dataclass(slots=True)
+class StreamFrame:
+    """Single decoded frame of an Ollama stream"""
+
+    text: str
+    done: bool = False
+    stats: GenerationStats | None = None  # set on the final frame only
+
+
+def _generate_text(data: dict) -> str:
+    return data.get("response", "")
+
+
+def _chat_text(data: dict) -> str:
+    return data.get("message", {}).get("content", "")
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes],
+) -> AsyncGenerator[dict, None]:
+    """
+    Decode an NDJSON byte stream into dicts.
+    Splits frames on raw bytes, so no intermediate str lines are built.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        lines = (buffer + chunk if buffer else chunk).split(b"\n")
+        buffer = lines.pop()
+
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json_loads(line)
+            except ValueError:
+                logger.warning(f"Failed to parse line: {line!r}")
+
+    if buffer.strip():
+        try:
+            yield json_loads(buffer)
+        except ValueError:
+            logger.warning(f"Failed to parse line: {buffer!r}")
+
 
 class OllamaService:
     """Service for interacting with Ollama LLM"""
 
-    def __init__(self, host: str | None = None, model: str | None = None, timeout: int = 300):
+    def __init__(
+        self,
+        host: str | None = None,
+        model: str | None = None,
+        timeout: int = 300,
+        keep_alive: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        max_concurrency: int | None = None,
+    ):
         self.host = host or settings.ollama_host
         self.model = model or settings.ollama_model
         self.timeout = timeout
+        # Fail fast on connect even though generation may take minutes
+        self.http_timeout = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT)
+        self.keep_alive = keep_alive or settings.ollama_keep_alive
+        self.last_request_at = 0.0
+        # Context size of the latest generation (the model Ollama holds)
+        self.last_num_ctx: int | None = None
+        self.transport = transport  # custom transport (tests, benchmarks)
+        self.breaker = CircuitBreaker(
+            "ollama",
+            failure_threshold=settings.llm_circuit_failure_threshold,
+            reset_timeout=settings.llm_circuit_reset_timeout,
+        )
+        # Generations sent to Ollama at once, the rest wait here
+        if max_concurrency is None:
+            max_concurrency = settings.llm_max_concurrency
+        self._slots = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        )
 
     async def check_health(self) -> bool:
         """Check if Ollama service is available"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with httpx.AsyncClient(
+                timeout=5.0, transport=self.transport
+            ) as client:
                 response = await client.get(f"{self.host}/api/tags")
-                return response.status_code == 200
+                healthy = response.status_code == 200
         except Exception as e:
             logger.error(f"Ollama health check failed: {e}")
+            healthy = False
+
+        if healthy:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return healthy
+
+    async def is_available(self) -> bool:
+        """
+        Check if requests should be sent to Ollama.
+        Fails fast while the circuit is open; once the reset timeout has
+        passed, probes Ollama with a health check (half-open) and closes
+        the circuit again on success.
+        """
+        if self.breaker.state == CircuitState.CLOSED:
+            return True
+        if not self.breaker.allow_request():
             return False
+        return await self.check_health()
 
     async def list_models(self) -> list[str]:
         """List available models in Ollama"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with httpx.AsyncClient(
+                timeout=10.0, transport=self.transport
+            ) as client:
                 response = await client.get(f"{self.host}/api/tags")
                 if response.status_code == 200:
                     data = response.json()
@@ -44,6 +201,7 @@ class OllamaService:
         system: str | None = None,
         temperature: float = 0.7,
         max_tokens: int | None = None,
+        num_ctx: int | None = None,
     ) -> str:
         """
         Generate completion (non-streaming).
@@ -53,6 +211,7 @@ class OllamaService:
             "model": self.model,
             "prompt": prompt,
             "stream": False,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": temperature,
             },
@@ -64,33 +223,47 @@ class OllamaService:
         if max_tokens:
             payload["options"]["num_predict"] = max_tokens
 
+        if num_ctx:
+            payload["options"]["num_ctx"] = num_ctx
+            self.last_num_ctx = num_ctx
+
+        self._check_circuit()
+        self.last_request_at = time.monotonic()
+
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with self._slot(), httpx.AsyncClient(
+                timeout=self.http_timeout, transport=self.transport
+            ) as client:
                 response = await client.post(
                     f"{self.host}/api/generate", json=payload
                 )
                 response.raise_for_status()
+                self.breaker.record_success()
                 data = response.json()
+                self._record_stats(GenerationStats.from_frame(data))
                 return data.get("response", "")
         except Exception as e:
+            self.breaker.record_failure()
             logger.error(f"Ollama generation failed: {e}")
             raise
 
-    async def generate_stream(
+    async def generate_frames(
         self,
         prompt: str,
         system: str | None = None,
         temperature: float = 0.7,
         max_tokens: int | None = None,
-    ) -> AsyncGenerator[str, None]:
+        num_ctx: int | None = None,
+    ) -> AsyncGenerator[StreamFrame, None]:
         """
         Generate completion with streaming.
-        Yields tokens as they are generated.
+        Yields typed frames; the final frame carries generation stats.
         """
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": True,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": temperature,
             },
@@ -102,34 +275,254 @@ class OllamaService:
         if max_tokens:
             payload["options"]["num_predict"] = max_tokens
 
+        if num_ctx:
+            payload["options"]["num_ctx"] = num_ctx
+            self.last_num_ctx = num_ctx
+
+        async with aclosing(
+            self._stream_frames("/api/generate", payload, _generate_text)
+        ) as frames:
+            async for frame in frames:
+                yield frame
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system: str | None = None,
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        num_ctx: int | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Generate completion with streaming.
+        Yields tokens as they are generated.
+        """
+        async with aclosing(
+            self.generate_frames(
+                prompt, system, temperature, max_tokens, num_ctx
+            )
+        ) as frames:
+            async for frame in frames:
+                if frame.text:
+                    yield frame.text
+
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        num_ctx: int | None = None,
+    ) -> str:
+        """
+        Chat completion via /api/chat (non-streaming).
+        Messages are dicts with 'role' and 'content' keys.
+        """
+        payload = self._chat_payload(
+            messages, temperature, max_tokens, num_ctx, stream=False
+        )
+
+        self._check_circuit()
+        self.last_request_at = time.monotonic()
+
+        try:
+            async with self._slot(), httpx.AsyncClient(
+                timeout=self.http_timeout, transport=self.transport
+            ) as client:
+                response = await client.post(
+                    f"{self.host}/api/chat", json=payload
+                )
+                response.raise_for_status()
+                self.breaker.record_success()
+                data = response.json()
+                self._record_stats(GenerationStats.from_frame(data))
+                return data.get("message", {}).get("content", "")
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Ollama chat failed: {e}")
+            raise
+
+    async def chat_frames(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        num_ctx: int | None = None,
+    ) -> AsyncGenerator[StreamFrame, None]:
+        """
+        Chat completion via /api/chat with streaming.
+        Keeping the system message static lets Ollama reuse the KV cache
+        for the instruction prefix across requests.
+        Yields typed frames; the final frame carries generation stats.
+        """
+        payload = self._chat_payload(
+            messages, temperature, max_tokens, num_ctx, stream=True
+        )
+
+        async with aclosing(
+            self._stream_frames("/api/chat", payload, _chat_text)
+        ) as frames:
+            async for frame in frames:
+                yield frame
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        num_ctx: int | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Chat completion via /api/chat with streaming.
+        Yields tokens as they are generated.
+        """
+        async with aclosing(
+            self.chat_frames(messages, temperature, max_tokens, num_ctx)
+        ) as frames:
+            async for frame in frames:
+                if frame.text:
+                    yield frame.text
+
+    def _chat_payload(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float,
+        max_tokens: int | None,
+        num_ctx: int | None,
+        stream: bool,
+    ) -> dict:
+        """Build request payload for /api/chat"""
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+            },
+        }
+
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+
+        if num_ctx:
+            payload["options"]["num_ctx"] = num_ctx
+            self.last_num_ctx = num_ctx
+
+        return payload
+
+    async def _stream_frames(
+        self,
+        endpoint: str,
+        payload: dict,
+        text_of: Callable[[dict], str],
+    ) -> AsyncGenerator[StreamFrame, None]:
+        """
+        POST payload to a streaming endpoint and yield decoded frames
+        until the final (done) frame.
+        """
+        self._check_circuit()
+        self.last_request_at = time.monotonic()
+
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with self._slot(), httpx.AsyncClient(
+                timeout=self.http_timeout, transport=self.transport
+            ) as client:
                 async with client.stream(
-                    "POST", f"{self.host}/api/generate", json=payload
+                    "POST", f"{self.host}{endpoint}", json=payload
                 ) as response:
                     response.raise_for_status()
+                    self.breaker.record_success()
 
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            try:
-                                import json
+                    async for data in iter_ndjson(response.aiter_bytes()):
+                        # Ollama reports failures mid-stream as error frames
+                        if "error" in data:
+                            raise OllamaError(data["error"])
 
-                                data = json.loads(line)
+                        # Check if generation is done
+                        if data.get("done", False):
+                            stats = GenerationStats.from_frame(data)
+                            self._record_stats(stats)
+                            yield StreamFrame(text_of(data), True, stats)
+                            break
 
-                                if "response" in data:
-                                    yield data["response"]
-
-                                # Check if generation is done
-                                if data.get("done", False):
-                                    break
-                            except json.JSONDecodeError:
-                                logger.warning(f"Failed to parse line: {line}")
-                                continue
+                        yield StreamFrame(text_of(data))
 
         except Exception as e:
+            self.breaker.record_failure()
             logger.error(f"Ollama streaming failed: {e}")
             raise
 
+    @asynccontextmanager
+    async def _slot(self) -> AsyncGenerator[None, None]:
+        """Hold one of the generation slots (LLM concurrency limit)"""
+        if self._slots is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        async with self._slots:
+            metrics.observe(
+                "ollama_queue_wait_ms", (time.perf_counter() - start) * 1000
+            )
+            yield
+
+    def _check_circuit(self) -> None:
+        """Reject the call immediately if the circuit is open"""
+        if not self.breaker.allow_request():
+            metrics.increment("ollama_fast_failures")
+            raise CircuitOpenError("Ollama is unavailable (circuit open)")
+
+    async def warmup(self) -> bool:
+        """
+        Load the model into memory with a minimal generation.
+        Uses the context size of the latest generation, since every other
+        num_ctx loads the model anew. Before any traffic that is the
+        largest bucket: retrieved context fills the window up to it.
+        Returns True if the model responded.
+        """
+        num_ctx = self.last_num_ctx or max(settings.llm_num_ctx_buckets)
+        try:
+            await self.generate(
+                prompt="Hi", temperature=0.0, max_tokens=1, num_ctx=num_ctx
+            )
+            logger.info(f"Ollama model {self.model} warmed up")
+            return True
+        except Exception as e:
+            logger.warning(f"Ollama warmup failed: {e}")
+            return False
+
+    async def keep_warm(self, interval: int) -> None:
+        """
+        Ping the model whenever no request was sent for `interval` seconds,
+        so that it is never unloaded while the site is idle.
+        Runs until cancelled.
+        """
+        while True:
+            idle = time.monotonic() - self.last_request_at
+            if idle >= interval:
+                metrics.increment("ollama_keep_warm_pings")
+                await self.warmup()
+                await asyncio.sleep(interval)
+            else:
+                await asyncio.sleep(interval - idle)
+
+    def _record_stats(self, stats: GenerationStats) -> None:
+        """Record timing stats from Ollama's final response frame"""
+        metrics.observe("ollama_load_duration_ms", stats.load_duration_ms)
+        if stats.load_duration_ms > COLD_LOAD_THRESHOLD_MS:
+            metrics.increment("ollama_cold_loads")
+            logger.warning(
+                f"Ollama cold load: model {self.model} took "
+                f"{stats.load_duration_ms:.0f}ms to load"
+            )
+        if stats.prompt_eval_count:
+            metrics.observe("ollama_prompt_eval_ms", stats.prompt_eval_ms)
+            metrics.observe(
+                "ollama_prompt_eval_tokens", stats.prompt_eval_count
+            )
+        if stats.eval_count:
+            metrics.observe("ollama_tokens_per_second", stats.tokens_per_second)
+
 
 # Global instance
 _ollama_service: OllamaService | None = None
@@ -0,0 +1,136 @@
+"""
+Per-process cache of the serialized public profile.
+The profile changes only when an admin edits it, so the JSON body is
+built once and served as bytes with a strong ETag. Sparse section
+selections are cached separately under their own key. Admin writes send a
+Postgres NOTIFY in their transaction; every worker LISTENs and drops its
+copy. A max age bounds staleness if a notification is ever missed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from functools import cache
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.metrics import metrics
+from app.core.notifications import notify
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CHANNEL = "profile_changed"
+
+
+@dataclass(frozen=True)
+class CachedProfile:
+    """Serialized profile with its ETag"""
+
+    body: bytes
+    etag: str
+    built_at: float
+
+
+class ProfileCache:
+    """Serialized profiles shared by all requests of this process"""
+
+    def __init__(
+        self,
+        max_age: float = 300.0,
+        max_size: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_age = max_age
+        self._clock = clock
+        self._profiles = TTLCache(max_size=max_size, ttl=max_age, clock=clock)
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    async def get(
+        self, build: Callable[[], Awaitable[bytes]], key: Hashable = None
+    ) -> CachedProfile:
+        """
+        Get a cached profile, building it once on a miss.
+
+        Args:
+            build: Loads and serializes the profile
+            key: Section selection (None for the complete profile)
+
+        Returns:
+            Serialized profile with ETag
+        """
+        profile = self._fresh(key)
+        if profile is not None:
+            metrics.increment("profile_cache_hits")
+            return profile
+
+        async with self._lock:
+            # Built by a concurrent request while we waited
+            profile = self._fresh(key)
+            if profile is not None:
+                metrics.increment("profile_cache_hits")
+                return profile
+
+            metrics.increment("profile_cache_misses")
+            version = self._version
+            body = await build()
+            profile = CachedProfile(
+                body=body, etag=make_etag(body), built_at=self._clock()
+            )
+            # Don't keep a body that was invalidated while being built
+            if version == self._version:
+                self._profiles.set(key, profile)
+            return profile
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._profiles.clear()
+
+    def _fresh(self, key: Hashable = None) -> CachedProfile | None:
+        return self._profiles.get(key)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def commit_profile_change(db: AsyncSession) -> None:
+    """
+    Commit an admin profile write, drop cached profiles everywhere and
+    publish the new static snapshot
+    """
+    # Delivered to the other workers only if the commit succeeds
+    await notify(db, PROFILE_CHANNEL)
+    await db.commit()
+    get_profile_cache().invalidate()
+
+    # Import here to avoid circular dependency
+    from app.services.profile_snapshot import write_profile_snapshot
+
+    await write_profile_snapshot(db)
+
+
+# Global instance (singleton pattern)
+@cache
+def get_profile_cache() -> ProfileCache:
+    """Get or create global profile cache"""
+    from app.config import settings
+
+    return ProfileCache(
+        max_age=settings.profile_cache_ttl,
+        max_size=settings.profile_cache_size,
+    )
@@ -0,0 +1,243 @@
+"""
+Loading of the complete public profile.
+The profile has seven sections. Loading them one query at a time costs
+eight round-trips (skills come with a selectinload). On Postgres the
+whole document is built by a single statement instead: every section is
+a json_agg subquery with the same ordering as the per-section queries,
+and the JSON text is validated straight into the response schema.
+Sparse requests load only the selected sections and trim the response
+to the selected fields.
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy import Select, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models.profile import (
+    Certification,
+    Education,
+    Language,
+    ProfileBasics,
+    Project,
+    Skill,
+    SkillCategory,
+    WorkExperience,
+)
+from app.schemas.profile import (
+    CertificationResponse,
+    CompleteProfileResponse,
+    EducationResponse,
+    LanguageResponse,
+    ProfileBasicsResponse,
+    ProjectResponse,
+    SkillCategoryResponse,
+    WorkExperienceResponse,
+)
+
+EMPTY_ARRAY = literal_column("'[]'::json")
+
+# Response schema of every section, in response order
+SECTION_SCHEMAS = {
+    "basics": ProfileBasicsResponse,
+    "experience": WorkExperienceResponse,
+    "skills": SkillCategoryResponse,
+    "projects": ProjectResponse,
+    "education": EducationResponse,
+    "languages": LanguageResponse,
+    "certifications": CertificationResponse,
+}
+SECTIONS = tuple(SECTION_SCHEMAS)
+
+SECTION_QUERIES = {
+    # Basics (single row)
+    "basics": select(ProfileBasics),
+    # Experience (ordered)
+    "experience": select(WorkExperience).order_by(WorkExperience.order_index),
+    # Skills with categories (ordered, with relationship)
+    "skills": select(SkillCategory)
+    .options(selectinload(SkillCategory.skills))
+    .order_by(SkillCategory.order_index),
+    # Projects (ordered, featured first)
+    "projects": select(Project).order_by(
+        Project.is_featured.desc(), Project.order_index
+    ),
+    # Education (ordered)
+    "education": select(Education).order_by(Education.order_index),
+    # Languages (ordered)
+    "languages": select(Language).order_by(Language.order_index),
+    # Certifications (ordered)
+    "certifications": select(Certification).order_by(Certification.order_index),
+}
+
+
+@dataclass(frozen=True)
+class ProfileSelection:
+    """Sections and per-section fields of a sparse profile request"""
+
+    sections: tuple[str, ...] = SECTIONS
+    fields: tuple[tuple[str, tuple[str, ...]], ...] = ()
+
+    @classmethod
+    def parse(
+        cls, sections: str | None = None, fields: str | None = None
+    ) -> "ProfileSelection":
+        """
+        Parse `sections=basics,experience` and
+        `fields=projects.name,projects.role` query parameters.
+
+        Raises:
+            ValueError: Unknown or unselected section, unknown field
+        """
+        selected = set(_split(sections)) if sections else set(SECTIONS)
+        if not selected:
+            raise ValueError("No profile section selected")
+        unknown = selected - set(SECTIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown profile section: {', '.join(sorted(unknown))}"
+            )
+
+        section_fields: dict[str, set[str]] = {}
+        for item in _split(fields):
+            section, _, field = item.partition(".")
+            if section not in selected:
+                raise ValueError(f"Section of field {item} is not selected")
+            if field not in SECTION_SCHEMAS[section].model_fields:
+                raise ValueError(f"Unknown profile field: {item}")
+            section_fields.setdefault(section, set()).add(field)
+
+        # Canonical order, so equal selections share a cache entry
+        return cls(
+            sections=tuple(name for name in SECTIONS if name in selected),
+            fields=tuple(
+                (name, tuple(sorted(section_fields[name])))
+                for name in SECTIONS
+                if name in section_fields
+            ),
+        )
+
+    @property
+    def is_complete(self) -> bool:
+        return self.sections == SECTIONS and not self.fields
+
+    def include(self) -> dict | None:
+        """Pydantic include spec of the trimmed response"""
+        if self.is_complete:
+            return None
+        include: dict = dict.fromkeys(self.sections, True)
+        for section, fields in self.fields:
+            if section == "basics":
+                include[section] = set(fields)
+            else:
+                include[section] = {"__all__": set(fields)}
+        return include
+
+
+COMPLETE_PROFILE = ProfileSelection()
+
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+async def load_complete_profile(
+    db: AsyncSession, sections: tuple[str, ...] = SECTIONS
+) -> CompleteProfileResponse:
+    """
+    Load profile sections, in one round-trip where supported.
+    Sections not requested are left empty.
+    """
+    if (
+        settings.profile_single_query
+        and db.get_bind().dialect.name == "postgresql"
+    ):
+        return await load_profile_document(db, sections)
+    return await load_profile_sections(db, sections)
+
+
+async def render_complete_profile(
+    db: AsyncSession, selection: ProfileSelection = COMPLETE_PROFILE
+) -> bytes:
+    """Load the selected profile sections and serialize them to JSON"""
+    profile = await load_complete_profile(db, selection.sections)
+    return profile.model_dump_json(include=selection.include()).encode()
+
+
+async def load_profile_sections(
+    db: AsyncSession, sections: tuple[str, ...] = SECTIONS
+) -> CompleteProfileResponse:
+    """Load profile sections with one query per section"""
+    profile = {}
+    for section in sections:
+        result = await db.execute(SECTION_QUERIES[section])
+        if section == "basics":
+            profile[section] = result.scalar_one_or_none()
+        else:
+            profile[section] = result.scalars().all()
+    return CompleteProfileResponse(**profile)
+
+
+async def load_profile_document(
+    db: AsyncSession, sections: tuple[str, ...] = SECTIONS
+) -> CompleteProfileResponse:
+    """Load profile sections with a single statement (Postgres)"""
+    result = await db.execute(profile_document_query(sections))
+    return CompleteProfileResponse.model_validate_json(result.scalar_one())
+
+
+def profile_document_query(sections: tuple[str, ...] = SECTIONS) -> Select:
+    """Statement returning profile sections as one JSON document"""
+    basics = ProfileBasics.__table__
+    categories = SkillCategory.__table__
+    skills = Skill.__table__
+
+    # Unordered, like the selectinload of SkillCategory.skills
+    category_skills = (
+        select(func.json_agg(skills.table_valued()))
+        .where(skills.c.category_id == categories.c.id)
+        .scalar_subquery()
+    )
+    category = func.json_build_object(
+        "id",
+        categories.c.id,
+        "name",
+        categories.c.name,
+        "order_index",
+        categories.c.order_index,
+        "skills",
+        func.coalesce(category_skills, EMPTY_ARRAY),
+    )
+
+    documents = {
+        "basics": select(func.to_json(basics.table_valued())).scalar_subquery(),
+        "experience": _rows(WorkExperience, WorkExperience.order_index),
+        "skills": _aggregate(category, SkillCategory.order_index),
+        "projects": _rows(
+            Project, Project.is_featured.desc(), Project.order_index
+        ),
+        "education": _rows(Education, Education.order_index),
+        "languages": _rows(Language, Language.order_index),
+        "certifications": _rows(Certification, Certification.order_index),
+    }
+
+    arguments = []
+    for section in sections:
+        arguments += [section, documents[section]]
+    return select(func.json_build_object(*arguments))
+
+
+def _rows(model, *order_by):
+    """JSON array of all rows of a model's table"""
+    return _aggregate(model.__table__.table_valued(), *order_by)
+
+
+def _aggregate(value, *order_by):
+    """JSON array of value over its table, [] if the table is empty"""
+    aggregated = select(
+        func.json_agg(aggregate_order_by(value, *order_by))
+    ).scalar_subquery()
+    return func.coalesce(aggregated, EMPTY_ARRAY)
@@ -0,0 +1,175 @@
+"""
+Static snapshot of the public profile for nginx.
+The serialized profile is written to a directory nginx serves before it
+falls back to the API, so most visits never reach uvicorn. Every version
+is written as `profile.<etag>.json` with precompressed .gz and .br
+variants, each via a temp file and an atomic rename. `profile.json*`
+symlinks are then swapped to the new version, so readers never see a
+partial or mixed file. Old versions are removed.
+Workers serialize render and write on a lock file, so a snapshot
+rendered before a later admin write can't replace a newer one.
+"""
+
+import asyncio
+import fcntl
+import gzip
+import logging
+import os
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import cache
+from pathlib import Path
+from typing import IO
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+from app.services.profile_cache import make_etag
+from app.services.profile_loader import render_complete_profile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "profile.json"
+SUFFIXES = ("", ".gz", ".br")
+
+
+class ProfileSnapshot:
+    """Writes versioned profile snapshots into a directory"""
+
+    def __init__(self, directory: str | Path, keep: int = 3):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    @asynccontextmanager
+    async def lock(self) -> AsyncIterator[None]:
+        """Exclusive lock shared by all processes writing the directory"""
+        file = await asyncio.to_thread(self._acquire_lock)
+        try:
+            yield
+        finally:
+            file.close()  # releases the lock
+
+    def _acquire_lock(self) -> IO:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file = (self.directory / ".lock").open("a")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        except BaseException:
+            file.close()
+            raise
+        return file
+
+    def write(self, body: bytes, version: str) -> Path:
+        """
+        Publish a profile body (blocking, run it in a thread).
+
+        Args:
+            body: Serialized profile
+            version: Content version, used in the file names
+
+        Returns:
+            Path of the versioned plain JSON file
+        """
+        versioned = f"profile.{version}.json"
+
+        variants = {"": body, ".gz": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(body)
+
+        for suffix, data in variants.items():
+            self._replace_file(versioned + suffix, data)
+        # Compressed variants first: nginx looks them up next to
+        # profile.json, which switches to the new version last
+        for suffix in sorted(variants, reverse=True):
+            self._replace_symlink(SNAPSHOT_NAME + suffix, versioned + suffix)
+
+        self._remove_old_versions(versioned)
+        metrics.increment("profile_snapshots_written")
+        return self.directory / versioned
+
+    def clear(self) -> None:
+        """Withdraw the snapshot, nginx falls back to the API"""
+        for suffix in SUFFIXES:
+            (self.directory / (SNAPSHOT_NAME + suffix)).unlink(missing_ok=True)
+
+    def _replace_file(self, name: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            # mkstemp creates 0600, nginx runs as another user
+            Path(tmp).chmod(0o644)
+            Path(tmp).replace(self.directory / name)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _replace_symlink(self, name: str, target: str) -> None:
+        tmp = self.directory / f".tmp-{os.getpid()}-{name}"
+        tmp.unlink(missing_ok=True)
+        # Relative target, valid wherever the directory is mounted
+        tmp.symlink_to(target)
+        tmp.replace(self.directory / name)
+
+    def _remove_old_versions(self, current: str) -> None:
+        """Keep `keep` versions, the current one included"""
+        versions = sorted(
+            (
+                path
+                for path in self.directory.glob("profile.*.json")
+                if path.name != current
+            ),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in versions[max(self.keep - 1, 0) :]:
+            for suffix in SUFFIXES:
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+async def write_profile_snapshot(db: AsyncSession) -> None:
+    """Publish the current profile as a snapshot, if enabled"""
+    snapshot = get_profile_snapshot()
+    if snapshot is None:
+        return
+    try:
+        async with snapshot.lock():
+            # Rendered from the database, not this worker's cache, which
+            # may not have seen another worker's write yet
+            body = await render_complete_profile(db)
+            version = make_etag(body).strip('"')
+            await asyncio.to_thread(snapshot.write, body, version)
+    except Exception as e:
+        logger.error(f"Writing profile snapshot failed: {e}")
+        # Never leave a stale profile behind, serve it from the API
+        try:
+            snapshot.clear()
+        except OSError as error:
+            logger.error(f"Removing profile snapshot failed: {error}")
+
+
+async def export_profile_snapshot() -> None:
+    """Publish the snapshot with a session of its own (startup)"""
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await write_profile_snapshot(db)
+
+
+# Global instance (singleton pattern)
+@cache
+def get_profile_snapshot() -> ProfileSnapshot | None:
+    """Get or create global snapshot writer (None when disabled)"""
+    from app.config import settings
+
+    if not settings.profile_snapshot_dir:
+        return None
+    return ProfileSnapshot(
+        settings.profile_snapshot_dir, keep=settings.profile_snapshot_keep
+    )
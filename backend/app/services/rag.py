@@ -3,25 +3,112 @@ RAG (Retrieval-Augmented Generation) service.
 Combines vector search with LLM generation.
 """
 
+import asyncio
+import json
 import logging
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Hashable
+from contextlib import aclosing
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import partial
 
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitOpenError
 from app.core.context import (
     RetrievedChunk,
+    context_token_budget,
     deduplicate_chunks,
     format_chunks_for_context,
     rank_chunks_by_relevance,
+    select_num_ctx,
 )
-from app.core.prompts import get_system_prompt
+from app.core.conversation import ConversationStore
+from app.core.faq import FaqAnswer, FaqMatcher
+from app.core.metrics import metrics
+from app.core.notifications import notify
+from app.core.prompts import (
+    get_chat_messages,
+    get_chat_user_message,
+    get_system_prompt,
+)
+from app.core.singleflight import SingleFlight
+from app.database import AsyncSessionLocal
+from app.models.knowledge import FaqEntry
 from app.services.embeddings import get_embedding_service
 from app.services.llm import get_ollama_service
-from app.services.text_utils import detect_language
+from app.services.text_utils import detect_language, estimate_llm_tokens
 
 logger = logging.getLogger(__name__)
 
+# Minimum cosine similarity for retrieved chunks
+SIMILARITY_THRESHOLD = 0.5
+
+# Intro of answers built from excerpts while the LLM is unavailable
+DEGRADED_INTROS = {
+    "en": (
+        "I can't generate a full answer right now, but here is "
+        "what I found in Stan's profile:"
+    ),
+    "ru": (
+        "Сейчас я не могу сформулировать полный ответ, но вот что "
+        "я нашёл в профиле Стана:"
+    ),
+    "de": (
+        "Ich kann gerade keine vollständige Antwort formulieren, "
+        "aber das habe ich in Stans Profil gefunden:"
+    ),
+}
+
+# In-flight LLM generations shared across requests in this process
+_generation_flights = SingleFlight("llm_generations")
+
+# Reindexing notifies every worker to drop its cached retrievals
+KNOWLEDGE_CHANNEL = "knowledge_changed"
+
+# Query embeddings and vector search results by normalized query
+_query_embeddings = TTLCache(
+    max_size=settings.retrieval_cache_size, ttl=settings.retrieval_cache_ttl
+)
+_retrievals = TTLCache(
+    max_size=settings.retrieval_cache_size, ttl=settings.retrieval_cache_ttl
+)
+
+# Latest prefetched (partial) query per client
+_speculative_queries = TTLCache(
+    max_size=settings.retrieval_cache_size,
+    ttl=settings.speculative_max_age,
+)
+
+# Recent turns per chat session for multi-turn prompts
+_conversations = ConversationStore(
+    max_sessions=settings.llm_history_max_sessions,
+    max_tokens=settings.llm_history_max_tokens,
+    ttl=settings.llm_history_ttl,
+)
+
+# Precomputed answers to canonical questions (loaded from faq_entries)
+_faq_answers = FaqMatcher(threshold=settings.faq_match_threshold)
+
+
+class DegradedMessage(str):
+    """Answer built from excerpts while the LLM was unavailable"""
+
+
+@dataclass
+class ChatAnswer:
+    """Complete (non-streamed) answer"""
+
+    question: str
+    response: str
+    language: str
+    chunk_ids: list[int]
+    # Excerpts returned while the LLM was unavailable
+    degraded: bool = False
+
 
 class RAGService:
     """Service for RAG pipeline"""
@@ -30,12 +117,50 @@ class RAGService:
         self.db = db
         self.embedding_service = get_embedding_service()
         self.llm_service = get_ollama_service()
+        self.use_chat_api = settings.ollama_use_chat_api
+        self.use_retrieval_cache = bool(settings.retrieval_cache_ttl)
+        self.coalesce_generations = settings.llm_coalesce_generations
+        # History is only resent through the chat API
+        self.conversations = (
+            _conversations
+            if settings.llm_multi_turn and self.use_chat_api
+            else None
+        )
+        self.faq = _faq_answers if settings.faq_enabled else None
+
+    def match_faq(
+        self,
+        question: str,
+        language: str | None = None,
+        query_embedding: list[float] | None = None,
+    ) -> FaqAnswer | None:
+        """
+        Find a precomputed answer for a question.
+
+        Args:
+            question: User question
+            language: Language of the question (detected if not given)
+            query_embedding: Precomputed embedding of the question
+
+        Returns:
+            Matching FAQ answer, or None
+        """
+        if not self.faq:
+            return None
+
+        if language is None:
+            language = detect_language(question)
+        if query_embedding is None:
+            query_embedding = self._query_embedding(question)
+
+        return self.faq.match(query_embedding, language)
 
     async def vector_search(
         self,
         query: str,
         top_k: int = 3,
-        similarity_threshold: float = 0.5,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        query_embedding: list[float] | None = None,
     ) -> list[RetrievedChunk]:
         """
         Perform vector similarity search.
@@ -44,14 +169,22 @@ class RAGService:
             query: Search query
             top_k: Number of results to return
             similarity_threshold: Minimum similarity score
+            query_embedding: Precomputed embedding of the query
 
         Returns:
             List of retrieved chunks
         """
+        normalized = _normalize_query(query)
+        cache_key = (normalized, top_k, similarity_threshold)
+        if self.use_retrieval_cache:
+            cached = _retrievals.get(cache_key)
+            if cached is not None:
+                metrics.increment("retrieval_cache_hits")
+                return cached
+
         # Create query embedding
-        query_embedding = self.embedding_service.create_query_embedding(
-            query
-        )
+        if query_embedding is None:
+            query_embedding = self._query_embedding(query)
 
         # Convert to pgvector format
         embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
@@ -101,14 +234,89 @@ class RAGService:
             f"found {len(chunks)} chunks"
         )
 
+        if self.use_retrieval_cache:
+            _retrievals.set(cache_key, chunks)
+
         return chunks
 
+    def _query_embedding(self, query: str) -> list[float]:
+        """Create query embedding (cached by normalized query)"""
+        normalized = _normalize_query(query)
+        if self.use_retrieval_cache:
+            embedding = _query_embeddings.get(normalized)
+            if embedding is not None:
+                return embedding
+
+        embedding = self.embedding_service.create_query_embedding(query)
+        if self.use_retrieval_cache:
+            _query_embeddings.set(normalized, embedding)
+        return embedding
+
+    async def retrieve(
+        self, query: str, top_k: int = 3, client_key: str | None = None
+    ) -> list[RetrievedChunk]:
+        """
+        Retrieve chunks for a final question.
+        Reuses the client's speculative result if it was prefetched
+        recently for nearly the same text.
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            client_key: Identity of the client (hashed IP)
+
+        Returns:
+            List of retrieved chunks
+        """
+        if client_key is not None and self.use_retrieval_cache:
+            prefetched = _speculative_queries.get(client_key)
+            normalized = _normalize_query(query)
+            if (
+                prefetched is not None
+                and SequenceMatcher(None, prefetched, normalized).ratio()
+                >= settings.speculative_match_ratio
+            ):
+                chunks = _retrievals.get(
+                    (prefetched, top_k, SIMILARITY_THRESHOLD),
+                    max_age=settings.speculative_max_age,
+                )
+                if chunks is not None:
+                    metrics.increment("speculative_retrieval_hits")
+                    return chunks
+
+        chunks = await self.vector_search(query=query, top_k=top_k)
+
+        # Return the connection to the pool before the answer streams;
+        # the session reconnects if it is used again
+        await self.db.close()
+        return chunks
+
+    async def prefetch(
+        self, partial_query: str, client_key: str, top_k: int = 3
+    ) -> int:
+        """
+        Speculatively retrieve chunks for text the user is still typing.
+
+        Args:
+            partial_query: Text typed so far
+            client_key: Identity of the client (hashed IP)
+            top_k: Number of results to retrieve
+
+        Returns:
+            Number of chunks found
+        """
+        chunks = await self.vector_search(query=partial_query, top_k=top_k)
+        _speculative_queries.set(client_key, _normalize_query(partial_query))
+        return len(chunks)
+
     async def generate_response(
         self,
         question: str,
         context: str,
         language: str = "en",
         stream: bool = True,
+        max_tokens: int | None = None,
+        history: list[dict[str, str]] | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Generate response using LLM.
@@ -118,28 +326,71 @@ class RAGService:
             context: Retrieved context
             language: Language for response
             stream: Whether to stream response
+            max_tokens: Answer length cap (defaults to language target)
+            history: Previous turns of the session (chat API only)
 
         Yields:
             Response tokens
         """
-        # Get system prompt
-        prompt = get_system_prompt(language, context, question)
-
         logger.info(f"Generating response for question: {question[:50]}...")
 
-        if stream:
-            async for token in self.llm_service.generate_stream(
-                prompt=prompt, temperature=0.7
-            ):
-                yield token
+        if max_tokens is None:
+            max_tokens = self._answer_tokens(language)
+
+        # Size the context window from the assembled prompt
+        prompt_tokens = self._prompt_tokens(
+            language, context, question, history
+        )
+        options = {
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+            "num_ctx": select_num_ctx(
+                prompt_tokens, max_tokens, settings.llm_num_ctx_buckets
+            ),
+        }
+
+        if self.use_chat_api:
+            # Static system message + per-request user turn (prefix caching)
+            messages = get_chat_messages(language, context, question, history)
+            if not stream:
+                yield await self.llm_service.chat(messages=messages, **options)
+                return
+            key = ("chat", json.dumps(messages))
+            factory = partial(
+                self.llm_service.chat_stream, messages=messages, **options
+            )
         else:
-            response = await self.llm_service.generate(
-                prompt=prompt, temperature=0.7
+            # Get system prompt
+            prompt = get_system_prompt(language, context, question)
+            if not stream:
+                yield await self.llm_service.generate(prompt=prompt, **options)
+                return
+            key = ("generate", prompt)
+            factory = partial(
+                self.llm_service.generate_stream, prompt=prompt, **options
             )
-            yield response
+
+        if self.coalesce_generations:
+            # Identical concurrent requests share one Ollama generation
+            key = (*key, self.llm_service.model, *sorted(options.items()))
+            tokens = _generation_flights.stream(key, factory)
+        else:
+            tokens = factory()
+
+        # Close the upstream stream if our consumer goes away
+        async with aclosing(tokens) as generation:
+            async for token in generation:
+                yield token
 
     async def chat(
-        self, question: str, top_k: int = 3, stream: bool = True
+        self,
+        question: str,
+        top_k: int = 3,
+        stream: bool = True,
+        session_id: Hashable | None = None,
+        client_key: str | None = None,
+        chunks: list[RetrievedChunk] | None = None,
+        query_embedding: list[float] | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Complete RAG pipeline: retrieve + generate.
@@ -148,6 +399,10 @@ class RAGService:
             question: User question
             top_k: Number of chunks to retrieve
             stream: Whether to stream response
+            session_id: Chat session, enables multi-turn history
+            client_key: Client identity for speculative retrieval
+            chunks: Already retrieved chunks (skips vector search)
+            query_embedding: Precomputed embedding of the question
 
         Yields:
             Response tokens
@@ -156,8 +411,18 @@ class RAGService:
         language = detect_language(question)
         logger.info(f"Detected language: {language}")
 
+        # Common questions are answered from memory
+        faq = self.match_faq(question, language, query_embedding)
+        if faq is not None:
+            metrics.increment("faq_hits")
+            yield faq.answer
+            return
+
         # Vector search
-        chunks = await self.vector_search(query=question, top_k=top_k)
+        if chunks is None:
+            chunks = await self.retrieve(
+                query=question, top_k=top_k, client_key=client_key
+            )
 
         if not chunks:
             # No relevant information found
@@ -169,14 +434,203 @@ class RAGService:
         chunks = deduplicate_chunks(chunks)
         chunks = rank_chunks_by_relevance(chunks, question)
 
-        # Format context
-        context = format_chunks_for_context(chunks)
+        # Fail fast with retrieved excerpts while Ollama is unhealthy
+        if not await self.llm_service.is_available():
+            metrics.increment("llm_degraded_answers")
+            yield self._get_degraded_message(language, chunks)
+            return
+
+        # Previous turns are sent unchanged so Ollama can reuse them
+        history = []
+        if self.conversations is not None and session_id is not None:
+            history = self.conversations.get(session_id, language)
+            if history:
+                metrics.increment("llm_history_reused")
+
+        # Format context within what is left of the context window
+        # after instructions, history, question and the answer
+        max_tokens = self._answer_tokens(language)
+        budget = context_token_budget(
+            self._prompt_tokens(language, "", question, history),
+            max_tokens,
+            settings.llm_num_ctx_buckets,
+        )
+        context = format_chunks_for_context(chunks, max_tokens=budget)
 
         # Generate response
-        async for token in self.generate_response(
-            question=question, context=context, language=language, stream=stream
-        ):
-            yield token
+        answer: list[str] = []
+        try:
+            async with aclosing(
+                self.generate_response(
+                    question=question,
+                    context=context,
+                    language=language,
+                    stream=stream,
+                    max_tokens=max_tokens,
+                    history=history,
+                )
+            ) as tokens:
+                async for token in tokens:
+                    answer.append(token)
+                    yield token
+        except CircuitOpenError:
+            # Circuit opened by a concurrent request before we started
+            if answer:
+                raise
+            metrics.increment("llm_degraded_answers")
+            yield self._get_degraded_message(language, chunks)
+            return
+
+        # Remember the completed turn exactly as Ollama saw it
+        if self.conversations is not None and session_id is not None:
+            self.conversations.append(
+                session_id,
+                language,
+                user=get_chat_user_message(language, context, question),
+                assistant="".join(answer),
+            )
+
+    async def answer(
+        self,
+        question: str,
+        top_k: int = 3,
+        session_id: Hashable | None = None,
+        client_key: str | None = None,
+        chunks: list[RetrievedChunk] | None = None,
+        query_embedding: list[float] | None = None,
+    ) -> ChatAnswer:
+        """
+        Answer a question without streaming.
+
+        Args:
+            question: User question
+            top_k: Number of chunks to retrieve
+            session_id: Chat session, enables multi-turn history
+            client_key: Client identity for speculative retrieval
+            chunks: Already retrieved chunks (skips vector search)
+            query_embedding: Precomputed embedding of the question
+
+        Returns:
+            Complete answer with the chunks it was based on
+        """
+        faq = self.match_faq(question, query_embedding=query_embedding)
+        if faq is not None:
+            metrics.increment("faq_hits")
+            return ChatAnswer(
+                question=question,
+                response=faq.answer,
+                language=faq.language,
+                chunk_ids=faq.chunk_ids,
+            )
+
+        if chunks is None:
+            chunks = await self.retrieve(
+                query=question, top_k=top_k, client_key=client_key
+            )
+
+        parts = [
+            part
+            async for part in self.chat(
+                question,
+                top_k=top_k,
+                stream=False,
+                session_id=session_id,
+                chunks=chunks,
+                query_embedding=query_embedding,
+            )
+        ]
+        response = "".join(parts)
+        return ChatAnswer(
+            question=question,
+            response=response,
+            language=detect_language(question),
+            chunk_ids=[chunk.id for chunk in chunks],
+            degraded=any(isinstance(part, DegradedMessage) for part in parts),
+        )
+
+    async def answer_batch(
+        self, questions: list[str], top_k: int = 3
+    ) -> list[ChatAnswer]:
+        """
+        Answer many questions.
+        Embeds all questions in one encode call, runs the vector searches
+        concurrently (on a few pooled connections) and lets generations
+        queue for LLM slots.
+
+        Args:
+            questions: User questions
+            top_k: Number of chunks to retrieve per question
+
+        Returns:
+            Answers in the order of questions
+        """
+        embeddings = self.embedding_service.create_query_embeddings(questions)
+        # Leave pooled connections for the chat endpoints
+        connections = asyncio.Semaphore(settings.chat_batch_db_concurrency)
+
+        async def search(question: str, embedding: list[float]):
+            # Answered from the FAQ, nothing to search for
+            if self.match_faq(question, query_embedding=embedding):
+                return []
+            # Concurrent queries need their own sessions
+            async with connections, AsyncSessionLocal() as db:
+                return await RAGService(db).vector_search(
+                    query=question, top_k=top_k, query_embedding=embedding
+                )
+
+        chunk_lists = await asyncio.gather(
+            *(
+                search(question, embedding)
+                for question, embedding in zip(
+                    questions, embeddings, strict=True
+                )
+            )
+        )
+
+        return await asyncio.gather(
+            *(
+                self.answer(
+                    question,
+                    top_k=top_k,
+                    chunks=chunks,
+                    query_embedding=embedding,
+                )
+                for question, chunks, embedding in zip(
+                    questions, chunk_lists, embeddings, strict=True
+                )
+            )
+        )
+
+    def _answer_tokens(self, language: str) -> int:
+        """Get answer length cap (num_predict) for language"""
+        return settings.llm_answer_tokens.get(
+            language, settings.llm_answer_tokens_default
+        )
+
+    def _prompt_tokens(
+        self,
+        language: str,
+        context: str,
+        question: str,
+        history: list[dict[str, str]] | None = None,
+    ) -> int:
+        """Estimate LLM tokens of the prompt sent to Ollama"""
+        if self.use_chat_api:
+            messages = get_chat_messages(language, context, question, history)
+            return sum(estimate_llm_tokens(m["content"]) for m in messages)
+        return estimate_llm_tokens(
+            get_system_prompt(language, context, question)
+        )
+
+    def _get_degraded_message(
+        self, language: str, chunks: list[RetrievedChunk]
+    ) -> DegradedMessage:
+        """Get answer built from retrieved chunks when LLM is unavailable"""
+        intro = DEGRADED_INTROS.get(language, DEGRADED_INTROS["en"])
+        excerpts = "\n\n".join(
+            f"- {_excerpt(chunk.text)}" for chunk in chunks
+        )
+        return DegradedMessage(f"{intro}\n\n{excerpts}")
 
     def _get_no_info_message(self, language: str) -> str:
         """Get 'no information found' message in user's language"""
@@ -202,6 +656,73 @@ class RAGService:
         return messages.get(language, messages["en"])
 
 
+def clear_retrieval_cache() -> None:
+    """Forget cached retrievals (knowledge base changed)"""
+    _retrievals.clear()
+    _speculative_queries.clear()
+
+
+async def commit_knowledge_change(db: AsyncSession) -> None:
+    """Commit a reindex and drop cached retrievals in every worker"""
+    await notify(db, KNOWLEDGE_CHANNEL)
+    await db.commit()
+    clear_retrieval_cache()
+
+
+async def load_faq_answers(db: AsyncSession) -> int:
+    """
+    Load generated FAQ answers into memory.
+
+    Returns:
+        Number of answers loaded
+    """
+    result = await db.execute(
+        select(FaqEntry).where(
+            FaqEntry.answer.is_not(None), FaqEntry.embedding.is_not(None)
+        )
+    )
+    entries = [
+        (
+            FaqAnswer(
+                id=entry.id,
+                language=entry.language,
+                question=entry.question,
+                answer=entry.answer,
+                chunk_ids=entry.chunk_ids or [],
+            ),
+            list(entry.embedding),
+        )
+        for entry in result.scalars().all()
+    ]
+    _faq_answers.load(entries)
+    logger.info(f"Loaded {len(entries)} FAQ answers")
+    return len(entries)
+
+
+async def refresh_faq_answers(interval: int) -> None:
+    """Reload FAQ answers every interval seconds until cancelled"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await load_faq_answers(db)
+        except Exception as e:
+            logger.warning(f"Loading FAQ answers failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize query text for cache lookups"""
+    return " ".join(query.lower().split()).strip(" ?!.,")
+
+
+def _excerpt(text: str, limit: int = 300) -> str:
+    """Shorten text to limit characters at a word boundary"""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "..."
+
+
 # Global instance
 _rag_service: RAGService | None = None
 
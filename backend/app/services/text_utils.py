@@ -1,4 +1,5 @@
 import logging
+import math
 import re
 
 from langdetect import LangDetectException, detect
@@ -33,6 +34,18 @@ def estimate_tokens(text: str) -> int:
     return len(words)
 
 
+def estimate_llm_tokens(text: str) -> int:
+    """
+    Estimate number of LLM (subword) tokens in text.
+    Conservative approximation for Mistral-style tokenizers:
+    ~3.5 characters per token for ASCII text, ~2 for other scripts
+    (Cyrillic, umlauts), so prompts are not underestimated.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / 3.5 + other_chars / 2)
+
+
 def chunk_text(
     text: str,
     max_tokens: int = 800,
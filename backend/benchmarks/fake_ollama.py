@@ -0,0 +1,269 @@
+"""
+Fake Ollama server for load testing and CI benchmarks.
+
+Speaks the NDJSON protocol of /api/generate, /api/chat and /api/tags with
+configurable time-to-first-token, tokens/sec, jitter, concurrency limit
+and failure injection, so the full HTTP and streaming stack can be
+exercised without a real model.
+
+Usage (from backend/):
+    python -m benchmarks.fake_ollama --port 11435 --ttft 0.3 --tps 25
+    OLLAMA_HOST=http://localhost:11435 python -m benchmarks.llm_load
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+DEFAULT_ANSWER = (
+    "Stan is a Backend Developer with over eight years of experience "
+    "building scalable services in Python and Go. He designed event-driven "
+    "microservices with FastAPI, PostgreSQL and RabbitMQ, and led the "
+    "migration of a monolith to Kubernetes. He also built FrantAI, a "
+    "retrieval-augmented chat assistant running on a local Mistral model."
+)
+
+NS_PER_S = 1_000_000_000
+
+
+@dataclass
+class FakeOllamaConfig:
+    """Behaviour of the fake server"""
+
+    model: str = "mistral:7b-instruct-q4_0"
+    answer: str = DEFAULT_ANSWER
+    ttft: float = 0.3  # seconds before the first token
+    tokens_per_second: float = 25.0
+    jitter: float = 0.2  # relative random variation of delays
+    concurrency: int = 1  # generations running at once (OLLAMA_NUM_PARALLEL)
+    max_queue: int = 512  # waiting requests before 503 (OLLAMA_MAX_QUEUE)
+    failure_rate: float = 0.0  # share of requests answered with HTTP 500
+    midstream_failure_rate: float = 0.0  # share of streams cut off midway
+    seed: int | None = None
+
+
+class FakeOllama:
+    """State of a fake Ollama instance (queue, counters, randomness)"""
+
+    def __init__(self, config: FakeOllamaConfig):
+        self.config = config
+        self.random = random.Random(config.seed)  # noqa: S311
+        self.semaphore = asyncio.Semaphore(config.concurrency)
+        self.waiting = 0
+        self.requests = 0
+        self.failures = 0
+        self.tokens = self._tokenize(config.answer)
+
+    @staticmethod
+    def _tokenize(text: str) -> list[str]:
+        words = text.split(" ")
+        return [words[0]] + [f" {word}" for word in words[1:]]
+
+    def _delay(self, seconds: float) -> float:
+        spread = seconds * self.config.jitter
+        return max(seconds + self.random.uniform(-spread, spread), 0.0)
+
+    def _should_fail(self, rate: float) -> bool:
+        return rate > 0 and self.random.random() < rate
+
+    def _final_stats(
+        self, prompt_chars: int, eval_count: int, started: float
+    ) -> dict:
+        prompt_eval_count = math.ceil(prompt_chars / 4)
+        total = time.perf_counter() - started
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int(total * NS_PER_S),
+            "load_duration": 1_000_000,
+            "prompt_eval_count": prompt_eval_count,
+            "prompt_eval_duration": int(self.config.ttft * NS_PER_S),
+            "eval_count": eval_count,
+            "eval_duration": int(
+                eval_count / self.config.tokens_per_second * NS_PER_S
+            ),
+        }
+
+    def _frame(self, chat: bool, text: str) -> dict:
+        frame = {
+            "model": self.config.model,
+            "created_at": datetime.now(UTC).isoformat(),
+        }
+        if chat:
+            frame["message"] = {"role": "assistant", "content": text}
+        else:
+            frame["response"] = text
+        return frame
+
+    async def generate(
+        self, body: dict, chat: bool
+    ) -> AsyncGenerator[dict, None]:
+        """Yield frames of one generation (tokens, then the final frame)"""
+        started = time.perf_counter()
+        options = body.get("options") or {}
+        limit = options.get("num_predict") or len(self.tokens)
+        tokens = self.tokens[: max(limit, 1)]
+
+        if chat:
+            prompt_chars = sum(
+                len(m.get("content", "")) for m in body.get("messages", [])
+            )
+        else:
+            prompt_chars = len(body.get("prompt", ""))
+
+        await asyncio.sleep(self._delay(self.config.ttft))
+
+        token_delay = 1 / self.config.tokens_per_second
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(self._delay(token_delay))
+            yield self._frame(chat, token)
+
+        final = self._frame(chat, "")
+        final.update(self._final_stats(prompt_chars, len(tokens), started))
+        if not chat:
+            final["context"] = list(range(prompt_chars // 4 + len(tokens)))
+        yield final
+
+    async def handle(self, request: Request, chat: bool) -> Response:
+        body = await request.json()
+        self.requests += 1
+
+        if self.waiting >= self.config.max_queue:
+            return JSONResponse({"error": "server busy"}, status_code=503)
+
+        if self._should_fail(self.config.failure_rate):
+            self.failures += 1
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+
+        if not body.get("stream", True):
+            async with self._slot():
+                frames = [frame async for frame in self.generate(body, chat)]
+            final = frames[-1]
+            text = "".join(
+                f["message"]["content"] if chat else f["response"]
+                for f in frames
+            )
+            if chat:
+                final["message"]["content"] = text
+            else:
+                final["response"] = text
+            return JSONResponse(final)
+
+        return StreamingResponse(
+            self._stream(body, chat), media_type="application/x-ndjson"
+        )
+
+    async def _stream(
+        self, body: dict, chat: bool
+    ) -> AsyncGenerator[bytes, None]:
+        cut_off = self._should_fail(self.config.midstream_failure_rate)
+        async with self._slot():
+            count = 0
+            async for frame in self.generate(body, chat):
+                if cut_off and count == len(self.tokens) // 2:
+                    self.failures += 1
+                    yield b'{"error":"injected mid-stream failure"}\n'
+                    return
+                count += 1
+                yield json.dumps(frame).encode() + b"\n"
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncGenerator[None, None]:
+        """Concurrency limit; excess requests wait like in Ollama's queue"""
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+    async def tags(self, request: Request) -> Response:
+        return JSONResponse(
+            {
+                "models": [
+                    {
+                        "name": self.config.model,
+                        "model": self.config.model,
+                        "size": 4109865159,
+                    }
+                ]
+            }
+        )
+
+
+def create_app(config: FakeOllamaConfig | None = None) -> Starlette:
+    """Create ASGI app of the fake server"""
+    server = FakeOllama(config or FakeOllamaConfig())
+
+    async def generate(request: Request) -> Response:
+        return await server.handle(request, chat=False)
+
+    async def chat(request: Request) -> Response:
+        return await server.handle(request, chat=True)
+
+    app = Starlette(
+        routes=[
+            Route("/api/generate", generate, methods=["POST"]),
+            Route("/api/chat", chat, methods=["POST"]),
+            Route("/api/tags", server.tags, methods=["GET"]),
+        ]
+    )
+    app.state.server = server
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default=FakeOllamaConfig.model)
+    parser.add_argument("--ttft", type=float, default=FakeOllamaConfig.ttft)
+    parser.add_argument(
+        "--tps", type=float, default=FakeOllamaConfig.tokens_per_second
+    )
+    parser.add_argument("--jitter", type=float, default=FakeOllamaConfig.jitter)
+    parser.add_argument(
+        "--concurrency", type=int, default=FakeOllamaConfig.concurrency
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=FakeOllamaConfig.max_queue
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--midstream-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        model=args.model,
+        ttft=args.ttft,
+        tokens_per_second=args.tps,
+        jitter=args.jitter,
+        concurrency=args.concurrency,
+        max_queue=args.max_queue,
+        failure_rate=args.failure_rate,
+        midstream_failure_rate=args.midstream_failure_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Load test of the Ollama client against OLLAMA_HOST.
+
+Runs concurrent streaming generations and reports time-to-first-token,
+total latency and throughput. Point OLLAMA_HOST at the fake server
+(benchmarks.fake_ollama) to measure the HTTP and streaming stack offline.
+
+Usage (from backend/):
+    python -m benchmarks.fake_ollama --port 11435 --concurrency 4 &
+    OLLAMA_HOST=http://localhost:11435 python -m benchmarks.llm_load \\
+        --requests 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+
+from app.services.llm import OllamaService
+
+PROMPT = "Tell me about Stan's experience with Python and FastAPI."
+
+
+@dataclass
+class Sample:
+    ttft: float | None = None
+    total: float = 0.0
+    tokens: int = 0
+    error: str | None = None
+
+
+async def one_request(service: OllamaService, max_tokens: int) -> Sample:
+    sample = Sample()
+    start = time.perf_counter()
+    try:
+        async for _ in service.generate_stream(
+            prompt=PROMPT, max_tokens=max_tokens
+        ):
+            if sample.ttft is None:
+                sample.ttft = time.perf_counter() - start
+            sample.tokens += 1
+    except Exception as e:
+        sample.error = type(e).__name__
+    sample.total = time.perf_counter() - start
+    return sample
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def report(name: str, values: list[float]) -> None:
+    if not values:
+        return
+    print(  # noqa: T201
+        f"{name:>6}: p50 {percentile(values, 0.5) * 1000:8.1f}ms  "
+        f"p95 {percentile(values, 0.95) * 1000:8.1f}ms  "
+        f"mean {statistics.mean(values) * 1000:8.1f}ms"
+    )
+
+
+async def main(requests: int, concurrency: int, max_tokens: int) -> None:
+    service = OllamaService()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited() -> Sample:
+        async with limit:
+            return await one_request(service, max_tokens)
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*(limited() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    ok = [s for s in samples if s.error is None]
+    errors = [s.error for s in samples if s.error is not None]
+    tokens = sum(s.tokens for s in samples)
+
+    print(  # noqa: T201
+        f"{service.host}: {requests} requests, concurrency {concurrency}, "
+        f"{elapsed:.2f}s, {len(errors)} errors"
+    )
+    report("ttft", [s.ttft for s in ok if s.ttft is not None])
+    report("total", [s.total for s in ok])
+    print(  # noqa: T201
+        f"throughput: {len(ok) / elapsed:.1f} req/s, "
+        f"{tokens / elapsed:.0f} tokens/s"
+    )
+    for error in sorted(set(errors)):
+        print(f"  {error}: {errors.count(error)}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.max_tokens))
@@ -0,0 +1,102 @@
+"""
+Benchmark Ollama stream decoding on a recorded stream fixture.
+
+Compares the previous decoder (aiter_lines + stdlib json per line) with
+iter_ndjson on raw bytes, using both orjson and stdlib json. Streams go
+through httpx with a mock transport, so the full client path is measured
+without a running Ollama.
+
+Usage (from backend/):
+    python -m benchmarks.ndjson_decode --streams 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
+
+from app.services import llm
+from app.services.llm import iter_ndjson
+
+FIXTURE = (
+    Path(__file__).resolve().parent.parent
+    / "tests"
+    / "fixtures"
+    / "ollama_generate_stream.ndjson"
+)
+
+# Typical size of the TCP reads httpx gets from Ollama
+CHUNK_SIZE = 256
+
+
+def make_transport(data: bytes) -> httpx.MockTransport:
+    async def body():
+        for i in range(0, len(data), CHUNK_SIZE):
+            yield data[i : i + CHUNK_SIZE]
+
+    return httpx.MockTransport(
+        lambda _request: httpx.Response(200, content=body())
+    )
+
+
+async def decode_lines(response: httpx.Response) -> int:
+    """Previous implementation: str lines + stdlib json"""
+    tokens = 0
+    async for line in response.aiter_lines():
+        if line.strip():
+            data = json.loads(line)
+            if data.get("response"):
+                tokens += 1
+    return tokens
+
+
+async def decode_bytes(response: httpx.Response) -> int:
+    """Current implementation: byte framing + fast JSON"""
+    tokens = 0
+    async for data in iter_ndjson(response.aiter_bytes()):
+        if data.get("response"):
+            tokens += 1
+    return tokens
+
+
+async def run(decoder, data: bytes, streams: int) -> float:
+    async with httpx.AsyncClient(transport=make_transport(data)) as client:
+        start = time.perf_counter()
+        for _ in range(streams):
+            async with client.stream("POST", "http://ollama/api/generate") as r:
+                await decoder(r)
+        return time.perf_counter() - start
+
+
+async def main(streams: int) -> None:
+    data = FIXTURE.read_bytes()
+    frames = len(data.strip().split(b"\n"))
+
+    results = {"aiter_lines + json": await run(decode_lines, data, streams)}
+
+    fast_loads = llm.json_loads
+    results[f"iter_ndjson + {fast_loads.__module__}"] = await run(
+        decode_bytes, data, streams
+    )
+    llm.json_loads = lambda line: json.loads(line.decode())
+    try:
+        results["iter_ndjson + json"] = await run(decode_bytes, data, streams)
+    finally:
+        llm.json_loads = fast_loads
+
+    total_frames = frames * streams
+    for name, elapsed in results.items():
+        print(  # noqa: T201
+            f"{name:>24}: {elapsed * 1000:8.1f}ms, "
+            f"{total_frames / elapsed:10.0f} frames/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.streams))
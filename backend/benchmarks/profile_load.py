@@ -0,0 +1,82 @@
+"""
+Benchmark complete profile loading against DATABASE_URL.
+
+Compares the per-section loader (eight round-trips) with the single
+json_agg statement under concurrency, each request on its own session
+as in the API. Both loaders must return the same profile before timing
+starts. The profile cache is bypassed, so every request is a cold load.
+
+Usage (from backend/):
+    python -m benchmarks.profile_load --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.services.profile_loader import (
+    load_profile_document,
+    load_profile_sections,
+)
+from benchmarks.llm_load import report
+
+LOADERS = {
+    "sections": load_profile_sections,
+    "single query": load_profile_document,
+}
+
+
+async def run(sessions, loader, requests: int, concurrency: int):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one() -> float:
+        async with limit:
+            start = time.perf_counter()
+            async with sessions() as db:
+                await loader(db)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(requests: int, concurrency: int, pool_size: int) -> None:
+    engine = create_async_engine(
+        settings.database_url, pool_size=pool_size, max_overflow=0
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        profiles = []
+        for loader in LOADERS.values():
+            async with sessions() as db:
+                profiles.append((await loader(db)).model_dump_json())
+        if profiles[0] != profiles[1]:
+            raise SystemExit("Loaders returned different profiles")
+
+        for name, loader in LOADERS.items():
+            # Warm up connections and statement caches
+            await run(sessions, loader, pool_size, pool_size)
+            latencies, elapsed = await run(
+                sessions, loader, requests, concurrency
+            )
+            print(  # noqa: T201
+                f"{name}: {requests} requests, concurrency {concurrency}, "
+                f"{requests / elapsed:.0f} req/s"
+            )
+            report("load", latencies)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.pool_size))
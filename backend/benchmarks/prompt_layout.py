@@ -0,0 +1,80 @@
+"""
+Benchmark prompt-eval time: single /api/generate prompt vs /api/chat layout.
+
+With /api/generate the retrieved context sits in the middle of the
+template, so only the part before it can be reused from Ollama's KV cache.
+With /api/chat the whole system message is static and cached.
+
+Usage (from backend/, with Ollama running at OLLAMA_HOST):
+    python -m benchmarks.prompt_layout --requests 10
+"""
+
+import argparse
+import asyncio
+
+from app.core.metrics import metrics
+from app.core.prompts import get_chat_messages, get_system_prompt
+from app.services.llm import OllamaService
+
+SAMPLE_CONTEXTS = [
+    "[Source 1]\nStan worked as Senior Backend Developer at Acme, "
+    "building Python and Go microservices.\n",
+    "[Source 1]\nSkills: Python, FastAPI, PostgreSQL, Docker, Kubernetes, "
+    "Go, Redis, RabbitMQ.\n",
+    "[Source 1]\nProject FrantAI: RAG-based digital twin chat with "
+    "pgvector and Ollama.\n",
+]
+
+SAMPLE_QUESTIONS = [
+    "What is Stan's experience?",
+    "Which technologies does Stan use?",
+    "Tell me about Stan's projects",
+]
+
+
+async def run_layout(
+    service: OllamaService, layout: str, requests: int
+) -> dict:
+    """Send requests with the given layout and return prompt-eval stats"""
+    metrics.reset()
+
+    for i in range(requests):
+        context = SAMPLE_CONTEXTS[i % len(SAMPLE_CONTEXTS)]
+        question = SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)]
+
+        if layout == "generate":
+            await service.generate(
+                prompt=get_system_prompt("en", context, question),
+                temperature=0.0,
+                max_tokens=1,
+            )
+        else:
+            await service.chat(
+                messages=get_chat_messages("en", context, question),
+                temperature=0.0,
+                max_tokens=1,
+            )
+
+    return metrics.snapshot()["observations"]
+
+
+async def main(requests: int) -> None:
+    service = OllamaService()
+    await service.warmup()
+
+    for layout in ("generate", "chat"):
+        stats = await run_layout(service, layout, requests)
+        eval_ms = stats.get("ollama_prompt_eval_ms", {})
+        eval_tokens = stats.get("ollama_prompt_eval_tokens", {})
+        print(  # noqa: T201
+            f"{layout:>8}: prompt_eval avg={eval_ms.get('avg', 0)}ms "
+            f"max={eval_ms.get('max', 0)}ms, "
+            f"evaluated tokens avg={eval_tokens.get('avg', 0)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
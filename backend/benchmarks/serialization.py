@@ -0,0 +1,153 @@
+"""
+Micro-benchmark of profile and SSE serialization.
+
+Profile: FastAPI's default path (jsonable_encoder + stdlib json) versus
+model_dump + the fast encoder versus model_dump_json, on a synthetic
+profile of realistic size. SSE: stdlib json.dumps per token frame versus
+sse_frame with orjson and with the stdlib fallback.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --iterations 2000
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.core.serialization import json_dumps, sse_frame
+from app.schemas.profile import CompleteProfileResponse
+
+FRAME_TEXT = "Stan has worked with Python and FastAPI "
+
+
+def make_profile() -> CompleteProfileResponse:
+    text = "Designed and shipped backend services. " * 8
+    return CompleteProfileResponse.model_validate(
+        {
+            "basics": {
+                "id": 1,
+                "full_name": "Stan Frant",
+                "job_title": "Software Engineer",
+                "email": "stan@example.com",
+                "summary": text,
+                "bio": text * 2,
+            },
+            "experience": [
+                {
+                    "id": i,
+                    "company_name": f"Company {i}",
+                    "position": "Senior Engineer",
+                    "start_date": date(2015 + i, 1, 1),
+                    "description": text,
+                    "achievements": [text[:120]] * 6,
+                    "technologies": ["Python", "FastAPI", "PostgreSQL"],
+                    "order_index": i,
+                }
+                for i in range(8)
+            ],
+            "skills": [
+                {
+                    "id": c,
+                    "name": f"Category {c}",
+                    "skills": [
+                        {
+                            "id": c * 10 + s,
+                            "category_id": c,
+                            "name": f"Skill {s}",
+                            "proficiency_level": "advanced",
+                            "years_of_experience": 5.5,
+                        }
+                        for s in range(8)
+                    ],
+                }
+                for c in range(5)
+            ],
+            "projects": [
+                {
+                    "id": i,
+                    "name": f"Project {i}",
+                    "short_description": text[:160],
+                    "full_description": text * 3,
+                    "technologies": ["Python", "React"],
+                    "highlights": [text[:100]] * 4,
+                }
+                for i in range(10)
+            ],
+            "education": [
+                {"id": i, "institution": f"University {i}"} for i in range(2)
+            ],
+            "languages": [
+                {"id": i, "name": f"Language {i}", "proficiency": "fluent"}
+                for i in range(3)
+            ],
+            "certifications": [
+                {"id": i, "name": f"Certificate {i}"} for i in range(5)
+            ],
+        }
+    )
+
+
+def measure(name: str, fn, iterations: int, unit: str) -> None:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(  # noqa: T201
+        f"{name:>34}: {iterations / elapsed:10.0f} {unit}/s, "
+        f"{elapsed / iterations * 1e6:8.1f}us each"
+    )
+
+
+def main(iterations: int) -> None:
+    profile = make_profile()
+    size = len(profile.model_dump_json())
+    print(f"profile: {size} bytes")  # noqa: T201
+
+    stdlib_response = JSONResponse(None)
+    measure(
+        "jsonable_encoder + json",
+        lambda: stdlib_response.render(jsonable_encoder(profile)),
+        iterations,
+        "profiles",
+    )
+    measure(
+        f"model_dump + {settings.json_encoder}",
+        lambda: json_dumps(profile.model_dump(mode="json")),
+        iterations,
+        "profiles",
+    )
+    measure(
+        "model_dump_json",
+        lambda: profile.model_dump_json().encode(),
+        iterations,
+        "profiles",
+    )
+
+    frames = iterations * 100
+    payload = {"token": FRAME_TEXT}
+    measure(
+        "f-string + json.dumps",
+        lambda: f"data: {json.dumps(payload)}\n\n",
+        frames,
+        "frames",
+    )
+    encoder = settings.json_encoder
+    for name in ("orjson", "json"):
+        settings.json_encoder = name
+        measure(
+            f"sse_frame ({name})", lambda: sse_frame(payload), frames, "frames"
+        )
+    settings.json_encoder = encoder
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -1,4 +1,5 @@
 import asyncio
+import os
 from collections.abc import AsyncGenerator
 
 import pytest
@@ -10,9 +11,15 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
+# Rate limit counters and session leases in memory, no Postgres needed
+os.environ.setdefault("RATE_LIMIT_STORAGE", "memory")
+os.environ.setdefault("CHAT_SESSION_LOCK_STORAGE", "memory")
+
 from app.api.deps import get_db
 from app.database import Base
 from app.main import app
+from app.services.chat_writer import get_chat_writer
+from app.services.profile_cache import get_profile_cache
 
 # Test database
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -55,9 +62,19 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
 
     app.dependency_overrides[get_db] = override_get_db
 
+    # Background chat writes go to the test database (flushed explicitly)
+    chat_writer = get_chat_writer()
+    session_factory = chat_writer.session_factory
+    chat_writer.session_factory = TestSessionLocal
+
+    # Each test builds the profile from its own data
+    get_profile_cache().invalidate()
+
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
         yield ac
 
+    await chat_writer.flush()
+    chat_writer.session_factory = session_factory
     app.dependency_overrides.clear()
@@ -1,10 +1,13 @@
+import asyncio
+
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from uuid import uuid4
 
 from httpx import AsyncClient
 
 from app.models.chat import ChatSession
+from app.services.chat_writer import get_chat_writer
 
 
 @pytest.mark.asyncio
@@ -68,6 +71,7 @@ async def test_chat_message_with_session(client: AsyncClient, db_session):
     with patch("app.api.v1.chat.get_rag_service") as mock_rag:
         mock_service = AsyncMock()
         mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
         mock_rag.return_value = mock_service
 
         # Send message (SSE response)
@@ -93,6 +97,7 @@ async def test_chat_message_new_session(client: AsyncClient):
     with patch("app.api.v1.chat.get_rag_service") as mock_rag:
         mock_service = AsyncMock()
         mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
         mock_rag.return_value = mock_service
 
         response = await client.post(
@@ -114,6 +119,7 @@ async def test_chat_rate_limit(client: AsyncClient):
     with patch("app.api.v1.chat.get_rag_service") as mock_rag:
         mock_service = AsyncMock()
         mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
         mock_rag.return_value = mock_service
 
         # Send multiple requests
@@ -138,6 +144,7 @@ async def test_session_persistence(client: AsyncClient, db_session):
     with patch("app.api.v1.chat.get_rag_service") as mock_rag:
         mock_service = AsyncMock()
         mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
         mock_rag.return_value = mock_service
 
         await client.post(
@@ -145,9 +152,407 @@ async def test_session_persistence(client: AsyncClient, db_session):
             json={"message": "Test", "session_id": session_id},
         )
 
-    # Get session - message count should be updated
+    # Get session - message count should be updated once rows are written
+    await get_chat_writer().flush()
+    db_session.expire_all()
     get_response = await client.get(f"/api/v1/chat/session/{session_id}")
 
     assert get_response.status_code == 200
     data = get_response.json()
     assert data["message_count"] == 2  # user + assistant
+
+
+@pytest.mark.asyncio
+async def test_chat_message_client_disconnect(client: AsyncClient, db_session):
+    """Test generation stops and partial answer is saved on disconnect"""
+    from sqlalchemy import select
+
+    from app.models.chat import ChatMessage
+
+    session = ChatSession(ip_hash="test_hash")
+    db_session.add(session)
+    await db_session.commit()
+
+    closed = []
+
+    async def mock_chat(*args, **kwargs):
+        try:
+            for i in range(100):
+                yield f"token{i} "
+        finally:
+            closed.append(True)
+
+    async def disconnected(self):
+        return True
+
+    # Resumable streams outlive the request, disable them here
+    with (
+        patch("app.api.v1.chat.get_rag_service") as mock_rag,
+        patch("starlette.requests.Request.is_disconnected", disconnected),
+        patch("app.api.v1.chat.settings.sse_resume_ttl", 0),
+    ):
+        mock_service = AsyncMock()
+        mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
+        mock_rag.return_value = mock_service
+
+        response = await client.post(
+            "/api/v1/chat/message",
+            json={"message": "Test question", "session_id": str(session.id)},
+        )
+
+    assert '"done"' not in response.text
+    assert closed == [True]
+
+    await get_chat_writer().flush()
+    result = await db_session.execute(
+        select(ChatMessage).where(ChatMessage.role == "assistant")
+    )
+    message = result.scalar_one()
+    assert message.is_aborted is True
+    assert message.content == "token0 "
+
+
+@pytest.mark.asyncio
+async def test_chat_prefetch(client: AsyncClient):
+    """Test speculative retrieval endpoint"""
+    with patch("app.api.v1.chat.get_rag_service") as mock_rag:
+        mock_service = AsyncMock()
+        mock_rag.return_value = mock_service
+
+        response = await client.post(
+            "/api/v1/chat/prefetch", json={"message": "What projects"}
+        )
+
+        assert response.status_code == 204
+        mock_service.prefetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_chat_streams_release_db_connections(tmp_path):
+    """Test 100 concurrent streams run on a pool of 5 connections"""
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from httpx import ASGITransport
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.api.deps import get_db
+    from app.core.context import RetrievedChunk
+    from app.main import app
+    from app.services.chat_writer import ChatWriter
+    from app.services.rag import RAGService
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        pool_size=5,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(ChatSession.__table__.create)
+
+    async with session_factory() as db:
+        sessions = [ChatSession(ip_hash="test_hash") for _ in range(100)]
+        db.add_all(sessions)
+        await db.commit()
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    async def vector_search(self, query, top_k=3, similarity_threshold=0.5):
+        await self.db.execute(text("SELECT 1"))
+        return [RetrievedChunk(1, "Stan knows Go.", 0.9, "skills", 1, {})]
+
+    async def chat_stream(messages, **kwargs):
+        for i in range(10):
+            await asyncio.sleep(0.05)
+            yield f"token{i} "
+
+    mock_llm = AsyncMock()
+    mock_llm.chat_stream = chat_stream
+
+    @asynccontextmanager
+    async def writer_session():
+        yield AsyncMock()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with (
+            patch("app.services.rag.get_embedding_service"),
+            patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+            patch.object(RAGService, "vector_search", vector_search),
+            patch(
+                "app.api.v1.chat.get_chat_writer",
+                return_value=ChatWriter(writer_session),
+            ),
+            patch("app.main.rate_limiter.enabled", False),
+        ):
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://test"
+            ) as ac:
+                responses = await asyncio.gather(
+                    *(
+                        ac.post(
+                            "/api/v1/chat/message",
+                            json={
+                                "message": f"Question {i}",
+                                "session_id": str(session.id),
+                            },
+                        )
+                        for i, session in enumerate(sessions)
+                    )
+                )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert all(r.status_code == 200 for r in responses)
+    assert all("token9" in r.text and '"done"' in r.text for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_chat_answer(client: AsyncClient):
+    """Test non-streaming answer endpoint"""
+    from app.services.rag import ChatAnswer
+
+    with patch("app.api.v1.chat.get_rag_service") as mock_rag:
+        mock_service = AsyncMock()
+        mock_service.answer.return_value = ChatAnswer(
+            question="Test question",
+            response="Test response",
+            language="en",
+            chunk_ids=[1, 2],
+        )
+        mock_rag.return_value = mock_service
+
+        response = await client.post(
+            "/api/v1/chat/answer", json={"message": "Test question"}
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["response"] == "Test response"
+    assert data["chunks_used"] == 2
+    assert "session_id" in data
+
+
+@pytest.mark.asyncio
+async def test_chat_batch(client: AsyncClient):
+    """Test batch endpoint answers every question"""
+    from app.services.rag import ChatAnswer
+
+    with patch("app.api.v1.chat.get_rag_service") as mock_rag:
+        mock_service = AsyncMock()
+        mock_service.answer_batch.return_value = [
+            ChatAnswer(question=q, response="ok", language="en", chunk_ids=[])
+            for q in ("One?", "Two?")
+        ]
+        mock_rag.return_value = mock_service
+
+        response = await client.post(
+            "/api/v1/chat/batch", json={"questions": ["One?", "Two?"]}
+        )
+        too_many = await client.post(
+            "/api/v1/chat/batch", json={"questions": ["Q?"] * 100}
+        )
+
+    assert response.status_code == 200
+    assert [a["question"] for a in response.json()["answers"]] == [
+        "One?",
+        "Two?",
+    ]
+    assert too_many.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_chat_message_releases_lease_when_setup_fails(
+    client: AsyncClient, db_session
+):
+    """Test a failure after the session was leased releases the lease"""
+    from app.core.session_guard import get_session_guard
+
+    session = ChatSession(ip_hash="test_hash")
+    db_session.add(session)
+    await db_session.commit()
+
+    with (
+        patch(
+            "app.api.v1.chat.get_rag_service",
+            side_effect=RuntimeError("Embedding model failed to load"),
+        ),
+        pytest.raises(RuntimeError),
+    ):
+        await client.post(
+            "/api/v1/chat/message",
+            json={"message": "Test question", "session_id": str(session.id)},
+        )
+
+    guard = get_session_guard()
+    await guard.release(session.id, await guard.acquire(session.id))
+
+
+@pytest.mark.asyncio
+async def test_sse_response_closes_when_body_is_never_sent():
+    """Test on_close runs when the client is gone before the first frame"""
+    from starlette.requests import ClientDisconnect
+
+    from app.api.v1.chat import SSEResponse
+
+    started = False
+    closed = []
+
+    async def frames():
+        nonlocal started
+        started = True
+        yield "data: {}\n\n"
+
+    async def on_close():
+        closed.append(True)
+
+    async def send(message):
+        raise OSError("Connection reset by peer")
+
+    response = SSEResponse(frames(), on_close=on_close)
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        await response(scope, AsyncMock(), send)
+
+    assert not started
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_chat_message_resubmit_after_failed_stream_setup(
+    client: AsyncClient,
+):
+    """Test a failed stream setup does not hold the idempotency key"""
+    from app.core.session_guard import SessionGuard
+
+    async def mock_chat(*args, **kwargs):
+        yield "Fresh answer"
+
+    request = {"message": "Test question", "idempotency_key": "retry-0001"}
+    with patch("app.api.v1.chat.get_rag_service") as mock_rag:
+        mock_service = AsyncMock()
+        mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
+        mock_rag.return_value = mock_service
+
+        with (
+            patch.object(
+                SessionGuard,
+                "stream",
+                side_effect=RuntimeError("Stream setup failed"),
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            await client.post("/api/v1/chat/message", json=request)
+
+        # Without the key released the resubmit would wait forever
+        response = await asyncio.wait_for(
+            client.post("/api/v1/chat/message", json=request), timeout=5
+        )
+
+    assert response.status_code == 200
+    assert "Fresh answer" in response.text
+
+
+@pytest.mark.asyncio
+async def test_session_queued_by_other_worker_is_found():
+    """Test a session missing from the database is looked up again"""
+    from app.api.v1.chat import session_exists
+
+    session_id = uuid4()
+    missing, found = Mock(), Mock()
+    missing.scalar_one_or_none.return_value = None
+    found.scalar_one_or_none.return_value = session_id
+    db = AsyncMock()
+    db.execute.side_effect = [missing, found]
+
+    with patch.object(get_chat_writer(), "flush_interval", 0):
+        assert await session_exists(db, session_id)
+
+    # The connection is returned to the pool while waiting
+    db.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_detached_stream_stops_when_client_leaves_before_first_frame(
+    db_session,
+):
+    """Test a resumable generation nobody ever read is cancelled"""
+    from starlette.requests import ClientDisconnect, Request
+
+    from app.api.v1.chat import chat_message
+    from app.core.resumable import get_resumable_streams
+    from app.schemas.chat import ChatMessageRequest
+
+    closed = asyncio.Event()
+
+    async def mock_chat(*args, **kwargs):
+        try:
+            yield "token "
+            await asyncio.sleep(10)
+            yield "never"
+        finally:
+            closed.set()
+
+    async def send(message):
+        raise OSError("Connection reset by peer")
+
+    scope = {
+        "type": "http",
+        "asgi": {"spec_version": "2.4"},
+        "method": "POST",
+        "path": "/api/v1/chat/message",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+    }
+    with (
+        patch("app.api.v1.chat.get_rag_service") as mock_rag,
+        patch.object(get_resumable_streams(), "grace", 0.01),
+    ):
+        mock_service = AsyncMock()
+        mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
+        mock_rag.return_value = mock_service
+
+        response = await chat_message(
+            Request(scope),
+            ChatMessageRequest(message="Test question"),
+            db_session,
+        )
+        with pytest.raises(ClientDisconnect):
+            await response(scope, AsyncMock(), send)
+
+        await asyncio.wait_for(closed.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_chat_message_restarts_stream_it_cannot_resume(
+    client: AsyncClient,
+):
+    """Test a resend this worker can't continue tells the client to restart"""
+
+    async def mock_chat(*args, **kwargs):
+        yield "Fresh answer"
+
+    with patch("app.api.v1.chat.get_rag_service") as mock_rag:
+        mock_service = AsyncMock()
+        mock_service.chat = mock_chat
+        mock_service.match_faq = Mock(return_value=None)
+        mock_rag.return_value = mock_service
+
+        response = await client.post(
+            "/api/v1/chat/message",
+            json={"message": "Test question"},
+            headers={"Last-Event-ID": "other-worker:3"},
+        )
+
+    assert response.status_code == 200
+    assert response.text.startswith('data: {"restart":true}\n\n')
+    assert "Fresh answer" in response.text
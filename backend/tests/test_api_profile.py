@@ -206,3 +206,34 @@ async def test_delete_section_item(client: AsyncClient, db_session):
 
     assert response.status_code == 200
     assert response.json()["success"] is True
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_conditional_get(client: AsyncClient, db_session):
+    """Test ETag revalidation and invalidation by admin writes"""
+    response = await client.get("/api/v1/profile")
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+
+    response = await client.get(
+        "/api/v1/profile", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    await client.put(
+        "/api/v1/admin/profile",
+        json={
+            "section": "basics",
+            "action": "create",
+            "data": {"full_name": "Stan Frant"},
+        },
+        headers={"X-Admin-Token": "dev-admin-token"},
+    )
+
+    response = await client.get(
+        "/api/v1/profile", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["basics"]["full_name"] == "Stan Frant"
@@ -0,0 +1,41 @@
+import pytest
+
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_ttl_cache_expiry_and_max_age():
+    """Test entries expire after ttl and respect a stricter max_age"""
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 30
+    assert cache.get("a") == 1
+    assert cache.get("a", max_age=10) is None
+
+    clock.now = 61
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.unit
+def test_ttl_cache_evicts_least_recently_used():
+    """Test cache size is bounded"""
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
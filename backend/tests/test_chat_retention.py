@@ -0,0 +1,76 @@
+from contextlib import asynccontextmanager
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.services.chat_retention import (
+    ChatRetention,
+    add_months,
+    expired_partitions,
+    partition_month,
+)
+
+
+@pytest.mark.unit
+def test_partition_months():
+    """Test month arithmetic and partition name parsing"""
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_month("chat_messages_y2026m03") == date(2026, 3, 1)
+    assert partition_month("chat_messages_old") is None
+
+
+@pytest.mark.unit
+def test_expired_partitions_keep_months_overlapping_retention():
+    """Test only partitions entirely before the cutoff are dropped"""
+    names = [
+        "chat_messages_y2025m08",
+        "chat_messages_y2025m09",
+        "chat_messages_y2025m10",
+        "chat_messages_archive",
+    ]
+
+    assert expired_partitions(names, date(2025, 10, 19)) == [
+        "chat_messages_y2025m08",
+        "chat_messages_y2025m09",
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_retention_run_creates_and_drops_partitions():
+    """Test one locked transaction creates missing and drops old months"""
+    existing = Mock()
+    existing.scalars.return_value = [
+        "chat_messages_y2025m09",
+        "chat_messages_y2025m10",
+        "chat_messages_y2026m10",
+    ]
+    deleted = Mock(rowcount=4)
+    conn = AsyncMock()
+    conn.execute.side_effect = lambda stmt, *_: (
+        existing if "pg_inherits" in str(stmt) else deleted
+    )
+
+    @asynccontextmanager
+    async def begin():
+        yield conn
+
+    engine = Mock(begin=begin)
+    retention = ChatRetention(engine, retention_days=365, partitions_ahead=2)
+
+    stats = await retention.run(today=date(2026, 10, 19))
+
+    assert stats == {
+        "created": ["chat_messages_y2026m11", "chat_messages_y2026m12"],
+        "dropped": ["chat_messages_y2025m09"],
+        "sessions_deleted": 4,
+    }
+    statements = [str(call.args[0]) for call in conn.execute.call_args_list]
+    assert "pg_advisory_xact_lock" in statements[0]
+    assert (
+        "CREATE TABLE chat_messages_y2026m12 PARTITION OF chat_messages "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    ) in statements
+    assert "DROP TABLE chat_messages_y2025m09" in statements
@@ -0,0 +1,129 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+
+from app.core.metrics import metrics
+from app.services.chat_writer import ChatWriter
+
+
+def make_factory(db):
+    @asynccontextmanager
+    async def factory():
+        yield db
+
+    return factory
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writer_batches_rows_and_counters():
+    """Test one transaction with multi-row inserts and counter updates"""
+    db = AsyncMock()
+    writer = ChatWriter(make_factory(db))
+    session_id = uuid4()
+
+    await writer.add_session(session_id, ip_hash="hash")
+    assert writer.is_pending_session(session_id)
+    await writer.add_message(session_id, role="user", content="Hi")
+    await writer.add_message(
+        session_id, role="assistant", content="Hello", response_time_ms=5
+    )
+
+    assert await writer.flush() == 3
+    assert not writer.is_pending_session(session_id)
+    db.commit.assert_awaited_once()
+
+    sessions, messages, counters = (
+        c.args[1] for c in db.execute.call_args_list
+    )
+    assert sessions[0]["id"] == session_id
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[1]["response_time_ms"] == 5
+    assert counters == [
+        {
+            "session_id": session_id,
+            "count": 2,
+            "last_message_at": messages[1]["created_at"],
+        }
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writer_backpressure_and_shutdown_flush():
+    """Test producers wait on a full queue and stop() writes the rest"""
+    db = AsyncMock()
+    writer = ChatWriter(make_factory(db), max_queue=1, flush_interval=0.01)
+    before = metrics.counter("chat_writer_backpressure")
+
+    await writer.add_message(uuid4(), role="user", content="1")
+    blocked = asyncio.create_task(
+        writer.add_message(uuid4(), role="user", content="2")
+    )
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert metrics.counter("chat_writer_backpressure") == before + 1
+
+    writer.start()
+    await blocked
+    await writer.stop()
+
+    written = [
+        row["content"]
+        for call in db.execute.call_args_list
+        for row in call.args[1]
+        if "content" in row
+    ]
+    assert written == ["1", "2"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writer_drops_batch_after_retries():
+    """Test failing writes are retried, then dropped row by row"""
+    db = AsyncMock()
+    db.execute.side_effect = RuntimeError("database is down")
+    writer = ChatWriter(make_factory(db), flush_interval=0)
+    session_id = uuid4()
+
+    await writer.add_session(session_id, ip_hash="hash")
+
+    assert await writer.flush() == 0
+    # Three batch attempts, then the row on its own
+    assert db.execute.await_count == 4
+    assert not writer.is_pending_session(session_id)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_writer_drops_only_failing_rows():
+    """Test a batch that keeps failing loses only the rejected rows"""
+
+    executed = []
+
+    async def execute(statement, rows):
+        if any(row.get("content") == "bad" for row in rows):
+            raise RuntimeError("value too long")
+        executed.append(rows)
+
+    db = AsyncMock()
+    db.execute.side_effect = execute
+    writer = ChatWriter(make_factory(db), flush_interval=0)
+    session_id = uuid4()
+    before = metrics.counter("chat_writer_dropped_rows")
+
+    await writer.add_message(session_id, role="user", content="bad")
+    await writer.add_session(session_id, ip_hash="hash")
+    await writer.add_message(session_id, role="user", content="good")
+
+    assert await writer.flush() == 2
+    assert metrics.counter("chat_writer_dropped_rows") == before + 1
+
+    # Row by row: the session first, each message with its counter
+    session, message, counter = (rows[0] for rows in executed[-3:])
+    assert session["id"] == session_id
+    assert message["content"] == "good"
+    assert counter["count"] == 1
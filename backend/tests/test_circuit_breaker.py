@@ -0,0 +1,75 @@
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+def test_circuit_opens_after_consecutive_failures():
+    """Test circuit opens at the failure threshold"""
+    breaker = CircuitBreaker("test", failure_threshold=3, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow_request() is True
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+
+
+@pytest.mark.unit
+def test_success_resets_failure_count():
+    """Test failures must be consecutive"""
+    breaker = CircuitBreaker("test", failure_threshold=2, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.unit
+def test_half_open_probe_closes_circuit():
+    """Test single probe after reset timeout closes circuit on success"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test", failure_threshold=1, reset_timeout=30, clock=clock
+    )
+    breaker.record_failure()
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False  # probe in flight
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request() is True
+
+
+@pytest.mark.unit
+def test_half_open_probe_failure_reopens_circuit():
+    """Test failed probe opens circuit for another reset timeout"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        "test", failure_threshold=3, reset_timeout=30, clock=clock
+    )
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 31
+    assert breaker.allow_request() is True
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    clock.now = 40
+    assert breaker.allow_request() is False
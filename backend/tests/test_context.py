@@ -2,9 +2,11 @@ import pytest
 
 from app.core.context import (
     RetrievedChunk,
+    context_token_budget,
     deduplicate_chunks,
     format_chunks_for_context,
     rank_chunks_by_relevance,
+    select_num_ctx,
 )
 
 
@@ -118,3 +120,20 @@ def test_deduplicate_chunks():
     assert len(unique) == 2
     assert unique[0].text == "Same text"
     assert unique[1].text == "Different text"
+
+
+@pytest.mark.unit
+def test_select_num_ctx_smallest_adequate_bucket():
+    """Test num_ctx is the smallest bucket fitting prompt and answer"""
+    buckets = [4096, 2048, 8192]
+
+    assert select_num_ctx(1000, 500, buckets) == 2048
+    assert select_num_ctx(3000, 500, buckets) == 4096
+    assert select_num_ctx(9000, 500, buckets) == 8192
+
+
+@pytest.mark.unit
+def test_context_token_budget():
+    """Test context budget leaves room for instructions and answer"""
+    assert context_token_budget(400, 512, [2048, 4096]) == 3184
+    assert context_token_budget(5000, 512, [2048, 4096]) == 0
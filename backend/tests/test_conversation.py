@@ -0,0 +1,58 @@
+import pytest
+
+from app.core.conversation import ConversationStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_store_appends_turns():
+    """Test completed turns are returned as user/assistant messages"""
+    store = ConversationStore()
+    store.append("s1", "en", user="Q1", assistant="A1")
+    store.append("s1", "en", user="Q2", assistant="A2")
+
+    assert [m["content"] for m in store.get("s1", "en")] == [
+        "Q1",
+        "A1",
+        "Q2",
+        "A2",
+    ]
+    assert store.get("s2", "en") == []
+
+
+@pytest.mark.unit
+def test_store_ttl_and_language_switch():
+    """Test expired sessions and language switches start over"""
+    clock = FakeClock()
+    store = ConversationStore(ttl=60, clock=clock)
+    store.append("s1", "en", user="Q1", assistant="A1")
+    store.append("s2", "en", user="Q1", assistant="A1")
+
+    assert store.get("s1", "de") == []
+    clock.now = 61
+    assert store.get("s2", "en") == []
+    assert len(store) == 0
+
+
+@pytest.mark.unit
+def test_store_is_bounded():
+    """Test session count and per-session tokens are capped"""
+    store = ConversationStore(max_sessions=2, max_tokens=20)
+    for key in ("s1", "s2", "s3"):
+        store.append(key, "en", user="Q", assistant="A")
+    assert len(store) == 2
+    assert store.get("s1", "en") == []
+
+    store.append("s3", "en", user="x" * 42, assistant="y" * 28)
+    messages = store.get("s3", "en")
+    assert [m["content"] for m in messages] == ["x" * 42, "y" * 28]
+
+    store.append("s3", "en", user="z" * 100, assistant="A")
+    assert store.get("s3", "en") == []
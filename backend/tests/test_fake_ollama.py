@@ -0,0 +1,79 @@
+import httpx
+import pytest
+from benchmarks.fake_ollama import FakeOllamaConfig, create_app
+
+from app.services.llm import OllamaError, OllamaService
+
+
+def make_service(**config):
+    config = {
+        "ttft": 0,
+        "tokens_per_second": 10000,
+        "jitter": 0,
+        "seed": 1,
+        **config,
+    }
+    app = create_app(FakeOllamaConfig(**config))
+    service = OllamaService(
+        host="http://fake-ollama",
+        transport=httpx.ASGITransport(app=app),
+    )
+    return service, app.state.server
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fake_ollama_generate_stream():
+    """Test client decodes a full stream from the fake server"""
+    service, server = make_service(answer="Hello from the fake")
+
+    frames = [f async for f in service.generate_frames(prompt="Hi")]
+
+    assert "".join(f.text for f in frames) == "Hello from the fake"
+    assert frames[-1].done is True
+    assert frames[-1].stats.eval_count == 4
+    assert server.requests == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fake_ollama_chat_and_num_predict():
+    """Test chat endpoint honours num_predict"""
+    service, _ = make_service(answer="one two three four")
+
+    tokens = [
+        t
+        async for t in service.chat_stream(
+            messages=[{"role": "user", "content": "Hi"}], max_tokens=2
+        )
+    ]
+    answer = await service.chat(messages=[{"role": "user", "content": "Hi"}])
+
+    assert "".join(tokens) == "one two"
+    assert answer == "one two three four"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fake_ollama_health():
+    """Test health check against /api/tags"""
+    service, _ = make_service()
+
+    assert await service.check_health() is True
+    assert await service.list_models() == ["mistral:7b-instruct-q4_0"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_fake_ollama_failure_injection():
+    """Test injected HTTP and mid-stream failures reach the client"""
+    service, _ = make_service(failure_rate=1.0)
+    with pytest.raises(httpx.HTTPStatusError):
+        await service.generate(prompt="Hi")
+
+    service, _ = make_service(midstream_failure_rate=1.0)
+    tokens = []
+    with pytest.raises(OllamaError):
+        async for token in service.generate_stream(prompt="Hi"):
+            tokens.append(token)
+    assert tokens
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.faq import FaqAnswer, FaqMatcher
+
+
+def make_answer(faq_id: int, language: str = "en") -> FaqAnswer:
+    return FaqAnswer(faq_id, language, f"Question {faq_id}", f"Answer {faq_id}")
+
+
+@pytest.mark.unit
+def test_matcher_returns_best_match_above_threshold():
+    """Test the most similar question of the same language wins"""
+    matcher = FaqMatcher(threshold=0.9)
+    matcher.load(
+        [
+            (make_answer(1), [1.0, 0.0, 0.0]),
+            (make_answer(2), [0.0, 2.0, 0.0]),  # norm does not matter
+            (make_answer(3, "de"), [0.0, 1.0, 0.0]),
+        ]
+    )
+
+    assert len(matcher) == 3
+    assert matcher.match([0.1, 0.95, 0.0], "en").id == 2
+    assert matcher.match([0.1, 0.95, 0.0], "de").id == 3
+    assert matcher.match([0.7, 0.7, 0.0], "en") is None
+    assert matcher.match([0.1, 0.95, 0.0], "ru") is None
+    assert matcher.match([0.0, 0.0, 0.0], "en") is None
+
+
+@pytest.mark.unit
+def test_matcher_load_replaces_answers():
+    """Test reloading drops deleted entries"""
+    matcher = FaqMatcher()
+    matcher.load([(make_answer(1), [1.0, 0.0])])
+    matcher.load([])
+
+    assert len(matcher) == 0
+    assert matcher.match([1.0, 0.0], "en") is None
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.core.idempotency import IdempotencyStore
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_duplicates_wait_for_and_reuse_first_result():
+    """Test a duplicate waits for the first request and gets its result"""
+    store = IdempotencyStore()
+    assert await store.lookup("key") is None
+
+    store.begin("key")
+    duplicate = asyncio.create_task(store.lookup("key"))
+    await asyncio.sleep(0)
+    assert not duplicate.done()
+
+    store.finish("key", "stream-1")
+    assert await duplicate == "stream-1"
+    assert await store.lookup("key") == "stream-1"
+    assert await store.lookup("other") is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_request_releases_key():
+    """Test duplicates of a failed request are processed on their own"""
+    store = IdempotencyStore()
+    store.begin("key")
+    duplicate = asyncio.create_task(store.lookup("key"))
+    await asyncio.sleep(0)
+
+    store.fail("key")
+
+    assert await duplicate is None
+    assert await store.lookup("key") is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_results_are_bounded():
+    """Test oldest keys are evicted beyond max_size"""
+    store = IdempotencyStore(max_size=2)
+    for key in ("a", "b", "c"):
+        store.begin(key)
+        store.finish(key, key.upper())
+
+    assert await store.lookup("a") is None
+    assert await store.lookup("c") == "C"
@@ -80,3 +80,119 @@ async def test_delete_chunks():
         await service._delete_chunks("work_experience", 1)
 
         assert mock_db.execute.called
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_faq_answers():
+    """Test FAQ answers and embeddings are regenerated from the chunks"""
+    from app.models.knowledge import FaqEntry
+    from app.services.rag import ChatAnswer
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    stack = FaqEntry(id=1, language="en", question="What is your stack?")
+    hobby = FaqEntry(
+        id=2, language="en", question="Any hobbies?", answer="Old answer"
+    )
+    mock_result = Mock()
+    mock_result.scalars.return_value.all.return_value = [stack, hobby]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding_service = Mock()
+    mock_embedding_service.create_query_embeddings.return_value = [[0.1], [0.2]]
+
+    mock_rag = Mock()
+    mock_rag.llm_service.is_available = AsyncMock(return_value=True)
+    mock_rag.vector_search = AsyncMock(side_effect=[[Mock(id=7)], []])
+    mock_rag.answer = AsyncMock(
+        return_value=ChatAnswer(
+            question=stack.question,
+            response="Python and Go.",
+            language="en",
+            chunk_ids=[7],
+        )
+    )
+
+    with (
+        patch(
+            "app.services.indexing.get_embedding_service",
+            return_value=mock_embedding_service,
+        ),
+        patch("app.services.indexing.RAGService", return_value=mock_rag),
+    ):
+        service = IndexingService(mock_db)
+        generated = await service.generate_faq_answers()
+
+    assert generated == 1
+    assert mock_rag.faq is None
+    assert stack.answer == "Python and Go."
+    assert stack.chunk_ids == [7]
+    assert stack.embedding == [0.1]
+    assert stack.generated_at is not None
+    # No chunks left for this question: full pipeline answers it
+    assert hobby.answer is None
+    mock_db.commit.assert_awaited_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_faq_answers_keeps_old_answer_on_failure():
+    """Test failed and degraded generations keep the previous answers"""
+    from app.models.knowledge import FaqEntry
+    from app.services.rag import ChatAnswer
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    broken = FaqEntry(id=1, language="en", question="Stack?", answer="Old")
+    degraded = FaqEntry(id=2, language="en", question="Hobbies?", answer="Old")
+    stack = FaqEntry(id=3, language="en", question="Languages?")
+    mock_result = Mock()
+    mock_result.scalars.return_value.all.return_value = [
+        broken,
+        degraded,
+        stack,
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding_service = Mock()
+    mock_embedding_service.create_query_embeddings.return_value = [
+        [0.1],
+        [0.2],
+        [0.3],
+    ]
+
+    mock_rag = Mock()
+    mock_rag.llm_service.is_available = AsyncMock(return_value=True)
+    mock_rag.vector_search = AsyncMock(return_value=[Mock(id=7)])
+    mock_rag.answer = AsyncMock(
+        side_effect=[
+            RuntimeError("Ollama went away"),
+            ChatAnswer(
+                question=degraded.question,
+                response="Excerpts",
+                language="en",
+                chunk_ids=[7],
+                degraded=True,
+            ),
+            ChatAnswer(
+                question=stack.question,
+                response="Python and Go.",
+                language="en",
+                chunk_ids=[7],
+            ),
+        ]
+    )
+
+    with (
+        patch(
+            "app.services.indexing.get_embedding_service",
+            return_value=mock_embedding_service,
+        ),
+        patch("app.services.indexing.RAGService", return_value=mock_rag),
+    ):
+        service = IndexingService(mock_db)
+        generated = await service.generate_faq_answers()
+
+    assert generated == 1
+    assert broken.answer == "Old"
+    assert degraded.answer == "Old"
+    assert stack.answer == "Python and Go."
+    mock_db.commit.assert_awaited_once()
@@ -1,6 +1,8 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch, Mock
-from app.services.llm import OllamaService
+from pathlib import Path
+from app.services.llm import OllamaService, iter_ndjson
 import httpx
 
 @pytest.mark.unit
@@ -72,3 +74,195 @@ async def test_ollama_generate_with_system():
         call_args = post_mock.call_args
         payload = call_args.kwargs['json']
         assert payload['system'] == "system prompt"
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_generate_sends_keep_alive():
+    """Test keep_alive is sent and load_duration is recorded"""
+    from app.core.metrics import metrics
+
+    metrics.reset()
+    service = OllamaService(keep_alive="1h")
+
+    with patch('httpx.AsyncClient') as mock_client:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "response": "Response",
+            "done": True,
+            "load_duration": 5_000_000_000,
+        }
+
+        post_mock = AsyncMock(return_value=mock_response)
+        mock_client.return_value.__aenter__.return_value.post = post_mock
+
+        await service.generate("prompt")
+
+        payload = post_mock.call_args.kwargs['json']
+        assert payload['keep_alive'] == "1h"
+        assert metrics.counter("ollama_cold_loads") == 1
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_warmup_failure():
+    """Test warmup does not raise when Ollama is unavailable"""
+    service = OllamaService()
+
+    with patch('httpx.AsyncClient') as mock_client:
+        mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            side_effect=httpx.ConnectError("Connection failed")
+        )
+
+        result = await service.warmup()
+        assert result is False
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_warmup_uses_traffic_num_ctx():
+    """Test warmup loads the model with the context size answers use"""
+    service = OllamaService()
+    buckets = patch(
+        'app.services.llm.settings.llm_num_ctx_buckets', [2048, 4096]
+    )
+
+    with patch('httpx.AsyncClient') as mock_client, buckets:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"response": "Hi", "done": True}
+        post_mock = AsyncMock(return_value=mock_response)
+        mock_client.return_value.__aenter__.return_value.post = post_mock
+
+        await service.warmup()
+        first = post_mock.call_args.kwargs['json']['options']['num_ctx']
+
+        await service.generate("prompt", num_ctx=2048)
+        await service.warmup()
+        options = post_mock.call_args.kwargs['json']['options']
+
+    assert first == 4096
+    assert options['num_ctx'] == 2048
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_chat():
+    """Test non-streaming chat uses /api/chat with messages"""
+    service = OllamaService()
+    messages = [
+        {"role": "system", "content": "system prompt"},
+        {"role": "user", "content": "question"},
+    ]
+
+    with patch('httpx.AsyncClient') as mock_client:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "message": {"role": "assistant", "content": "Answer"},
+            "done": True,
+        }
+
+        post_mock = AsyncMock(return_value=mock_response)
+        mock_client.return_value.__aenter__.return_value.post = post_mock
+
+        result = await service.chat(messages)
+
+        assert result == "Answer"
+        assert post_mock.call_args.args[0].endswith("/api/chat")
+        assert post_mock.call_args.kwargs['json']['messages'] == messages
+
+FIXTURE_STREAM = (
+    Path(__file__).parent / "fixtures" / "ollama_generate_stream.ndjson"
+)
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_iter_ndjson_frames_split_across_chunks():
+    """Test NDJSON decoding when frames span chunk boundaries"""
+    data = FIXTURE_STREAM.read_bytes()
+
+    async def chunks():
+        for i in range(0, len(data), 37):
+            yield data[i:i + 37]
+
+    frames = [frame async for frame in iter_ndjson(chunks())]
+
+    assert len(frames) == len(data.strip().split(b"\n"))
+    assert frames[-1]["done"] is True
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_frames_recorded_stream():
+    """Test typed frames from a recorded Ollama stream"""
+    data = FIXTURE_STREAM.read_bytes()
+    transport = httpx.MockTransport(
+        lambda _request: httpx.Response(200, content=data)
+    )
+    service = OllamaService(host="http://ollama", transport=transport)
+
+    frames = [frame async for frame in service.generate_frames("prompt")]
+    text = "".join(frame.text for frame in frames)
+
+    assert text.startswith("Stan is a Backend Developer")
+    assert frames[-1].done is True
+    assert frames[-1].stats.prompt_eval_count == 312
+    assert frames[-1].stats.load_duration_ms == pytest.approx(21.834125)
+    assert all(frame.stats is None for frame in frames[:-1])
+
+    tokens = [token async for token in service.generate_stream("prompt")]
+    assert "".join(tokens) == text
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_circuit_fails_fast_and_recovers():
+    """Test open circuit rejects calls and health probe closes it"""
+    from app.core.circuit_breaker import CircuitOpenError, CircuitState
+
+    service = OllamaService()
+    service.breaker.failure_threshold = 2
+
+    with patch('httpx.AsyncClient') as mock_client:
+        post_mock = AsyncMock(side_effect=httpx.ConnectError("refused"))
+        mock_client.return_value.__aenter__.return_value.post = post_mock
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await service.generate("prompt")
+
+        with pytest.raises(CircuitOpenError):
+            await service.generate("prompt")
+        assert post_mock.call_count == 2
+        assert await service.is_available() is False
+
+        # Reset timeout passed: health probe closes the circuit
+        service.breaker.opened_at -= service.breaker.reset_timeout
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_client.return_value.__aenter__.return_value.get = AsyncMock(
+            return_value=mock_response
+        )
+
+        assert await service.is_available() is True
+        assert service.breaker.state == CircuitState.CLOSED
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_ollama_concurrency_limit():
+    """Test generations beyond max_concurrency wait for a slot"""
+    in_flight = []
+    peak = []
+
+    async def handler(request):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+        return httpx.Response(200, json={'response': 'ok', 'done': True})
+
+    service = OllamaService(
+        transport=httpx.MockTransport(handler), max_concurrency=2
+    )
+    results = await asyncio.gather(
+        *(service.generate(prompt="Hi") for _ in range(6))
+    )
+
+    assert results == ['ok'] * 6
+    assert max(peak) == 2
@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.metrics import Metrics
+
+
+@pytest.mark.unit
+def test_metrics_counters():
+    """Test counter increments"""
+    m = Metrics()
+    m.increment("requests")
+    m.increment("requests", 2)
+
+    assert m.counter("requests") == 3
+    assert m.counter("missing") == 0
+
+
+@pytest.mark.unit
+def test_metrics_observations():
+    """Test observation aggregation in snapshot"""
+    m = Metrics()
+    m.observe("latency_ms", 10)
+    m.observe("latency_ms", 30)
+
+    snapshot = m.snapshot()
+    assert snapshot["observations"]["latency_ms"] == {
+        "count": 2,
+        "avg": 20.0,
+        "max": 30.0,
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_metrics_endpoint_requires_admin(client):
+    """Test internal metrics are not served to anonymous clients"""
+    response = await client.get("/api/v1/metrics")
+    assert response.status_code == 401
+
+    response = await client.get(
+        "/api/v1/metrics", headers={"X-Admin-Token": "dev-admin-token"}
+    )
+    assert response.status_code == 200
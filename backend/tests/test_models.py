@@ -70,6 +70,7 @@ def test_chat_session_relationship():
     assert hasattr(ChatMessage, 'session_id')
     assert hasattr(ChatMessage, 'role')
     assert hasattr(ChatMessage, 'content')
+    assert hasattr(ChatMessage, 'is_aborted')
 
 @pytest.mark.unit
 def test_knowledge_chunk_attributes():
@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+
+from app.core import notifications
+from app.services import rag
+
+
+class FakeConnection:
+    """asyncpg connection that records listeners"""
+
+    def __init__(self):
+        self.listeners = {}
+        self.on_close = None
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback):
+        self.on_close = callback
+
+    def is_closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_listen_calls_handler_of_notified_channel():
+    """Test each channel drops its own cache, and all on (re)connect"""
+    conn = FakeConnection()
+    profile, knowledge = Mock(), Mock()
+
+    with patch.object(
+        notifications.asyncpg, "connect", AsyncMock(return_value=conn)
+    ):
+        task = asyncio.create_task(
+            notifications.listen(
+                "postgresql://db", {"profile": profile, "knowledge": knowledge}
+            )
+        )
+        await asyncio.sleep(0.01)
+        # Connecting drops everything: notifications may have been missed
+        assert (profile.call_count, knowledge.call_count) == (1, 1)
+
+        conn.listeners["knowledge"](conn, 1, "knowledge", "")
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert (profile.call_count, knowledge.call_count) == (1, 2)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reindex_notifies_other_workers():
+    """Test a reindex commit sends a notification and clears locally"""
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    rag._retrievals.set("query", ["stale"])
+
+    await rag.commit_knowledge_change(db)
+
+    params = db.execute.await_args.args[1]
+    assert params == {"channel": rag.KNOWLEDGE_CHANNEL}
+    db.commit.assert_awaited_once()
+    assert rag._retrievals.get("query") is None
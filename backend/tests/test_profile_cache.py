@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.services.profile_cache import ProfileCache, etag_matches
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_built_once_until_invalidated():
+    """Test concurrent misses build once and invalidation rebuilds"""
+    cache = ProfileCache()
+    builds = 0
+
+    async def build() -> bytes:
+        nonlocal builds
+        builds += 1
+        await asyncio.sleep(0.01)
+        return f'{{"build": {builds}}}'.encode()
+
+    first, second = await asyncio.gather(cache.get(build), cache.get(build))
+    assert builds == 1
+    assert first is second
+    assert first.etag.startswith('"')
+
+    cache.invalidate()
+    rebuilt = await cache.get(build)
+    assert builds == 2
+    assert rebuilt.etag != first.etag
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_invalidated_while_building_is_not_kept():
+    """Test a body built from data changed meanwhile is not cached"""
+    cache = ProfileCache()
+
+    async def build() -> bytes:
+        cache.invalidate()  # admin write lands mid-build
+        return b"{}"
+
+    await cache.get(build)
+    assert cache._fresh() is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_expires_after_max_age():
+    """Test max age bounds staleness after a missed notification"""
+    now = [0.0]
+    cache = ProfileCache(max_age=10, clock=lambda: now[0])
+
+    async def build() -> bytes:
+        return b"{}"
+
+    await cache.get(build)
+    assert cache._fresh() is not None
+    now[0] = 11
+    assert cache._fresh() is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_selections_cached_separately():
+    """Test each key has its own body and invalidation drops all of them"""
+    cache = ProfileCache()
+
+    async def build_full() -> bytes:
+        return b'{"basics": null, "experience": []}'
+
+    async def build_basics() -> bytes:
+        return b'{"basics": null}'
+
+    full = await cache.get(build_full)
+    basics = await cache.get(build_basics, key=("basics",))
+    assert full.etag != basics.etag
+    assert cache._fresh(("basics",)) is basics
+    assert cache._fresh() is full
+
+    cache.invalidate()
+    assert cache._fresh() is None
+    assert cache._fresh(("basics",)) is None
+
+
+@pytest.mark.unit
+def test_etag_matches():
+    """Test If-None-Match parsing"""
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
@@ -0,0 +1,203 @@
+import json
+from datetime import UTC, date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.profile import (
+    ProfileBasics,
+    Project,
+    Skill,
+    SkillCategory,
+    WorkExperience,
+)
+from app.schemas.profile import CompleteProfileResponse
+from app.services import profile_loader
+from app.services.profile_loader import (
+    ProfileSelection,
+    load_profile_document,
+    profile_document_query,
+    render_complete_profile,
+)
+
+
+def row_json(instance) -> dict:
+    """Row as rendered by Postgres to_json (all columns)"""
+    row = {}
+    for column in instance.__table__.columns:
+        value = getattr(instance, column.name)
+        if isinstance(value, date | datetime):
+            value = value.isoformat()
+        row[column.name] = value
+    return row
+
+
+def make_db(dialect: str, document: str | None = None):
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = dialect
+    result = MagicMock()
+    result.scalar_one.return_value = document
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+@pytest.mark.unit
+def test_profile_document_is_one_statement():
+    """Test every section is aggregated in a single ordered statement"""
+    sql = str(profile_document_query().compile(dialect=postgresql.dialect()))
+
+    assert sql.count("json_agg(") == 7
+    assert "json_agg(work_experience ORDER BY work_experience.order_index)" in (
+        sql
+    )
+    assert "ORDER BY projects.is_featured DESC, projects.order_index" in sql
+    assert "WHERE skills.category_id = skill_categories.id" in sql
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_profile_document_matches_orm_profile():
+    """Test the JSON document validates to the same profile as ORM rows"""
+    category = SkillCategory(id=1, name="Backend", order_index=0)
+    category.skills = [
+        Skill(
+            id=3,
+            category_id=1,
+            name="Python",
+            proficiency_level="expert",
+            years_of_experience=8.0,
+            order_index=0,
+        )
+    ]
+    expected_rows = {
+        "basics": ProfileBasics(
+            id=1,
+            full_name="Stan Frant",
+            email="stan@example.com",
+            updated_at=datetime(2025, 1, 1, tzinfo=UTC),
+        ),
+        "experience": WorkExperience(
+            id=2,
+            company_name="Acme",
+            position="Engineer",
+            start_date=date(2020, 1, 1),
+            is_current=True,
+            achievements=["Shipped"],
+            technologies=None,
+            order_index=0,
+        ),
+        "projects": Project(
+            id=4, name="frantai", is_featured=True, order_index=0
+        ),
+    }
+    expected = CompleteProfileResponse(
+        basics=expected_rows["basics"],
+        experience=[expected_rows["experience"]],
+        skills=[category],
+        projects=[expected_rows["projects"]],
+    )
+
+    # As rendered by Postgres: every column, ISO dates
+    skill = row_json(category.skills[0])
+    skill["years_of_experience"] = 8  # whole floats have no fraction
+    document = {
+        "basics": row_json(expected_rows["basics"]),
+        "experience": [row_json(expected_rows["experience"])],
+        "skills": [{**row_json(category), "skills": [skill]}],
+        "projects": [row_json(expected_rows["projects"])],
+        "education": [],
+        "languages": [],
+        "certifications": [],
+    }
+    db = make_db("postgresql", json.dumps(document))
+
+    profile = await load_profile_document(db)
+
+    assert db.execute.await_count == 1
+    assert profile == expected
+    assert profile.model_dump_json() == expected.model_dump_json()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_load_complete_profile_picks_loader_by_dialect():
+    """Test the single statement is used on Postgres only"""
+    document = AsyncMock(return_value="document")
+    sections = AsyncMock(return_value="sections")
+
+    with (
+        patch.object(profile_loader, "load_profile_document", document),
+        patch.object(profile_loader, "load_profile_sections", sections),
+    ):
+        postgres = await profile_loader.load_complete_profile(
+            make_db("postgresql")
+        )
+        sqlite = await profile_loader.load_complete_profile(make_db("sqlite"))
+
+        with patch.object(
+            profile_loader.settings, "profile_single_query", False
+        ):
+            disabled = await profile_loader.load_complete_profile(
+                make_db("postgresql")
+            )
+
+    assert (postgres, sqlite, disabled) == ("document", "sections", "sections")
+
+
+@pytest.mark.unit
+def test_profile_selection_parse():
+    """Test selections are validated and normalized"""
+    selection = ProfileSelection.parse(
+        "experience, basics", "experience.position,basics.full_name"
+    )
+    assert selection.sections == ("basics", "experience")
+    assert selection.fields == (
+        ("basics", ("full_name",)),
+        ("experience", ("position",)),
+    )
+    # Same selection in another order shares the cache key
+    assert selection == ProfileSelection.parse(
+        "basics,experience", "basics.full_name,experience.position"
+    )
+    assert ProfileSelection.parse(None, None).is_complete
+    assert ProfileSelection.parse(None, None).include() is None
+
+    for sections, fields in [
+        ("basics,photos", None),
+        (",", None),
+        ("basics", "projects.name"),
+        (None, "projects.budget"),
+    ]:
+        with pytest.raises(ValueError):
+            ProfileSelection.parse(sections, fields)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_sparse_profile_loads_and_returns_only_selection():
+    """Test only selected sections are queried and serialized"""
+    db = make_db("sqlite")
+    db.execute.return_value.scalars.return_value.all.return_value = [
+        Project(
+            id=4,
+            name="frantai",
+            full_description="Long text",
+            is_featured=True,
+            order_index=0,
+        )
+    ]
+    selection = ProfileSelection.parse("projects", "projects.name")
+
+    body = await render_complete_profile(db, selection)
+
+    assert db.execute.await_count == 1
+    assert json.loads(body) == {"projects": [{"name": "frantai"}]}
+
+    sql = str(
+        profile_document_query(selection.sections).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "projects" in sql
+    assert "work_experience" not in sql
@@ -0,0 +1,80 @@
+import gzip
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import profile_snapshot
+from app.services.profile_snapshot import (
+    ProfileSnapshot,
+    write_profile_snapshot,
+)
+
+
+@pytest.mark.unit
+def test_snapshot_versions_are_published_atomically(tmp_path):
+    """Test each version gets its files and the symlinks move to the latest"""
+    snapshot = ProfileSnapshot(tmp_path, keep=2)
+
+    for version in ("v1", "v2", "v3"):
+        snapshot.write(f'{{"version": "{version}"}}'.encode(), version)
+
+    current = tmp_path / "profile.json"
+    assert current.is_symlink()
+    assert current.readlink().name == "profile.v3.json"
+    assert current.read_bytes() == b'{"version": "v3"}'
+    assert gzip.decompress((tmp_path / "profile.json.gz").read_bytes()) == (
+        b'{"version": "v3"}'
+    )
+    if profile_snapshot.brotli is not None:
+        assert (tmp_path / "profile.json.br").exists()
+
+    # Only the newest versions are kept, no temp files are left behind
+    assert sorted(p.name for p in tmp_path.glob("profile.*.json")) == [
+        "profile.v2.json",
+        "profile.v3.json",
+    ]
+    assert not list(tmp_path.glob(".tmp-*"))
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_snapshot_is_withdrawn(tmp_path):
+    """Test a failed write removes the snapshot instead of leaving it stale"""
+    snapshot = ProfileSnapshot(tmp_path)
+    snapshot.write(b'{"old": true}', "old")
+
+    with (
+        patch.object(
+            profile_snapshot, "get_profile_snapshot", return_value=snapshot
+        ),
+        patch.object(
+            profile_snapshot,
+            "render_complete_profile",
+            AsyncMock(side_effect=RuntimeError("database is gone")),
+        ),
+    ):
+        await write_profile_snapshot(MagicMock())
+
+    assert not (tmp_path / "profile.json").exists()
+    assert not (tmp_path / "profile.json.gz").exists()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_snapshot_written_from_rendered_profile(tmp_path):
+    """Test the published file holds the rendered profile body"""
+    snapshot = ProfileSnapshot(tmp_path)
+
+    with (
+        patch.object(
+            profile_snapshot, "get_profile_snapshot", return_value=snapshot
+        ),
+        patch.object(
+            profile_snapshot,
+            "render_complete_profile",
+            AsyncMock(return_value=b'{"basics": null}'),
+        ),
+    ):
+        await write_profile_snapshot(MagicMock())
+
+    assert (tmp_path / "profile.json").read_bytes() == b'{"basics": null}'
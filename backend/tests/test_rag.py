@@ -1,11 +1,26 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.context import RetrievedChunk
+from app.core.conversation import ConversationStore
+from app.core.faq import FaqAnswer, FaqMatcher
+from app.services import rag
 from app.services.rag import RAGService
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Cached retrievals must not leak between tests"""
+    rag.clear_retrieval_cache()
+    rag._query_embeddings.clear()
+    rag._faq_answers.load([])
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_rag_service_init():
@@ -67,6 +82,7 @@ async def test_generate_response_streaming():
             yield token
 
     mock_llm.generate_stream = mock_stream
+    mock_llm.chat_stream = mock_stream
 
     with (
         patch("app.services.rag.get_embedding_service"),
@@ -83,6 +99,149 @@ async def test_generate_response_streaming():
         assert "".join(tokens) == "Hello world"
 
 
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_response_chat_api_static_prefix():
+    """Test /api/chat messages keep a static system prefix"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_llm = Mock()
+    calls = []
+
+    async def mock_chat_stream(messages, **kwargs):
+        calls.append(messages)
+        yield "ok"
+
+    mock_llm.chat_stream = mock_chat_stream
+
+    with (
+        patch("app.services.rag.get_embedding_service"),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+
+        for context in ["First context", "Second context"]:
+            async for _ in service.generate_response(
+                question="Test?", context=context, language="en"
+            ):
+                pass
+
+    assert calls[0][0] == calls[1][0]
+    assert calls[0][0]["role"] == "system"
+    assert "First context" in calls[0][1]["content"]
+    assert "Second context" in calls[1][1]["content"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_response_legacy_generate_api():
+    """Test single-prompt /api/generate path when chat API is disabled"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_llm = Mock()
+    prompts = []
+
+    async def mock_generate_stream(prompt, **kwargs):
+        prompts.append(prompt)
+        yield "ok"
+
+    mock_llm.generate_stream = mock_generate_stream
+
+    with (
+        patch("app.services.rag.get_embedding_service"),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = False
+
+        async for _ in service.generate_response(
+            question="Test?", context="Context", language="en"
+        ):
+            pass
+
+    assert "Context" in prompts[0]
+    assert "Test?" in prompts[0]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_response_coalesces_identical_requests():
+    """Test concurrent identical questions share one LLM generation"""
+    import asyncio
+
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_llm = Mock()
+    mock_llm.model = "test-model"
+    calls = []
+
+    async def mock_chat_stream(messages, **kwargs):
+        calls.append(messages)
+        for token in ["Hello", " ", "world"]:
+            await asyncio.sleep(0.01)
+            yield token
+
+    mock_llm.chat_stream = mock_chat_stream
+
+    with (
+        patch("app.services.rag.get_embedding_service"),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        service.coalesce_generations = True
+
+        async def answer():
+            tokens = []
+            async for token in service.generate_response(
+                question="Same?", context="Context", language="en"
+            ):
+                tokens.append(token)
+            return "".join(tokens)
+
+        results = await asyncio.gather(answer(), answer(), answer())
+
+    assert results == ["Hello world"] * 3
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_generate_response_sizes_context_and_answer():
+    """Test num_ctx and num_predict are set from prompt size and language"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_llm = Mock()
+    options = []
+
+    async def mock_chat_stream(messages, **kwargs):
+        options.append(kwargs)
+        yield "ok"
+
+    mock_llm.chat_stream = mock_chat_stream
+
+    with (
+        patch("app.services.rag.get_embedding_service"),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+        patch("app.services.rag.settings") as mock_settings,
+    ):
+        mock_settings.llm_num_ctx_buckets = [2048, 4096]
+        mock_settings.llm_answer_tokens = {"ru": 768}
+        mock_settings.llm_answer_tokens_default = 512
+
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        service.coalesce_generations = False
+
+        for language, context in [("en", "short"), ("ru", "x" * 8000)]:
+            async for _ in service.generate_response(
+                question="Test?", context=context, language=language
+            ):
+                pass
+
+    assert options[0]["max_tokens"] == 512
+    assert options[0]["num_ctx"] == 2048
+    assert options[1]["max_tokens"] == 768
+    assert options[1]["num_ctx"] == 4096
+
+
 @pytest.mark.unit
 @pytest.mark.asyncio
 async def test_chat_no_results():
@@ -114,6 +273,125 @@ async def test_chat_no_results():
         assert "don't have specific information" in response.lower()
 
 
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_chat_degraded_when_llm_unavailable():
+    """Test retrieved excerpts are returned while the circuit is open"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan built FrantAI with FastAPI.", "projects", 1, {}, 0.9),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embedding.return_value = [0.1, 0.2]
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=False)
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+
+        parts = [part async for part in service.chat("What did Stan build?")]
+        answer = await service.answer("What did Stan build?")
+
+    response = "".join(parts)
+    assert "can't generate a full answer" in response
+    assert "Stan built FrantAI with FastAPI." in response
+    assert answer.degraded
+    mock_llm.chat_stream.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_answer_quoting_degraded_intro_is_not_degraded():
+    """Test only the fallback answer is flagged, not its wording"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_embedding = Mock()
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+    mock_llm.chat = AsyncMock(
+        return_value=f"{rag.DEGRADED_INTROS['en']} FrantAI."
+    )
+    chunks = [
+        RetrievedChunk(
+            id=1,
+            text="Stan built FrantAI.",
+            similarity=0.9,
+            source_table="projects",
+            source_id=1,
+            metadata={},
+        )
+    ]
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        answer = await service.answer("What did Stan build?", chunks=chunks)
+
+    assert answer.response.startswith(rag.DEGRADED_INTROS["en"])
+    assert not answer.degraded
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_chat_multi_turn_reuses_previous_turns():
+    """Test follow-up turn resends the previous turn unchanged"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan built FrantAI with FastAPI.", "projects", 1, {}, 0.9),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embedding.return_value = [0.1, 0.2]
+    sent = []
+
+    async def mock_chat_stream(messages, **kwargs):
+        sent.append(messages)
+        yield f"Answer {len(sent)}"
+
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+    mock_llm.chat_stream = mock_chat_stream
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        service.coalesce_generations = False
+        service.conversations = ConversationStore()
+
+        for question in ("What did Stan build?", "Which framework?"):
+            async for _ in service.chat(question, session_id="s1"):
+                pass
+
+    first, second = sent
+    assert len(first) == 2
+    assert len(second) == 4
+    assert second[:2] == first
+    assert second[2] == {"role": "assistant", "content": "Answer 1"}
+    assert "Which framework?" in second[3]["content"]
+
+
 @pytest.mark.unit
 def test_no_info_messages():
     """Test no-info messages in different languages"""
@@ -139,3 +417,261 @@ def test_no_info_messages():
         msg_de = service._get_no_info_message("de")
         assert "keine" in msg_de.lower()
         assert "Stans" in msg_de
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_vector_search_is_cached():
+    """Test repeated queries skip embedding and database"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan knows Go.", "skills", 1, {}, 0.8),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embedding.return_value = [0.1, 0.2]
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service"),
+    ):
+        service = RAGService(mock_db)
+        first = await service.vector_search("Does Stan know Go?")
+        second = await service.vector_search("  does stan know go ")
+
+    assert second == first
+    mock_embedding.create_query_embedding.assert_called_once()
+    mock_db.execute.assert_called_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_retrieve_reuses_speculative_result():
+    """Test final message reuses a prefetch of nearly the same text"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan knows Go.", "skills", 1, {}, 0.8),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embedding.return_value = [0.1, 0.2]
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service"),
+    ):
+        service = RAGService(mock_db)
+        assert await service.prefetch("What projects did Stan", "ip1") == 1
+
+        reused = await service.retrieve(
+            "What projects did Stan do?", client_key="ip1"
+        )
+        assert [c.id for c in reused] == [1]
+        assert mock_db.execute.call_count == 1
+
+        # Other clients and different texts search again
+        await service.retrieve("What projects did Stan do?", client_key="ip2")
+        await service.retrieve("Where did Stan study?", client_key="ip1")
+        assert mock_db.execute.call_count == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_answer_batch_embeds_once():
+    """Test batch embeds all questions in one call and answers in order"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan knows Go.", "skills", 1, {}, 0.8),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embeddings.return_value = [[0.1], [0.2]]
+
+    async def mock_chat(messages, **kwargs):
+        return f"Answer to {messages[-1]['content'][-9:]}"
+
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+    mock_llm.chat = mock_chat
+
+    session_factory = Mock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+        patch("app.services.rag.AsyncSessionLocal", session_factory),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        answers = await service.answer_batch(["Knows Go?", "Uses Go?"])
+
+    mock_embedding.create_query_embeddings.assert_called_once_with(
+        ["Knows Go?", "Uses Go?"]
+    )
+    mock_embedding.create_query_embedding.assert_not_called()
+    assert [a.question for a in answers] == ["Knows Go?", "Uses Go?"]
+    assert answers[0].response.endswith("Knows Go?")
+    assert answers[1].response.endswith("Uses Go?")
+    assert answers[0].chunk_ids == [1]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_answer_batch_bounds_open_sessions():
+    """Test a batch holds only a few pooled connections at once"""
+    questions = [f"Question {i}?" for i in range(6)]
+    mock_embedding = Mock()
+    mock_embedding.create_query_embeddings.return_value = [[0.1]] * 6
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+    mock_llm.chat = AsyncMock(return_value="Answer")
+
+    open_sessions = []
+    peak = 0
+
+    @asynccontextmanager
+    async def session_factory():
+        nonlocal peak
+        open_sessions.append(1)
+        peak = max(peak, len(open_sessions))
+        try:
+            await asyncio.sleep(0.01)
+            yield AsyncMock(spec=AsyncSession)
+        finally:
+            open_sessions.pop()
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+        patch("app.services.rag.AsyncSessionLocal", session_factory),
+        patch.object(rag.settings, "chat_batch_db_concurrency", 2),
+        patch.object(RAGService, "vector_search", AsyncMock(return_value=[])),
+    ):
+        service = RAGService(AsyncMock(spec=AsyncSession))
+        answers = await service.answer_batch(questions)
+
+    assert len(answers) == 6
+    assert peak == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_answer_batch_matches_faq_with_batch_embeddings():
+    """Test FAQ matching in a batch reuses the batch embeddings"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = Mock()
+    mock_result.fetchall.return_value = [
+        (1, "Stan studied in Moscow.", "education", 1, {}, 0.8),
+    ]
+    mock_db.execute.return_value = mock_result
+
+    mock_embedding = Mock()
+    mock_embedding.create_query_embeddings.return_value = [
+        [0.99, 0.1],
+        [0.0, 1.0],
+    ]
+
+    async def mock_chat(messages, **kwargs):
+        return "Generated"
+
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+    mock_llm.chat = mock_chat
+
+    session_factory = Mock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=mock_db)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=False)
+
+    faq = FaqMatcher()
+    faq.load(
+        [
+            (
+                FaqAnswer(1, "en", "What is your stack?", "Python, Go."),
+                [1.0, 0.0],
+            )
+        ]
+    )
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+        patch("app.services.rag.AsyncSessionLocal", session_factory),
+        patch.object(rag, "_faq_answers", faq),
+    ):
+        service = RAGService(mock_db)
+        service.use_chat_api = True
+        answers = await service.answer_batch(
+            ["What's your tech stack?", "Where did you study?"]
+        )
+
+    mock_embedding.create_query_embeddings.assert_called_once()
+    mock_embedding.create_query_embedding.assert_not_called()
+    assert answers[0].response == "Python, Go."
+    assert answers[1].response == "Generated"
+    assert answers[1].chunk_ids == [1]
+    mock_db.execute.assert_awaited_once()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_chat_answers_faq_without_retrieval_or_llm():
+    """Test a question matching a FAQ streams the stored answer"""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_embedding = Mock()
+    mock_embedding.create_query_embedding.return_value = [0.99, 0.1]
+    mock_llm = Mock()
+    mock_llm.is_available = AsyncMock(return_value=True)
+
+    rag._faq_answers.load(
+        [
+            (
+                FaqAnswer(1, "en", "What is your stack?", "Python, Go."),
+                [1.0, 0.0],
+            ),
+            (
+                FaqAnswer(2, "ru", "Какой у тебя стек?", "Python, Go."),
+                [1.0, 0.0],
+            ),
+        ]
+    )
+
+    with (
+        patch(
+            "app.services.rag.get_embedding_service",
+            return_value=mock_embedding,
+        ),
+        patch("app.services.rag.get_ollama_service", return_value=mock_llm),
+    ):
+        service = RAGService(mock_db)
+        tokens = [t async for t in service.chat("What's your tech stack?")]
+
+        # Dissimilar questions still go through the pipeline
+        mock_embedding.create_query_embedding.return_value = [0.0, 1.0]
+        assert service.match_faq("Where did you study?") is None
+
+    assert tokens == ["Python, Go."]
+    mock_db.execute.assert_not_called()
+    mock_llm.is_available.assert_not_called()
@@ -0,0 +1,135 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.rate_limit import (
+    MemoryRateLimitStore,
+    RateLimit,
+    RateLimiter,
+    RateLimitMiddleware,
+    client_ip,
+)
+
+
+def make_app(limiter, rules, **options):
+    body_reads = []
+
+    async def endpoint(request):
+        body_reads.append(await request.body())
+        return PlainTextResponse("ok")
+
+    app = Starlette(
+        routes=[
+            Route("/limited", endpoint, methods=["POST"]),
+            Route("/free", endpoint, methods=["POST"]),
+        ]
+    )
+    app.add_middleware(
+        RateLimitMiddleware, limiter=limiter, rules=rules, **options
+    )
+    return app, body_reads
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_rejects_before_reading_body():
+    """Test requests over the limit get 429 without reaching the app"""
+    limiter = RateLimiter(MemoryRateLimitStore())
+    app, body_reads = make_app(
+        limiter, {"/limited": [RateLimit(2, "minute"), RateLimit(10, "day")]}
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        statuses = [
+            (await client.post("/limited", content=b"x")).status_code
+            for _ in range(3)
+        ]
+        rejected = await client.post("/limited", content=b"x")
+        free = await client.post("/free", content=b"x")
+
+    assert statuses == [200, 200, 429]
+    assert rejected.json() == {"detail": "Rate limit exceeded: 2 per 1 minute"}
+    assert 1 <= int(rejected.headers["retry-after"]) <= 60
+    assert free.status_code == 200
+    assert len(body_reads) == 3
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_limiter_applies_all_windows_and_fails_open():
+    """Test day limit is enforced and store errors let requests through"""
+    limiter = RateLimiter(MemoryRateLimitStore())
+    limits = [RateLimit(100, "minute"), RateLimit(1, "day")]
+
+    assert await limiter.check("chat", "client", limits) is None
+    limit, _ = await limiter.check("chat", "client", limits)
+    assert limit.period == "day"
+    assert await limiter.check("chat", "other", limits) is None
+
+    class BrokenStore:
+        async def hit(self, windows):
+            raise ConnectionError("database is down")
+
+    assert await RateLimiter(BrokenStore()).check("chat", "x", limits) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_middleware_limits_forwarded_clients_separately():
+    """Test clients behind a trusted proxy are limited by their own IP"""
+    limiter = RateLimiter(MemoryRateLimitStore())
+    rules = {"/limited": [RateLimit(1, "minute")]}
+    behind_proxy, _ = make_app(limiter, rules, trusted_proxies=["127.0.0.0/8"])
+    direct, _ = make_app(RateLimiter(MemoryRateLimitStore()), rules)
+
+    async def post(app, ip):
+        async with AsyncClient(
+            transport=ASGITransport(app=app, client=("127.0.0.1", 4000)),
+            base_url="http://test",
+        ) as client:
+            response = await client.post(
+                "/limited", headers={"X-Forwarded-For": ip}
+            )
+        return response.status_code
+
+    assert [
+        await post(behind_proxy, ip) for ip in ("1.1.1.1", "2.2.2.2", "1.1.1.1")
+    ] == [200, 200, 429]
+    # Headers of an untrusted peer are ignored: it is one client
+    assert [await post(direct, ip) for ip in ("1.1.1.1", "2.2.2.2")] == [
+        200,
+        429,
+    ]
+
+
+@pytest.mark.unit
+def test_client_ip_trusts_only_proxy_headers():
+    """Test forwarded addresses are used only from trusted proxies"""
+
+    def scope(peer, **headers):
+        return {
+            "client": (peer, 4000),
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+
+    proxies = ["10.0.0.0/8"]
+    assert client_ip(scope("10.0.0.2", x_real_ip="1.2.3.4"), proxies) == (
+        "1.2.3.4"
+    )
+    # Spoofed leading entries are skipped: last hop not added by a proxy
+    forwarded = "6.6.6.6, 1.2.3.4, 10.0.0.3"
+    assert client_ip(scope("10.0.0.2", x_forwarded_for=forwarded), proxies) == (
+        "1.2.3.4"
+    )
+    assert client_ip(scope("5.5.5.5", x_real_ip="1.2.3.4"), proxies) == (
+        "5.5.5.5"
+    )
+    assert client_ip(scope("10.0.0.2"), proxies) == "10.0.0.2"
+    assert client_ip({}, proxies) == "unknown"
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from app.core.resumable import ResumableStreams
+
+
+def frame(text: str) -> str:
+    return f"data: {text}\n\n"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reconnect_resumes_after_last_event_id():
+    """Test a reconnect continues the same generation without rerunning it"""
+    streams = ResumableStreams()
+    release = asyncio.Event()
+    runs = 0
+
+    async def source():
+        nonlocal runs
+        runs += 1
+        yield frame("a")
+        yield frame("b")
+        await release.wait()
+        yield frame("c")
+
+    stream_id = streams.start(source())
+    first = streams.subscribe(stream_id)
+    received = [await anext(first), await anext(first)]
+    await first.aclose()  # connection dropped
+
+    assert received == [
+        f"id: {stream_id}:0\ndata: a\n\n",
+        f"id: {stream_id}:1\ndata: b\n\n",
+    ]
+
+    resumed = streams.resume(f"{stream_id}:1")
+    release.set()
+    assert [f async for f in resumed] == [f"id: {stream_id}:2\ndata: c\n\n"]
+
+    # Finished answers replay from the buffer
+    replay = streams.resume(f"{stream_id}:0")
+    assert len([f async for f in replay]) == 2
+    assert runs == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_cancelled_after_grace():
+    """Test generation stops when nobody reconnects in time"""
+    streams = ResumableStreams(grace=0.01)
+    cancelled = asyncio.Event()
+
+    async def source():
+        yield frame("a")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    subscriber = streams.subscribe(streams.start(source()))
+    await anext(subscriber)
+    await subscriber.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_unread_stream_is_cancelled_after_release():
+    """Test a stream whose client left before subscribing is cancelled"""
+    streams = ResumableStreams(grace=0.01)
+    cancelled = asyncio.Event()
+
+    async def source():
+        try:
+            await asyncio.sleep(10)
+            yield frame("never")
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    streams.release(streams.start(source()))
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_finished_streams_expire():
+    """Test unknown, malformed and expired ids are not resumed"""
+    now = [0.0]
+    streams = ResumableStreams(ttl=60, clock=lambda: now[0])
+
+    async def source():
+        yield frame("a")
+
+    stream_id = streams.start(source())
+    assert len([f async for f in streams.subscribe(stream_id)]) == 1
+
+    assert streams.resume("unknown:0") is None
+    assert streams.resume(stream_id) is None
+    now[0] = 61
+    assert streams.resume(f"{stream_id}:0") is None
+    assert len(streams) == 0
@@ -0,0 +1,47 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.core import serialization
+from app.core.serialization import (
+    FastJSONResponse,
+    json_dumps,
+    model_response,
+    sse_frame,
+)
+from app.schemas.profile import CompleteProfileResponse
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("encoder", ["orjson", "json"])
+def test_json_dumps_is_compact_utf8(encoder):
+    """Test both encoders produce the same compact UTF-8 JSON"""
+    content = {"token": "Привет, Stan", "done": True, "time": 12}
+
+    with patch.object(serialization.settings, "json_encoder", encoder):
+        body = json_dumps(content)
+        frame = sse_frame({"token": "a"})
+
+    assert body == '{"token":"Привет, Stan","done":true,"time":12}'.encode()
+    assert frame == 'data: {"token":"a"}\n\n'
+
+
+@pytest.mark.unit
+def test_fast_json_response_renders_with_encoder():
+    """Test the default response class uses the fast encoder"""
+    response = FastJSONResponse({"detail": "ok"})
+
+    assert response.body == b'{"detail":"ok"}'
+    assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.unit
+def test_model_response_serializes_model_directly():
+    """Test pydantic models skip the intermediate dict"""
+    profile = CompleteProfileResponse()
+
+    response = model_response(profile, status_code=200)
+
+    assert response.body == profile.model_dump_json().encode()
+    assert json.loads(response.body)["experience"] == []
@@ -0,0 +1,109 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.core.session_guard import (
+    MemorySessionLockStore,
+    SessionBusyError,
+    SessionGuard,
+)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reject_policy_rejects_busy_session():
+    """Test a second generation on a leased session is rejected"""
+    guard = SessionGuard(MemorySessionLockStore(), policy="reject")
+    session_id = uuid4()
+
+    lease = await guard.acquire(session_id)
+    with pytest.raises(SessionBusyError):
+        await guard.acquire(session_id)
+
+    # Other sessions are independent, released ones are free again
+    await guard.release(uuid4(), await guard.acquire(uuid4()))
+    await guard.release(session_id, lease)
+    assert await guard.acquire(session_id)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_queue_policy_waits_for_release():
+    """Test a queued request runs after the running one and times out"""
+    guard = SessionGuard(
+        MemorySessionLockStore(),
+        policy="queue",
+        queue_timeout=0.2,
+        poll_interval=0.01,
+    )
+    session_id = uuid4()
+    lease = await guard.acquire(session_id)
+
+    queued = asyncio.create_task(guard.acquire(session_id))
+    await asyncio.sleep(0.05)
+    assert not queued.done()
+
+    await guard.release(session_id, lease)
+    second = await queued
+    assert second != lease
+
+    with pytest.raises(SessionBusyError):
+        await guard.acquire(session_id)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_attach_policy_follows_running_stream():
+    """Test a retry receives the whole running stream"""
+    guard = SessionGuard(MemorySessionLockStore(), policy="attach")
+    session_id = uuid4()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def generate():
+        yield "a"
+        started.set()
+        await release.wait()
+        yield "b"
+
+    assert guard.attach(session_id) is None
+    first = guard.stream(session_id, generate)
+    first_tokens = asyncio.create_task(_collect(first))
+    await started.wait()
+
+    attached = guard.attach(session_id)
+    assert attached is not None
+    release.set()
+
+    assert await _collect(attached) == ["a", "b"]
+    assert await first_tokens == ["a", "b"]
+    assert guard.attach(session_id) is None
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_abandoned_stream_stops_before_first_read():
+    """Test a shared stream nobody started reading is cancelled"""
+    guard = SessionGuard(MemorySessionLockStore(), policy="attach")
+    session_id = uuid4()
+    cancelled = asyncio.Event()
+
+    async def generate():
+        try:
+            await asyncio.sleep(10)
+            yield "never"
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    guard.stream(session_id, generate)
+    await asyncio.sleep(0)
+    guard.abandon(session_id)
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert guard.attach(session_id) is None
+
+
+async def _collect(stream) -> list[str]:
+    return [token async for token in stream]
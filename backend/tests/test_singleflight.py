@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def make_source(tokens, calls, delay=0.01):
+    """Create a source factory that counts how often it is started"""
+
+    async def source():
+        calls.append(1)
+        for token in tokens:
+            await asyncio.sleep(delay)
+            yield token
+
+    return source
+
+
+async def collect(stream, delay=0.0):
+    result = []
+    async for token in stream:
+        result.append(token)
+        if delay:
+            await asyncio.sleep(delay)
+    return result
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_concurrent_streams_share_one_source():
+    """Test identical concurrent requests start the source once"""
+    flights = SingleFlight()
+    calls = []
+    factory = make_source(["a", "b", "c"], calls)
+
+    results = await asyncio.gather(
+        collect(flights.stream("key", factory)),
+        collect(flights.stream("key", factory)),
+    )
+
+    assert results == [["a", "b", "c"], ["a", "b", "c"]]
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_late_joiner_gets_full_answer():
+    """Test late subscriber replays buffered tokens"""
+    flights = SingleFlight()
+    calls = []
+    factory = make_source(["a", "b", "c", "d"], calls)
+
+    first = asyncio.create_task(collect(flights.stream("key", factory)))
+    await asyncio.sleep(0.025)
+    late = await collect(flights.stream("key", factory))
+
+    assert late == ["a", "b", "c", "d"]
+    assert await first == ["a", "b", "c", "d"]
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_stall_others():
+    """Test fast subscriber finishes before a slow one"""
+    flights = SingleFlight()
+    factory = make_source(["a", "b", "c"], [], delay=0.001)
+
+    slow = asyncio.create_task(
+        collect(flights.stream("key", factory), delay=0.05)
+    )
+    fast = await asyncio.wait_for(
+        collect(flights.stream("key", factory)), timeout=0.1
+    )
+
+    assert fast == ["a", "b", "c"]
+    assert not slow.done()
+    assert await slow == ["a", "b", "c"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_different_keys_are_independent():
+    """Test different keys run separate sources"""
+    flights = SingleFlight()
+    calls = []
+    factory = make_source(["a"], calls)
+
+    await asyncio.gather(
+        collect(flights.stream("one", factory)),
+        collect(flights.stream("two", factory)),
+    )
+
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_source_error_reaches_all_subscribers():
+    """Test source errors are raised to every subscriber"""
+    flights = SingleFlight()
+
+    async def failing():
+        yield "a"
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        collect(flights.stream("key", failing)),
+        collect(flights.stream("key", failing)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_last_subscriber_leaving_cancels_source():
+    """Test source is cancelled when nobody is listening"""
+    flights = SingleFlight()
+    closed = []
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                yield "x"
+        finally:
+            closed.append(True)
+
+    stream = flights.stream("key", endless)
+    await anext(stream)
+    await stream.aclose()
+    await asyncio.sleep(0.01)
+
+    assert closed == [True]
+    assert len(flights) == 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_rejoin_after_cancel_starts_new_source():
+    """Test a caller arriving right after the last one left starts over"""
+    flights = SingleFlight()
+    calls = []
+    factory = make_source(["a", "b", "c"], calls, delay=0.001)
+
+    stream = flights.stream("key", factory)
+    await anext(stream)
+    await stream.aclose()
+    # The cancelled flight's task has not finished yet
+    assert len(flights) == 1
+    assert "key" not in flights
+
+    assert await collect(flights.stream("key", factory)) == ["a", "b", "c"]
+    assert len(calls) == 2
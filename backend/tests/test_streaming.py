@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.streaming import coalesce_tokens
+
+
+async def timed_source(tokens, delays, closed=None):
+    try:
+        for token, delay in zip(tokens, delays, strict=True):
+            await asyncio.sleep(delay)
+            yield token
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def collect(stream):
+    return [token async for token in stream]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_coalesce_merges_fast_tokens():
+    """Test tokens arriving faster than the interval share one frame"""
+    tokens = [f"t{i} " for i in range(10)]
+    chunks = await collect(
+        coalesce_tokens(
+            timed_source(tokens, [0] * 10), interval_ms=50, max_chars=1000
+        )
+    )
+
+    assert chunks[0] == "t0 "
+    assert len(chunks) == 2
+    assert "".join(chunks) == "".join(tokens)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_coalesce_flushes_on_size():
+    """Test buffer is flushed once it reaches max_chars"""
+    tokens = ["abcd"] * 9
+    chunks = await collect(
+        coalesce_tokens(
+            timed_source(tokens, [0] * 9), interval_ms=1000, max_chars=8
+        )
+    )
+
+    assert chunks == ["abcd"] + ["abcdabcd"] * 4
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_coalesce_first_token_and_deadline_flush():
+    """Test first token is immediate and stalled buffer is flushed on time"""
+    source = timed_source(["a", "b", "c"], [0, 0, 0.3])
+    stream = coalesce_tokens(source, interval_ms=20, max_chars=1000)
+
+    start = time.monotonic()
+    assert await anext(stream) == "a"
+    assert time.monotonic() - start < 0.1
+
+    # "b" must not wait for the slow "c"
+    assert await anext(stream) == "b"
+    assert time.monotonic() - start < 0.2
+    assert await anext(stream) == "c"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_coalesce_disabled_and_close():
+    """Test interval 0 passes tokens through and closing stops the source"""
+    tokens = ["a", "b", "c"]
+    chunks = await collect(
+        coalesce_tokens(timed_source(tokens, [0] * 3), interval_ms=0)
+    )
+    assert chunks == tokens
+
+    closed = []
+    stream = coalesce_tokens(
+        timed_source(["a", "b"], [0, 10], closed), interval_ms=20
+    )
+    assert await anext(stream) == "a"
+    waiting = asyncio.create_task(anext(stream))
+    await asyncio.sleep(0.05)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    await stream.aclose()
+    assert closed == [True]
@@ -2,6 +2,7 @@ import pytest
 from app.services.text_utils import (
     detect_language,
     estimate_tokens,
+    estimate_llm_tokens,
     chunk_text,
     split_into_sentences
 )
@@ -78,3 +79,12 @@ def test_chunk_text_empty():
 
     chunks = chunk_text("   ")
     assert chunks == []
+
+@pytest.mark.unit
+def test_estimate_llm_tokens():
+    """Test LLM token estimation is higher for non-Latin scripts"""
+    english = estimate_llm_tokens("a" * 35)
+    russian = estimate_llm_tokens("я" * 35)
+    assert english == 10
+    assert russian > english
+    assert estimate_llm_tokens("") == 0
@@ -12,6 +12,13 @@ export const profileAPI = {
   getProfile: () => apiClient.get('/profile'),
 };
 
+// Event id of the frame after `id` (`<stream id>:<frame index>`)
+const nextEventId = (id) => {
+  const separator = id.lastIndexOf(':');
+  const index = Number(id.slice(separator + 1));
+  return `${id.slice(0, separator)}:${index + 1}`;
+};
+
 // Chat API
 export const chatAPI = {
   createSession: () => apiClient.post('/chat/session/new'),
@@ -19,53 +26,120 @@ export const chatAPI = {
   getSession: (sessionId) =>
     apiClient.get(`/chat/session/${sessionId}`),
 
+  // Speculative retrieval while the user is typing (best effort)
+  prefetch: (message) =>
+    apiClient.post('/chat/prefetch', { message }).catch(() => {}),
+
+  // Streams the answer as SSE. If the connection drops mid-answer, the
+  // request is resent with Last-Event-ID and the server continues the
+  // same answer. A server that can't continue it (another worker) sends
+  // the answer again; a { restart: true } frame is yielded first then.
   sendMessage: async function* (message, sessionId = null) {
-    const response = await fetch('/api/v1/chat/message', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        message,
-        session_id: sessionId,
-      }),
-    });
-
-    if (!response.ok) {
-      const error = await response.json();
-      throw new Error(error.detail || 'Failed to send message');
-    }
+    const maxReconnects = 3;
+    // Same key on every resend, so the server never answers twice
+    const idempotencyKey = crypto.randomUUID();
+    let lastEventId = null;
+    let reconnects = 0;
+    let finished = false;
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
-    let buffer = '';
+    // Resend with Last-Event-ID after a drop, unless we can't resume
+    const retry = async (error) => {
+      if (!lastEventId || reconnects >= maxReconnects) throw error;
+      reconnects += 1;
+      await new Promise((resolve) => setTimeout(resolve, 500 * reconnects));
+    };
 
-    try {
-      while (true) {
-        const { done, value } = await reader.read();
-        if (done) break;
+    while (!finished) {
+      const headers = { 'Content-Type': 'application/json' };
+      if (lastEventId) {
+        headers['Last-Event-ID'] = lastEventId;
+      }
 
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split('\n');
+      let response;
+      try {
+        response = await fetch('/api/v1/chat/message', {
+          method: 'POST',
+          headers,
+          body: JSON.stringify({
+            message,
+            session_id: sessionId,
+            idempotency_key: idempotencyKey,
+          }),
+        });
+      } catch (error) {
+        await retry(error);
+        continue;
+      }
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'Failed to send message');
+      }
 
-        // Keep the last incomplete line in the buffer
-        buffer = lines.pop() || '';
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let dropped = null;
+      let frameId = null;
+      // A resend must continue right after the last frame we got
+      const expectedId = lastEventId && nextEventId(lastEventId);
+      let checked = !expectedId;
 
-        for (const line of lines) {
-          if (line.startsWith('data: ')) {
-            const data = JSON.parse(line.slice(6));
-            yield data;
+      const parseLine = (line) => {
+        if (line.startsWith('id: ')) {
+          frameId = line.slice(4);
+          return [];
+        }
+        if (line.startsWith('data: ')) {
+          const data = JSON.parse(line.slice(6));
+          const frames = [data];
+          if (!checked) {
+            checked = true;
+            // Anything else is a new stream: replace the partial answer
+            if (!data.restart && frameId !== expectedId) {
+              frames.unshift({ restart: true });
+            }
           }
+          // Only count a frame as received once its data arrived
+          if (frameId) lastEventId = frameId;
+          frameId = null;
+          if (data.done || data.error) finished = true;
+          return frames;
+        }
+        return [];
+      };
+
+      try {
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+
+          // Keep the last incomplete line in the buffer
+          buffer = lines.pop() || '';
+
+          for (const line of lines) {
+            yield* parseLine(line);
+          }
+        }
+
+        // Process any remaining buffer
+        if (buffer.trim()) {
+          yield* parseLine(buffer);
         }
+      } catch (error) {
+        dropped = error;
+      } finally {
+        reader.releaseLock();
       }
 
-      // Process any remaining buffer
-      if (buffer.trim() && buffer.startsWith('data: ')) {
-        const data = JSON.parse(buffer.slice(6));
-        yield data;
+      if (!finished) {
+        // Streams without event ids cannot be resumed
+        if (!lastEventId && !dropped) break;
+        await retry(dropped || new Error('Connection lost'));
       }
-    } finally {
-      reader.releaseLock();
     }
   },
 };
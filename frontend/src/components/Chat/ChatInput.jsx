@@ -1,10 +1,26 @@
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import { Box, TextField, IconButton } from '@mui/material';
 import SendIcon from '@mui/icons-material/Send';
+import { chatAPI } from '../../api/client';
+
+// Pause in typing before context is prefetched
+const PREFETCH_DEBOUNCE_MS = 400;
+const PREFETCH_MIN_LENGTH = 10;
 
 function ChatInput({ onSend, disabled }) {
   const [message, setMessage] = useState('');
 
+  useEffect(() => {
+    const text = message.trim();
+    if (disabled || text.length < PREFETCH_MIN_LENGTH) return;
+
+    const timer = setTimeout(
+      () => chatAPI.prefetch(text),
+      PREFETCH_DEBOUNCE_MS
+    );
+    return () => clearTimeout(timer);
+  }, [message, disabled]);
+
   const handleSend = () => {
     if (message.trim() && !disabled) {
       onSend(message);
@@ -80,6 +80,19 @@ function ChatWidget() {
           setSessionIdState(data.session_id);
         }
 
+        // The answer is sent again from its start: drop the partial one
+        if (data.restart) {
+          setMessages((prev) => {
+            const newMessages = [...prev];
+            const lastIndex = newMessages.length - 1;
+            newMessages[lastIndex] = {
+              ...newMessages[lastIndex],
+              content: '',
+            };
+            return newMessages;
+          });
+        }
+
         if (data.token) {
           setMessages((prev) => {
             const newMessages = [...prev];